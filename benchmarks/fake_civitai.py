@@ -0,0 +1,285 @@
+"""
+Local stand-in for the Civitai orchestration API and blob storage.
+
+Run standalone for manual load tests:
+    python -m benchmarks.fake_civitai --port 8100 --job-duration 1,3 --throttle-rate 0.05
+then start the API or MCP server with CIVITAI_BASE_URL=http://127.0.0.1:8100.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+# Smallest valid PNG (1x1 transparent pixel)
+PNG_HEADER = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d4944415478da63f8cfc0f01f0005000201c6d6f4b90000000049454e44ae426082"
+)
+
+
+@dataclass
+class FakeBackendConfig:
+    """Behaviour of the fake backend."""
+
+    # Seconds from submission until a job's blob is available
+    job_duration_min: float = 0.5
+    job_duration_max: float = 2.0
+    # Probability that any API call fails with HTTP 500
+    failure_rate: float = 0.0
+    # Probability that a submission is throttled with HTTP 429
+    throttle_rate: float = 0.0
+    # Submissions per second before 429s are returned (0 disables)
+    rate_limit: float = 0.0
+    # Seconds sent in Retry-After on 429 responses
+    retry_after: int = 1
+    # Size of each blob in bytes (padded PNG)
+    blob_size: int = 256 * 1024
+    cost: float = 1.0
+    seed: Optional[int] = None
+
+
+@dataclass
+class FakeBackendStats:
+    """Upstream call counts seen by the fake backend."""
+
+    submits: int = 0
+    polls: int = 0
+    downloads: int = 0
+    throttled: int = 0
+    failed: int = 0
+    jobs: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class _FakeJob:
+    job_id: str
+    seed: int
+    ready_at: float
+
+
+class FakeCivitai:
+    """
+    aiohttp server implementing the parts of the Civitai API the service uses.
+
+    POST /v1/consumer/jobs submits jobs, GET /v1/consumer/jobs?token= reports
+    their status (including queue position ETAs) and GET /blobs/{job_id}
+    serves the generated image once it is ready. Point the service at it with
+    CIVITAI_BASE_URL.
+    """
+
+    def __init__(self, config: Optional[FakeBackendConfig] = None):
+        self.config = config or FakeBackendConfig()
+        self.stats = FakeBackendStats()
+        self._tokens: Dict[str, List[_FakeJob]] = {}
+        self._jobs: Dict[str, _FakeJob] = {}
+        self._random = random.Random(self.config.seed)
+        self._window_started = time.monotonic()
+        self._window_count = 0
+        self._runner: Optional[web.AppRunner] = None
+        self._blob = PNG_HEADER + b"\0" * max(0, self.config.blob_size - len(PNG_HEADER))
+        self.url = ""
+
+    def app(self) -> web.Application:
+        """Build the aiohttp application."""
+        app = web.Application()
+        app.router.add_post("/v1/consumer/jobs", self._submit)
+        app.router.add_get("/v1/consumer/jobs", self._status)
+        app.router.add_get("/blobs/{job_id}", self._blob_handler)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.url = f"http://{host}:{self._runner.addresses[0][1]}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeCivitai":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def _maybe_fail(self) -> None:
+        if self.config.failure_rate and self._random.random() < self.config.failure_rate:
+            self.stats.failed += 1
+            raise web.HTTPInternalServerError(text="Injected upstream failure")
+
+    def _maybe_throttle(self) -> None:
+        throttled = bool(
+            self.config.throttle_rate and self._random.random() < self.config.throttle_rate
+        )
+        if self.config.rate_limit:
+            now = time.monotonic()
+            if now - self._window_started >= 1.0:
+                self._window_started = now
+                self._window_count = 0
+            self._window_count += 1
+            throttled = throttled or self._window_count > self.config.rate_limit
+        if throttled:
+            self.stats.throttled += 1
+            raise web.HTTPTooManyRequests(
+                text="Rate limited", headers={"Retry-After": str(self.config.retry_after)}
+            )
+
+    async def _submit(self, request: web.Request) -> web.Response:
+        self.stats.submits += 1
+        self._maybe_throttle()
+        self._maybe_fail()
+        body = await request.json()
+        quantity = int(body.get("quantity") or 1)
+        seed = body.get("params", {}).get("seed")
+
+        token = uuid.uuid4().hex
+        now = time.monotonic()
+        jobs = []
+        for index in range(quantity):
+            duration = self._random.uniform(
+                self.config.job_duration_min, self.config.job_duration_max
+            )
+            job = _FakeJob(
+                job_id=uuid.uuid4().hex,
+                seed=seed + index if seed is not None and seed >= 0 else self._random.getrandbits(31),
+                ready_at=now + duration,
+            )
+            jobs.append(job)
+            self._jobs[job.job_id] = job
+        self._tokens[token] = jobs
+        self.stats.jobs += quantity
+
+        return web.json_response({
+            "token": token,
+            "jobs": [
+                {"jobId": job.job_id, "cost": self.config.cost, "result": None, "scheduled": True}
+                for job in jobs
+            ],
+        })
+
+    async def _status(self, request: web.Request) -> web.Response:
+        self.stats.polls += 1
+        self._maybe_fail()
+        token = request.query.get("token", "")
+        jobs = self._tokens.get(token)
+        if jobs is None:
+            raise web.HTTPNotFound(text=f"Unknown token {token}")
+
+        now = time.monotonic()
+        base_url = f"{request.scheme}://{request.host}"
+        return web.json_response({
+            "token": token,
+            "jobs": [self._job_status(job, now, base_url) for job in jobs],
+        })
+
+    def _job_status(self, job: _FakeJob, now: float, base_url: str) -> Dict[str, Any]:
+        ready = now >= job.ready_at
+        status: Dict[str, Any] = {
+            "jobId": job.job_id,
+            "cost": self.config.cost,
+            "scheduled": not ready,
+            "result": [{
+                "available": ready,
+                "blobKey": job.job_id,
+                "blobUrl": f"{base_url}/blobs/{job.job_id}" if ready else None,
+                "seed": job.seed,
+            }],
+        }
+        if not ready:
+            status["serviceProviders"] = {
+                "fake": {
+                    "queuePosition": {
+                        "estimatedStartDuration": _timespan(job.ready_at - now),
+                    }
+                }
+            }
+        return status
+
+    async def _blob_handler(self, request: web.Request) -> web.Response:
+        self.stats.downloads += 1
+        self._maybe_fail()
+        job = self._jobs.get(request.match_info["job_id"])
+        if job is None or time.monotonic() < job.ready_at:
+            raise web.HTTPNotFound(text="Blob not found")
+        return web.Response(body=self._blob, content_type="image/png")
+
+
+def _timespan(seconds: float) -> str:
+    """Format seconds as a .NET TimeSpan string (hh:mm:ss.fff)."""
+    seconds = max(0.0, seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+
+def add_backend_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add fake backend behaviour options to a command-line parser."""
+    group = parser.add_argument_group("fake backend")
+    group.add_argument("--job-duration", default="0.5,2.0",
+                       help="Job duration range in seconds as MIN,MAX (default: 0.5,2.0)")
+    group.add_argument("--failure-rate", type=float, default=0.0,
+                       help="Probability of HTTP 500 on any upstream call")
+    group.add_argument("--throttle-rate", type=float, default=0.0,
+                       help="Probability of HTTP 429 on a submission")
+    group.add_argument("--rate-limit", type=float, default=0.0,
+                       help="Submissions per second before HTTP 429 (0 disables)")
+    group.add_argument("--blob-size", type=int, default=256 * 1024,
+                       help="Generated image size in bytes")
+    group.add_argument("--seed", type=int, default=None,
+                       help="Random seed for reproducible durations and failures")
+
+
+def config_from_args(args: argparse.Namespace) -> FakeBackendConfig:
+    """Build a backend config from parsed add_backend_arguments options."""
+    low, _, high = args.job_duration.partition(",")
+    return FakeBackendConfig(
+        job_duration_min=float(low),
+        job_duration_max=float(high or low),
+        failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit,
+        blob_size=args.blob_size,
+        seed=args.seed,
+    )
+
+
+async def serve(config: FakeBackendConfig, host: str, port: int) -> None:
+    """Run the fake backend until cancelled."""
+    backend = FakeCivitai(config)
+    url = await backend.start(host, port)
+    print(f"Fake Civitai backend listening on {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await backend.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(config_from_args(args), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
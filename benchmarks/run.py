@@ -0,0 +1,347 @@
+"""
+Benchmark the REST API and MCP tool against the local fake Civitai backend.
+
+Each target is driven in-process at every concurrency level with a fresh
+service, and the run is written to a JSON file so later runs can be compared:
+
+    python -m benchmarks.run --target api,mcp --concurrency 1,8,32 --requests 64
+    python -m benchmarks.run --compare benchmarks/results/20250101-120000.json
+
+The api, api-json and health targets build the app with a serving profile:
+"production" (orjson responses, JSON compression) or "baseline" (FastAPI's
+default JSON rendering, no compression), so the two can be compared:
+
+    python -m benchmarks.run --target api-json,health --serving baseline
+    python -m benchmarks.run --target api-json,health --compare <baseline file>
+
+Service settings (polling strategy, admission limits, ...) are read from the
+environment as usual; CIVITAI_BASE_URL is always pointed at the fake backend.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# The MCP server module validates the token at import time
+os.environ.setdefault("CIVITAI_API_TOKEN", "benchmark")
+
+from benchmarks.fake_civitai import (  # noqa: E402
+    FakeBackendStats,
+    FakeCivitai,
+    add_backend_arguments,
+    config_from_args,
+)
+from src.core.config.settings import Settings  # noqa: E402
+from src.core.services.civitai_service import CivitaiService  # noqa: E402
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+Driver = Callable[[int], Awaitable[None]]
+
+# create_app arguments for each serving profile
+SERVING = {
+    "baseline": {"fast_json": False, "compression": "off"},
+    "production": {"fast_json": True, "compression": "auto"},
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated percentile of sorted values (q in 0-100)."""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _api_client(service: CivitaiService, serving: str):
+    """HTTP client calling the FastAPI app over an in-process transport."""
+    import httpx
+
+    from src.api.dependencies import get_civitai_service
+    from src.api.main import create_app
+
+    app = create_app(**SERVING[serving])
+    app.dependency_overrides[get_civitai_service] = lambda: service
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=None
+    )
+
+
+async def api_driver(
+    service: CivitaiService, serving: str
+) -> tuple[Driver, Callable[[], Awaitable[None]]]:
+    """Drive POST /images, returning the image bytes."""
+    client = _api_client(service, serving)
+
+    async def call(index: int) -> None:
+        response = await client.post("/images", json={
+            "model": MODEL,
+            "prompt": f"benchmark image {index}",
+            "return_image": True,
+        })
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        await response.aread()
+
+    return call, client.aclose
+
+
+async def api_json_driver(
+    service: CivitaiService, serving: str
+) -> tuple[Driver, Callable[[], Awaitable[None]]]:
+    """Drive POST /images for JSON metadata, the hot path for clients using blob URLs."""
+    client = _api_client(service, serving)
+
+    async def call(index: int) -> None:
+        response = await client.post("/images", json={
+            "model": MODEL,
+            "prompt": f"benchmark image {index}",
+        })
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    return call, client.aclose
+
+
+async def health_driver(
+    service: CivitaiService, serving: str
+) -> tuple[Driver, Callable[[], Awaitable[None]]]:
+    """Drive GET /health, as load balancer probes do."""
+    client = _api_client(service, serving)
+
+    async def call(index: int) -> None:
+        response = await client.get("/health")
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    return call, client.aclose
+
+
+async def mcp_driver(
+    service: CivitaiService, serving: str
+) -> tuple[Driver, Callable[[], Awaitable[None]]]:
+    """Drive the generate_image MCP tool."""
+    from src.mcp import server
+
+    original = server.service
+    server.service = service
+
+    async def call(index: int) -> None:
+        await server.mcp.call_tool(
+            "generate_image", {"model": MODEL, "prompt": f"benchmark image {index}"}
+        )
+
+    async def restore() -> None:
+        server.service = original
+
+    return call, restore
+
+
+DRIVERS = {
+    "api": api_driver,
+    "api-json": api_json_driver,
+    "health": health_driver,
+    "mcp": mcp_driver,
+}
+
+
+async def run_level(
+    target: str,
+    concurrency: int,
+    total: int,
+    backend: FakeCivitai,
+    settings: Settings,
+    serving: str = "production",
+) -> Dict[str, Any]:
+    """
+    Send total requests to a target with at most concurrency in flight.
+
+    Returns:
+        Latency percentiles, throughput, error counts, upstream call counts
+        and peak memory for the level
+    """
+    backend.stats = FakeBackendStats()
+    service = CivitaiService("benchmark", settings)
+    call, cleanup = await DRIVERS[target](service, serving)
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    queue = iter(range(total))
+
+    async def worker() -> None:
+        for index in queue:
+            started = time.perf_counter()
+            try:
+                await call(index)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await cleanup()
+        await service.close()
+
+    latencies.sort()
+    return {
+        "target": target,
+        "serving": serving,
+        "concurrency": concurrency,
+        "requests": total,
+        "succeeded": len(latencies),
+        "failed": sum(errors.values()),
+        "errors": dict(errors),
+        "elapsed": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "upstream": backend.stats.as_dict(),
+        "poll_requests": service.metrics.poll_requests.value(),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+async def run_benchmark(
+    targets: List[str],
+    levels: List[int],
+    total: int,
+    backend: FakeCivitai,
+    settings: Optional[Settings] = None,
+    serving: str = "production",
+) -> List[Dict[str, Any]]:
+    """Run every target at every concurrency level against a started backend."""
+    settings = (settings or Settings()).model_copy(update={"civitai_base_url": backend.url})
+    results = []
+    for target in targets:
+        for concurrency in levels:
+            results.append(
+                await run_level(target, concurrency, total, backend, settings, serving)
+            )
+    return results
+
+
+def format_table(results: List[Dict[str, Any]], baseline: Optional[Dict] = None) -> str:
+    """Render results as a text table, with % change against a baseline run if given."""
+    previous = {
+        (r["target"], r["concurrency"]): r for r in (baseline or {}).get("results", [])
+    }
+    header = f"{'target':<8} {'conc':>5} {'ok':>6} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'polls':>7} {'rss MB':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lat = r["latency"]
+        lines.append(
+            f"{r['target']:<8} {r['concurrency']:>5} {r['succeeded']:>6} {r['failed']:>5} "
+            f"{lat['p50']:>8.3f} {lat['p95']:>8.3f} {lat['p99']:>8.3f} "
+            f"{r['throughput_rps']:>8.2f} {r['upstream']['polls']:>7} {r['peak_rss_mb']:>8.1f}"
+        )
+        old = previous.get((r["target"], r["concurrency"]))
+        if old:
+            lines.append(
+                f"{'':<8} {'vs':>5} {'':>6} {'':>5} "
+                f"{_delta(lat['p50'], old['latency']['p50']):>8} "
+                f"{_delta(lat['p95'], old['latency']['p95']):>8} "
+                f"{_delta(lat['p99'], old['latency']['p99']):>8} "
+                f"{_delta(r['throughput_rps'], old['throughput_rps']):>8} "
+                f"{_delta(r['upstream']['polls'], old['upstream']['polls']):>7} "
+                f"{_delta(r['peak_rss_mb'], old['peak_rss_mb']):>8}"
+            )
+    return "\n".join(lines)
+
+
+def _delta(new: float, old: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: List[Dict[str, Any]], config: Dict[str, Any], directory: Path) -> Path:
+    """Write a run to a timestamped JSON file and return its path."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps({
+        "created_at": time.time(),
+        "commit": _git_commit(),
+        "config": config,
+        "results": results,
+    }, indent=2))
+    return path
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    targets = [t for t in args.target.split(",") if t]
+    unknown = set(targets) - set(DRIVERS)
+    if unknown:
+        raise SystemExit(f"Unknown target(s): {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    async with FakeCivitai(config_from_args(args)) as backend:
+        results = await run_benchmark(
+            targets, levels, args.requests, backend, serving=args.serving
+        )
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print(format_table(results, baseline))
+    if not args.no_save:
+        path = save_results(results, vars(args), Path(args.output_dir))
+        print(f"\nResults written to {path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark against a fake Civitai backend")
+    parser.add_argument(
+        "--target", default="api,mcp", help="Comma-separated: api, api-json, health, mcp"
+    )
+    parser.add_argument(
+        "--serving", default="production", choices=sorted(SERVING),
+        help="App configuration for the API targets",
+    )
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per level")
+    parser.add_argument("--output-dir", default=str(RESULTS_DIR))
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--no-save", action="store_true", help="Do not write a results file")
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+    # The SDK's HTTP client logs every upstream request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
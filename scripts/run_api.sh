@@ -1,5 +1,5 @@
 #!/bin/bash
-# Run the FastAPI server
+# Run the FastAPI server with auto-reload for development
 
 cd "$(dirname "$0")/.." || exit
-uv run python -m src.api.main
+uv run python -m src.api.main --reload
@@ -0,0 +1,7 @@
+#!/bin/bash
+# Run the FastAPI server with several workers (APP_WORKERS, default 4). Set
+# COORDINATION_BACKEND=redis and REDIS_URL so the workers share jobs, dedup
+# locks, rate limits and cached results.
+
+cd "$(dirname "$0")/.." || exit
+uv run python -m src.api.main --workers "${APP_WORKERS:-4}" "$@"
@@ -0,0 +1,6 @@
+#!/bin/bash
+# Benchmark the API and MCP tool against a local fake Civitai backend
+# Extra arguments are passed through, e.g. --concurrency 1,16 --compare <file>
+
+cd "$(dirname "$0")/.." || exit
+uv run python -m benchmarks.run "$@"
@@ -1,7 +1,13 @@
 """API dependencies."""
 
 from functools import lru_cache
+
+from fastapi import Header
+
 from src.core.services.civitai_service import CivitaiService
+from src.core.services.job_manager import JobManager
+from src.core.services.job_store import create_job_store
+from src.core.services.model_catalog import ModelCatalog
 from src.core.config.settings import settings
 
 
@@ -9,4 +15,35 @@ from src.core.config.settings import settings
 def get_civitai_service() -> CivitaiService:
     """Get Civitai service instance."""
     settings.validate_token()
-    return CivitaiService(settings.civitai_api_token)
+    return CivitaiService(settings.civitai_api_token, settings)
+
+
+@lru_cache
+def get_model_catalog() -> ModelCatalog:
+    """Get the shared model catalog."""
+    return ModelCatalog.from_settings(settings)
+
+
+def get_caller(x_client_id: str | None = Header(default=None)) -> str:
+    """Client identity that generation costs are charged to, from X-Client-Id."""
+    return x_client_id or "anonymous"
+
+
+@lru_cache
+def get_job_manager() -> JobManager:
+    """Get the background job manager, storing jobs alongside the service's shared state."""
+    service = get_civitai_service()
+    return JobManager(service, create_job_store(settings, service.coordination), settings)
+
+
+async def close_civitai_service() -> None:
+    """Close the cached job manager, service and model catalog, if they were created."""
+    if get_job_manager.cache_info().currsize:
+        await get_job_manager().close(drain_timeout=settings.shutdown_drain_timeout)
+        get_job_manager.cache_clear()
+    if get_civitai_service.cache_info().currsize:
+        await get_civitai_service().close()
+        get_civitai_service.cache_clear()
+    if get_model_catalog.cache_info().currsize:
+        await get_model_catalog().close()
+        get_model_catalog.cache_clear()
@@ -1,21 +1,58 @@
 """FastAPI server entry point."""
 
+import argparse
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from src.api.routes import health, images
+from src.api.dependencies import close_civitai_service, get_job_manager, get_model_catalog
+from src.api.routes import costs, health, images, jobs, metrics, models
+from src.api.serving import CorrelationMiddleware, FastJSONResponse, JSONCompressionMiddleware
 from src.core.config.settings import settings
+from src.core.services.tracing import CORRELATION_HEADER
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: warm the model catalog and resume interrupted jobs; drain and release shared resources on shutdown."""
+    await get_model_catalog().start()
+    # Interrupted jobs can only be found in the journal or a persistent store
+    if settings.job_journal_path or settings.job_store == "sqlite":
+        await get_job_manager().resume()
+    yield
+    await close_civitai_service()
 
 
-def create_app() -> FastAPI:
-    """Create FastAPI application."""
+def create_app(fast_json: bool = True, compression: Optional[str] = None) -> FastAPI:
+    """
+    Create FastAPI application.
+
+    Args:
+        fast_json: Render JSON responses with orjson when it is installed
+        compression: JSON response compression ("off", "gzip" or "auto";
+            defaults to settings)
+    """
     app = FastAPI(
         title="Civitai Image Generation API",
         description="REST API for AI image generation using Civitai",
-        version="0.3.0"
+        version="0.3.0",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse if fast_json else JSONResponse,
     )
 
+    compression = compression or settings.api_compression
+    if compression != "off":
+        app.add_middleware(
+            JSONCompressionMiddleware,
+            mode=compression,
+            minimum_size=settings.api_compression_min_size,
+        )
+
     # CORS
     app.add_middleware(
         CORSMiddleware,
@@ -23,22 +60,93 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[CORRELATION_HEADER],
     )
+    # Outermost, so every response carries the correlation ID
+    app.add_middleware(CorrelationMiddleware)
 
     # Register routes
     app.include_router(health.router)
     app.include_router(images.router)
+    app.include_router(jobs.router)
+    app.include_router(costs.router)
+    app.include_router(models.router)
+    app.include_router(metrics.router)
 
     return app
 
 
 app = create_app()
 
+logger = logging.getLogger(__name__)
 
-if __name__ == "__main__":
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run the API server.
+
+    By default this runs APP_WORKERS worker processes sharing the listening
+    socket, as in production; --reload runs a single auto-reloading process
+    for development instead. --http2 serves with hypercorn, which speaks
+    HTTP/2 (negotiated over TLS when APP_SSL_CERTFILE is set, else h2c) as
+    well as HTTP/1.1.
+    """
+    parser = argparse.ArgumentParser(description="Run the Civitai image generation API")
+    parser.add_argument("--host", default=settings.app_host)
+    parser.add_argument("--port", type=int, default=settings.app_port)
+    parser.add_argument("--workers", type=int, default=settings.app_workers)
+    parser.add_argument("--reload", action="store_true", help="Reload on code changes")
+    parser.add_argument(
+        "--http2", action="store_true", default=settings.app_http2, help="Serve HTTP/2 with hypercorn"
+    )
+    args = parser.parse_args(argv)
+
+    if args.reload:
+        uvicorn.run("src.api.main:app", host=args.host, port=args.port, reload=True)
+        return
+
+    if args.workers > 1 and settings.coordination_backend == "memory":
+        logger.warning(
+            "Running %d workers with the in-process coordination backend: jobs, "
+            "cache and rate limits are not shared; set COORDINATION_BACKEND=redis",
+            args.workers,
+        )
+    if args.http2:
+        _serve_http2(args.host, args.port, args.workers)
+        return
     uvicorn.run(
         "src.api.main:app",
-        host=settings.app_host,
-        port=settings.app_port,
-        reload=True
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        proxy_headers=True,
+        timeout_graceful_shutdown=settings.shutdown_drain_timeout,
+        ssl_certfile=settings.app_ssl_certfile or None,
+        ssl_keyfile=settings.app_ssl_keyfile or None,
+        log_level="info",
     )
+
+
+def _serve_http2(host: str, port: int, workers: int) -> None:
+    """Run the app under hypercorn, which negotiates HTTP/2 (uvicorn only speaks HTTP/1.1)."""
+    try:
+        from hypercorn.config import Config
+        from hypercorn.run import run
+    except ImportError:
+        raise SystemExit(
+            "HTTP/2 serving requires hypercorn: install civitai-mcp-server[serve]"
+        ) from None
+
+    config = Config()
+    config.application_path = "src.api.main:app"
+    config.bind = [f"{host}:{port}"]
+    config.workers = workers
+    config.graceful_timeout = settings.shutdown_drain_timeout
+    if settings.app_ssl_certfile:
+        config.certfile = settings.app_ssl_certfile
+        config.keyfile = settings.app_ssl_keyfile or None
+    run(config)
+
+
+if __name__ == "__main__":
+    main()
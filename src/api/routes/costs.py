@@ -0,0 +1,43 @@
+"""Spend summary and budget routes."""
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from src.api.dependencies import get_caller, get_civitai_service
+from src.core.services.civitai_service import CivitaiService
+
+router = APIRouter(prefix="/costs", tags=["costs"])
+
+
+@router.get("")
+async def cost_summary(
+    group_by: Literal["caller", "model", "api_key"] = "caller",
+    since: float | None = None,
+    until: float | None = None,
+    caller: str | None = None,
+    service: CivitaiService = Depends(get_civitai_service)
+):
+    """
+    Total spend and job counts grouped by caller, model or API key.
+
+    since/until are Unix timestamps; caller restricts the summary to one client.
+    """
+    try:
+        groups = await service.ledger.summary(group_by, since, until, caller)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "group_by": group_by,
+        "total": sum(group["cost"] for group in groups),
+        "groups": groups,
+    }
+
+
+@router.get("/budget")
+async def budget_status(
+    service: CivitaiService = Depends(get_civitai_service),
+    caller: str = Depends(get_caller)
+):
+    """Spend against each budget that applies to the X-Client-Id client, in the current windows."""
+    return {"caller": caller, "budgets": await service.ledger.budget_status(caller)}
@@ -1,22 +1,63 @@
 """Health check routes."""
 
-from fastapi import APIRouter
+import json
 from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, Response
+from src.api.dependencies import get_civitai_service, get_job_manager
 from src.contracts.responses import HealthResponse
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.job_manager import JobManager
 
 router = APIRouter(tags=["health"])
 
 
+def _static_json(response: HealthResponse) -> bytes:
+    return json.dumps(asdict(response), separators=(",", ":")).encode()
+
+
+# Probes hit these constantly; their bodies never change, so render them once
+ROOT_BODY = _static_json(HealthResponse(status="active", message="Civitai Image Generation API"))
+HEALTH_BODY = _static_json(HealthResponse(status="healthy"))
+
+
 @router.get("/")
 async def root():
     """Root endpoint."""
-    return asdict(HealthResponse(
-        status="active",
-        message="Civitai Image Generation API"
-    ))
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 
 @router.get("/health")
 async def health():
     """Health check."""
-    return asdict(HealthResponse(status="healthy"))
+    return Response(content=HEALTH_BODY, media_type="application/json")
+
+
+@router.get("/health/polling")
+async def polling_stats(service: CivitaiService = Depends(get_civitai_service)):
+    """Per-strategy polling latency and request counts."""
+    return service.polling_stats()
+
+
+@router.get("/health/coalescing")
+async def coalescing_stats(service: CivitaiService = Depends(get_civitai_service)):
+    """Counters for identical concurrent requests that shared one job."""
+    return service.coalescing_stats()
+
+
+@router.get("/health/admission")
+async def admission_stats(service: CivitaiService = Depends(get_civitai_service)):
+    """In-flight jobs, submission queue depth and wait times."""
+    return service.admission_stats()
+
+
+@router.get("/health/tokens")
+async def token_stats(service: CivitaiService = Depends(get_civitai_service)):
+    """Per-API-key usage, cost, rate limits and cooldown."""
+    return service.token_stats()
+
+
+@router.get("/health/recovery")
+async def recovery_stats(manager: JobManager = Depends(get_job_manager)):
+    """Jobs resumed after the last restart and how long recovery took."""
+    return manager.recovery
@@ -1,18 +1,29 @@
 """Image resource routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, Response
-from pydantic import BaseModel
+import base64
+import json
+from typing import Any, Literal
 
-from src.api.dependencies import get_civitai_service
-from src.core.services.civitai_service import CivitaiService
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.api.dependencies import get_caller, get_civitai_service, get_model_catalog
+from src.core.services.admission import AdmissionRejected
+from src.core.services.civitai_service import CivitaiService, artifact_metadata
+from src.core.services.cost_ledger import BudgetExceeded
+from src.core.services.model_catalog import ModelCatalog
+from src.core.services.resilience import UpstreamError
+from src.core.services.sweep import expand_sweep, grid_columns
+from src.core.services.transcoding import OutputOptions
 from src.contracts.requests import GenerateImageRequest
 
 router = APIRouter(prefix="/images", tags=["images"])
 
 
-# Pydantic model for API validation (FastAPI requirement)
-class CreateImageRequest(BaseModel):
-    """Request to create a new image."""
+# Pydantic models for API validation (FastAPI requirement)
+class ImageParams(BaseModel):
+    """Generation parameters for a single image."""
     model: str
     prompt: str
     width: int = 512
@@ -23,67 +34,406 @@ class CreateImageRequest(BaseModel):
     cfg_scale: float = 7.0
     seed: int | None = None
     clip_skip: int = 1
+
+    def to_dto(self) -> GenerateImageRequest:
+        """Convert to the shared request dataclass."""
+        return GenerateImageRequest(
+            model=self.model,
+            prompt=self.prompt,
+            width=self.width,
+            height=self.height,
+            negative_prompt=self.negative_prompt,
+            scheduler=self.scheduler,
+            steps=self.steps,
+            cfg_scale=self.cfg_scale,
+            seed=self.seed,
+            clip_skip=self.clip_skip
+        )
+
+
+class CreateImageRequest(ImageParams):
+    """Request to create a new image."""
     timeout: int = 300
+    poll_strategy: str | None = None
+    priority: str = "normal"
     return_image: bool = False
+    stream: bool = False
+    format: Literal["webp", "jpeg", "png"] | None = None
+    quality: int = Field(default=85, ge=1, le=100)
+    max_dimension: int | None = Field(default=None, ge=1)
+    thumbnail: bool = False
+
+    def output_options(self) -> OutputOptions:
+        """Transcoding options for the returned image."""
+        return OutputOptions(
+            format=self.format,
+            quality=self.quality,
+            max_dimension=self.max_dimension,
+            thumbnail=self.thumbnail
+        )
+
+
+class CreateImageBatchRequest(BaseModel):
+    """Request to create several images in one round trip."""
+    requests: list[ImageParams] = Field(min_length=1)
+    quantity: int = Field(default=1, ge=1)
+    timeout: int = 300
+    poll_strategy: str | None = None
+    concurrency: int | None = Field(default=None, ge=1)
+    priority: str = "normal"
+    return_images: bool = False
+
+
+class CreateSweepRequest(ImageParams):
+    """Request to generate a grid over parameter axes."""
+    axes: dict[str, list[Any]]
+    timeout: int = 300
+    poll_strategy: str | None = None
+    concurrency: int | None = Field(default=None, ge=1)
+    priority: str = "normal"
+    return_images: bool = False
+    contact_sheet: bool = False
+
+
+def metadata_headers(result: dict) -> dict[str, str]:
+    """Build the metadata headers sent along with binary image responses."""
+    headers = {
+        "X-Seed": str(result['seed']),
+        "X-Cost": str(result.get('cost', 'N/A')),
+        "X-Job-ID": str(result.get('job_id', 'N/A'))
+    }
+    if 'cache' in result:
+        headers["X-Cache"] = result['cache']
+    return headers
+
+
+def admission_error(error: AdmissionRejected) -> HTTPException:
+    """503 telling the client when to retry a rejected submission."""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(int(error.retry_after))}
+    )
+
+
+def budget_error(error: BudgetExceeded) -> HTTPException:
+    """402 telling the client when its budget window resets."""
+    return HTTPException(
+        status_code=402,
+        detail=str(error),
+        headers={"Retry-After": str(max(1, round(error.retry_after)))}
+    )
+
+
+def upstream_error(error: UpstreamError) -> HTTPException:
+    """Map a typed upstream failure to 429/502/503/504, with Retry-After when known."""
+    headers = None
+    if error.retry_after:
+        headers = {"Retry-After": str(max(1, round(error.retry_after)))}
+    return HTTPException(status_code=error.status_code, detail=str(error), headers=headers)
 
 
 @router.post("")
 async def create_image(
     request: CreateImageRequest,
-    service: CivitaiService = Depends(get_civitai_service)
+    service: CivitaiService = Depends(get_civitai_service),
+    caller: str = Depends(get_caller),
+    catalog: ModelCatalog = Depends(get_model_catalog)
 ):
     """
     Create a new AI-generated image.
 
     If return_image=true, returns binary image data with metadata in headers.
+    If return_image=true and stream=true, the image is passed through in chunks
+    instead of being buffered in memory.
+    With return_image=true, format/quality/max_dimension/thumbnail re-encode
+    the returned image (streaming is skipped, as transcoding needs the whole image).
     If return_image=false, returns JSON with blob URL and metadata.
+    Unknown or malformed model URNs are rejected with 400 before submission.
+    Costs are charged to the X-Client-Id header. Returns 402 with Retry-After
+    when that client's budget is spent, 503 with Retry-After when the upstream
+    submission queue is full, and 429/502/503/504 when Civitai rate-limits,
+    fails, is unavailable or times out.
     """
-    try:
-        # Convert to dataclass
-        dto = GenerateImageRequest(
-            model=request.model,
-            prompt=request.prompt,
-            width=request.width,
-            height=request.height,
-            negative_prompt=request.negative_prompt,
-            scheduler=request.scheduler,
-            steps=request.steps,
-            cfg_scale=request.cfg_scale,
-            seed=request.seed,
-            clip_skip=request.clip_skip
-        )
+    with service.tracer.span(
+        "POST /images", model=request.model, caller=caller, stream=request.stream
+    ):
+        try:
+            # Reject unknown models before anything reaches upstream
+            await catalog.validate(request.model)
 
-        # Generate and download image
-        result = await service.generate_and_download(
-            request=dto,
-            timeout=request.timeout,
-            poll_interval=3
-        )
+            # Convert to dataclass
+            dto = request.to_dto()
+
+            # Streaming mode: wait for the blob, then pass it through chunk by chunk
+            output = request.output_options()
+            if request.return_image and request.stream and output.is_noop:
+                cached = await service.get_cached(dto)
+                if cached is not None:
+                    return Response(
+                        content=cached['image_data'],
+                        media_type=cached['content_type'],
+                        headers=metadata_headers(cached)
+                    )
+
+                result = await service.generate(
+                    request=dto,
+                    timeout=request.timeout,
+                    poll_strategy=request.poll_strategy,
+                    priority=request.priority,
+                    caller=caller
+                )
+                chunks, content_type, content_length = await service.open_image_stream(
+                    result['blob_url']
+                )
+                if service.artifacts is not None and result.get('job_id'):
+                    chunks = service.artifacts.tee(
+                        result['job_id'], chunks, content_type, artifact_metadata(result)
+                    )
+                headers = metadata_headers(result)
+                if content_length:
+                    headers["Content-Length"] = content_length
+                return StreamingResponse(chunks, media_type=content_type, headers=headers)
 
-        # Return binary image or JSON based on flag
-        if request.return_image:
-            return Response(
-                content=result['image_data'],
-                media_type="image/png",
-                headers={
-                    "X-Seed": str(result['seed']),
-                    "X-Cost": str(result.get('cost', 'N/A')),
-                    "X-Job-ID": str(result.get('job_id', 'N/A'))
+            # Generate and download image
+            result = await service.generate_and_download(
+                request=dto,
+                timeout=request.timeout,
+                poll_strategy=request.poll_strategy,
+                priority=request.priority,
+                caller=caller
+            )
+
+            # Return binary image or JSON based on flag
+            if request.return_image:
+                result = await service.apply_output(result, output)
+                return Response(
+                    content=result['image_data'],
+                    media_type=result.get('content_type', "image/png"),
+                    headers=metadata_headers(result)
+                )
+            else:
+                response = {
+                    "success": True,
+                    "job_id": result.get('job_id'),
+                    "seed": result['seed'],
+                    "cost": result.get('cost'),
+                    "blob_url": result['blob_url'],
+                    "prompt": result['prompt'],
+                    "model": result['model'],
+                    "cache": result.get('cache'),
+                    "message": f"Image generated successfully. Blob URL expires in 1 hour."
                 }
+                if service.artifacts is not None and result.get('job_id'):
+                    response["image_url"] = f"/images/{result['job_id']}"
+                return response
+
+        except BudgetExceeded as e:
+            raise budget_error(e)
+        except AdmissionRejected as e:
+            raise admission_error(e)
+        except UpstreamError as e:
+            raise upstream_error(e)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except TimeoutError as e:
+            raise HTTPException(status_code=408, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch")
+async def create_image_batch(
+    request: CreateImageBatchRequest,
+    service: CivitaiService = Depends(get_civitai_service),
+    caller: str = Depends(get_caller),
+    catalog: ModelCatalog = Depends(get_model_catalog)
+):
+    """
+    Create several AI-generated images at once.
+
+    Every entry in requests is submitted with the given quantity, so one entry
+    with quantity=8 yields 8 variations. All jobs are submitted up front and
+    tracked together. If return_images=true, each item includes base64 image
+    data downloaded concurrently; otherwise only blob URLs are returned. An
+    entry whose submission or download failed has "error" instead of data.
+    """
+    with service.tracer.span(
+        "POST /images/batch",
+        requests=len(request.requests),
+        quantity=request.quantity,
+        caller=caller,
+    ):
+        try:
+            for model in {params.model for params in request.requests}:
+                await catalog.validate(model)
+
+            results = await service.generate_batch(
+                requests=[params.to_dto() for params in request.requests],
+                quantity=request.quantity,
+                timeout=request.timeout,
+                poll_strategy=request.poll_strategy,
+                download=request.return_images,
+                concurrency=request.concurrency,
+                priority=request.priority,
+                caller=caller
             )
-        else:
+
+            images = []
+            for result in results:
+                item = {
+                    "job_id": result.get('job_id'),
+                    "seed": result.get('seed'),
+                    "cost": result.get('cost'),
+                    "blob_url": result.get('blob_url'),
+                    "prompt": result['prompt'],
+                    "model": result['model'],
+                }
+                if "error" in result:
+                    # Failed entries are reported in place so the rest are not lost
+                    item["error"] = result['error']
+                elif request.return_images:
+                    item["content_type"] = result['content_type']
+                    item["image_data"] = base64.b64encode(result['image_data']).decode()
+                images.append(item)
+
+            failed = sum("error" in image for image in images)
             return {
-                "success": True,
-                "job_id": result.get('job_id'),
-                "seed": result['seed'],
-                "cost": result.get('cost'),
-                "blob_url": result['blob_url'],
-                "prompt": result['prompt'],
-                "model": result['model'],
-                "message": f"Image generated successfully. Blob URL expires in 1 hour."
+                "success": failed == 0,
+                "count": len(images),
+                "failed": failed,
+                "images": images,
+                "message": (
+                    f"Generated {len(images) - failed} of {len(images)} images. "
+                    "Blob URLs expire in 1 hour."
+                )
             }
 
-    except TimeoutError as e:
-        raise HTTPException(status_code=408, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        except BudgetExceeded as e:
+            raise budget_error(e)
+        except AdmissionRejected as e:
+            raise admission_error(e)
+        except UpstreamError as e:
+            raise upstream_error(e)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except TimeoutError as e:
+            raise HTTPException(status_code=408, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sweep")
+async def create_image_sweep(
+    request: CreateSweepRequest,
+    service: CivitaiService = Depends(get_civitai_service),
+    caller: str = Depends(get_caller),
+    catalog: ModelCatalog = Depends(get_model_catalog)
+):
+    """
+    Generate the cartesian product of parameter axes over a base request.
+
+    For example axes={"cfg_scale": [5, 7], "steps": [20, 30]} yields four
+    cells. Cached cells are answered immediately, each distinct generation is
+    submitted once, and submissions run in parallel within the admission and
+    rate limits. Results stream back as Server-Sent Events: one "cell" event
+    per cell as it finishes (with base64 image_data if return_images=true, or
+    an error), then a "done" event, carrying a base64 PNG contact sheet of the
+    grid if contact_sheet=true. Invalid axes return 400 and an exhausted
+    budget 402 before the stream starts.
+    """
+    # Traces submission planning; the cells themselves run as the stream is read
+    with service.tracer.span("POST /images/sweep", model=request.model, caller=caller) as span:
+        try:
+            await catalog.validate(request.model)
+            cells = expand_sweep(
+                request.to_dto(), request.axes, service.settings.sweep_max_cells
+            )
+            span.set_attribute("cells", len(cells))
+            results = await service.sweep(
+                cells,
+                timeout=request.timeout,
+                poll_strategy=request.poll_strategy,
+                concurrency=request.concurrency,
+                priority=request.priority,
+                caller=caller
+            )
+        except BudgetExceeded as e:
+            raise budget_error(e)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def sse():
+        finished = []
+        async for result in results:
+            finished.append(result)
+            item = {"cell": result['cell'], "params": result['params']}
+            if "error" in result:
+                item["error"] = result['error']
+            else:
+                item.update({
+                    "job_id": result.get('job_id'),
+                    "seed": result['seed'],
+                    "cost": result.get('cost'),
+                    "blob_url": result.get('blob_url'),
+                    "cache": result.get('cache'),
+                })
+                if request.return_images:
+                    item["content_type"] = result['content_type']
+                    item["image_data"] = base64.b64encode(result['image_data']).decode()
+            yield f"event: cell\ndata: {json.dumps(item)}\n\n"
+
+        done = {
+            "count": len(finished),
+            "failed": sum("error" in result for result in finished),
+        }
+        if request.contact_sheet:
+            try:
+                sheet, content_type = await service.contact_sheet(
+                    finished, grid_columns(request.axes)
+                )
+                done["contact_sheet"] = {
+                    "content_type": content_type,
+                    "image_data": base64.b64encode(sheet).decode(),
+                }
+            except Exception as e:
+                done["contact_sheet_error"] = str(e)
+        yield f"event: done\ndata: {json.dumps(done)}\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/{job_id}")
+async def get_image(
+    job_id: str,
+    request: Request,
+    service: CivitaiService = Depends(get_civitai_service)
+):
+    """
+    Serve a previously generated image from the local mirror.
+
+    Unlike blob URLs this does not expire after an hour. Responses carry a
+    content-hash ETag (If-None-Match returns 304) and honour Range requests;
+    the file is sent without being read into Python where the server supports it.
+    """
+    if service.artifacts is None:
+        raise HTTPException(status_code=404, detail="Local image mirror is not enabled")
+    artifact = await service.artifacts.get(job_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail=f"No stored image for job {job_id}")
+
+    etag = f'"{artifact.sha256}"'
+    headers = {
+        **metadata_headers(artifact.metadata),
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(artifact.path, media_type=artifact.content_type, headers=headers)
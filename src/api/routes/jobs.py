@@ -0,0 +1,156 @@
+"""Asynchronous job resource routes."""
+
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src.api.dependencies import get_caller, get_job_manager, get_model_catalog
+from src.api.routes.images import ImageParams, admission_error, budget_error, metadata_headers
+from src.core.models.job import JobStatus
+from src.core.services.admission import AdmissionRejected
+from src.core.services.cost_ledger import BudgetExceeded
+from src.core.services.job_manager import JobManager
+from src.core.services.model_catalog import ModelCatalog
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# Idle seconds between keep-alive messages on event streams
+HEARTBEAT_INTERVAL = 15.0
+
+
+class CreateJobRequest(ImageParams):
+    """Request to start a generation job without waiting for it."""
+    timeout: int = 300
+    poll_strategy: str | None = None
+    priority: str = "normal"
+    callback_url: str | None = None
+
+
+@router.post("", status_code=202)
+async def create_job(
+    request: CreateJobRequest,
+    manager: JobManager = Depends(get_job_manager),
+    caller: str = Depends(get_caller),
+    catalog: ModelCatalog = Depends(get_model_catalog)
+):
+    """
+    Start a generation job and return its id immediately.
+
+    Poll GET /jobs/{id} for status, or pass callback_url to be notified with
+    the final job record once it is downloaded or has failed. Returns 503
+    with Retry-After instead of accepting a job the submission queue has no
+    room for, and 402 if the X-Client-Id client has spent its budget.
+    """
+    try:
+        await catalog.validate(request.model)
+        job = await manager.submit(
+            request=request.to_dto(),
+            timeout=request.timeout,
+            poll_strategy=request.poll_strategy,
+            priority=request.priority,
+            callback_url=request.callback_url,
+            caller=caller
+        )
+    except BudgetExceeded as e:
+        raise budget_error(e)
+    except AdmissionRejected as e:
+        raise admission_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "id": job.id,
+        "status": job.status.value,
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    }
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, manager: JobManager = Depends(get_job_manager)):
+    """Get the status and metadata of a job."""
+    job = await manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str, manager: JobManager = Depends(get_job_manager)):
+    """
+    Get the image produced by a job.
+
+    Returns the binary image with metadata headers once downloaded, 202 with
+    the current status while the job is still running, and 500 if it failed.
+    """
+    job = await manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != JobStatus.DOWNLOADED:
+        return JSONResponse(
+            status_code=202,
+            content={"id": job.id, "status": job.status.value}
+        )
+
+    image = await manager.get_image(job_id)
+    if image is None:
+        raise HTTPException(status_code=410, detail=f"Result for job {job_id} is no longer available")
+    image_data, content_type = image
+    return Response(
+        content=image_data,
+        media_type=content_type,
+        headers=metadata_headers(job.result)
+    )
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, manager: JobManager = Depends(get_job_manager)):
+    """
+    Stream a job's status transitions as Server-Sent Events.
+
+    Each event is named after the status (queued, processing, available,
+    downloaded, failed) and carries timing for the phase that just ended.
+    The stream ends once the job reaches a final status.
+    """
+    if await manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def sse():
+        async for event in manager.events(job_id, heartbeat=HEARTBEAT_INTERVAL):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['status']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/{job_id}/events/ws")
+async def job_events_websocket(
+    websocket: WebSocket,
+    job_id: str,
+    manager: JobManager = Depends(get_job_manager)
+):
+    """Stream a job's status transitions over a WebSocket as JSON messages."""
+    await websocket.accept()
+    if await manager.get(job_id) is None:
+        await websocket.close(code=4404, reason=f"Job {job_id} not found")
+        return
+
+    try:
+        async for event in manager.events(job_id, heartbeat=HEARTBEAT_INTERVAL):
+            if event is None:
+                await websocket.send_json({"type": "heartbeat"})
+            else:
+                await websocket.send_json({"type": "status", **event})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,15 @@
+"""Prometheus metrics route."""
+
+from fastapi import APIRouter, Depends, Response
+
+from src.api.dependencies import get_civitai_service
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.metrics import CONTENT_TYPE
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def metrics(service: CivitaiService = Depends(get_civitai_service)):
+    """Per-phase latency histograms, poll/error/byte counters and in-flight gauges."""
+    return Response(content=service.metrics.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,36 @@
+"""Model catalog routes."""
+
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from src.api.dependencies import get_model_catalog
+from src.core.services.model_catalog import ModelCatalog
+
+router = APIRouter(prefix="/models", tags=["models"])
+
+
+@router.get("")
+async def search_models(
+    query: str = "",
+    base_model: str = "",
+    type: str = "",
+    limit: int = Query(default=20, ge=1, le=500),
+    catalog: ModelCatalog = Depends(get_model_catalog)
+):
+    """
+    Search the cached model catalog, most downloaded first.
+
+    query matches whole words of the model or version name; base_model
+    (e.g. "SDXL 1.0") and type (e.g. "Checkpoint") are exact filters.
+    Returns 503 if the catalog has never been fetched and Civitai is unreachable.
+    """
+    try:
+        entries = await catalog.search(query, base_model, type, limit)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Model catalog unavailable: {e}")
+    return {
+        "count": len(entries),
+        "fetched_at": catalog.fetched_at,
+        "models": [asdict(entry) for entry in entries],
+    }
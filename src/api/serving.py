@@ -0,0 +1,169 @@
+"""Response rendering, compression and request correlation for the REST API."""
+
+import gzip
+from typing import Any, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.services.tracing import CORRELATION_HEADER, TRACEPARENT_HEADER, bind_trace
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Content types worth compressing; images are already compressed and event
+# streams must not be buffered
+COMPRESSIBLE_TYPES = ("application/json", "application/problem+json")
+
+COMPRESSION_MODES = ("gzip", "auto")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return super().render(content)
+
+
+class JSONCompressionMiddleware:
+    """
+    Compress JSON responses for clients that accept it.
+
+    Only complete JSON bodies of at least minimum_size bytes are compressed;
+    images, event streams and streamed bodies pass through untouched. Brotli
+    is preferred in "auto" mode when the client accepts it and the brotli
+    package is installed, otherwise gzip is used.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        mode: str = "auto",
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Application to wrap
+            mode: "gzip" or "auto" (brotli when available)
+            minimum_size: Smallest body worth compressing, in bytes
+            gzip_level: gzip compression level (1-9)
+            brotli_quality: Brotli quality (0-11)
+        """
+        if mode not in COMPRESSION_MODES:
+            raise ValueError(
+                f"Unknown compression mode '{mode}'. Choose from: {', '.join(COMPRESSION_MODES)}"
+            )
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._brotli = None
+        if mode == "auto":
+            try:
+                import brotli
+
+                self._brotli = brotli
+            except ImportError:
+                pass
+
+    def _encoding(self, accept_encoding: str) -> Optional[str]:
+        """Best encoding the client accepts, or None."""
+        accepted: List[str] = []
+        for item in accept_encoding.split(","):
+            name, _, params = item.partition(";")
+            params = params.replace(" ", "")
+            try:
+                quality = float(params[2:]) if params.startswith("q=") else 1.0
+            except ValueError:
+                quality = 0.0
+            if quality > 0:
+                accepted.append(name.strip().lower())
+        if self._brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return self._brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held until the first body message shows whether it is complete
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            held, start = start, None
+            headers = MutableHeaders(raw=held["headers"])
+            body = message.get("body", b"")
+            if (
+                message["type"] == "http.response.body"
+                and not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").split(";")[0].strip() in COMPRESSIBLE_TYPES
+            ):
+                body = self._compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {"type": "http.response.body", "body": body}
+            await send(held)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+class CorrelationMiddleware:
+    """
+    Bind each request to a trace and return its correlation ID.
+
+    The caller's X-Correlation-ID (or the trace ID of its traceparent) is
+    reused, otherwise a new ID is generated. Spans opened while handling the
+    request, in the routes and the service alike, carry the ID, and it is
+    sent back in the X-Correlation-ID response header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        with bind_trace(
+            headers.get(CORRELATION_HEADER), headers.get(TRACEPARENT_HEADER)
+        ) as context:
+
+            async def send_correlated(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)[CORRELATION_HEADER] = context.correlation_id
+                await send(message)
+
+            await self.app(scope, receive, send_correlated)
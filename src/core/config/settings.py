@@ -1,5 +1,7 @@
 """Application settings loaded from environment variables."""
 
+from typing import Dict
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,8 +9,141 @@ class Settings(BaseSettings):
     """Application settings."""
 
     civitai_api_token: str = ""
+    # Comma-separated pool of API tokens; submissions are balanced across them
+    civitai_api_tokens: str = ""
+    # Cooldown after a token is rate limited, doubling per consecutive 429
+    token_cooldown: float = 10.0
+    token_max_cooldown: float = 300.0
+    # Override the orchestration API URL, e.g. to point at a local fake backend
+    civitai_base_url: str = ""
     app_host: str = "0.0.0.0"
     app_port: int = 8000
+    # Worker processes started by the production launcher (python -m src.api.main)
+    app_workers: int = 1
+
+    # Shared HTTP session used for blob downloads
+    http_pool_limit: int = 100
+    http_pool_limit_per_host: int = 20
+    http_dns_cache_ttl: int = 300
+    http_keepalive_timeout: float = 30.0
+    http_connect_timeout: float = 10.0
+    http_read_timeout: float = 60.0
+    http_total_timeout: float = 120.0
+    stream_chunk_size: int = 64 * 1024
+
+    # Batch generation
+    batch_max_images: int = 32
+    batch_concurrency: int = 8
+
+    # Parameter sweeps; 0 concurrency means the admission in-flight limit
+    sweep_max_cells: int = 64
+    sweep_concurrency: int = 0
+    sweep_sheet_cell_size: int = 256
+
+    # Shared job-status poller
+    tracker_max_concurrent_polls: int = 16
+
+    # Polling strategy: "fixed", "backoff" or "adaptive"
+    poll_strategy: str = "adaptive"
+    poll_interval: float = 3.0
+    poll_initial_interval: float = 0.5
+    poll_max_interval: float = 10.0
+    poll_backoff_factor: float = 1.5
+    poll_jitter: float = 0.1
+
+    # Upstream resilience: retries for idempotent calls and per-upstream circuit breakers
+    retry_attempts: int = 3
+    retry_base_delay: float = 0.25
+    retry_max_delay: float = 5.0
+    retry_budget_ratio: float = 0.2
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 30.0
+
+    # Admission control for upstream submissions (rate 0 disables the token bucket)
+    admission_max_in_flight: int = 32
+    admission_rate: float = 5.0
+    admission_burst: int = 10
+    admission_queue_size: int = 100
+    admission_queue_timeout: float = 60.0
+
+    # Share one upstream job between identical concurrent seeded requests
+    coalesce_requests: bool = True
+
+    # State shared between workers: "memory" (single process) or "redis" (any
+    # Redis-protocol server). With "redis", dedup locks, the admission rate and
+    # cached results are shared, and JOB_STORE=shared keeps jobs there too
+    coordination_backend: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    redis_prefix: str = "civitai:"
+    redis_pool_size: int = 10
+
+    # Asynchronous job API: "memory", "sqlite" or "shared" (coordination backend) store
+    job_store: str = "memory"
+    job_store_path: str = "data/jobs.db"
+    job_ttl: int = 24 * 3600
+    # Write-ahead journal of submitted job tokens, so paid jobs still running when
+    # the process stops are resumed on restart (empty path disables it; one file
+    # per process). Running jobs get drain_timeout seconds to finish on shutdown
+    job_journal_path: str = ""
+    shutdown_drain_timeout: float = 30.0
+
+    # Result cache for seeded (deterministic) requests; empty dir disables the disk tier
+    result_cache_enabled: bool = False
+    result_cache_memory_items: int = 128
+    result_cache_memory_bytes: int = 256 * 1024 * 1024
+    result_cache_dir: str = ""
+    result_cache_ttl: int = 7 * 24 * 3600
+    result_cache_disk_bytes: int = 2 * 1024 * 1024 * 1024
+
+    # Local mirror of downloaded images served at GET /images/{job_id}; empty dir disables it
+    artifact_dir: str = ""
+    artifact_max_bytes: int = 5 * 1024 * 1024 * 1024
+    artifact_retention: int = 30 * 24 * 3600
+    artifact_sweep_interval: float = 300.0
+
+    # Output transcoding (needs the "images" extra); 0 workers means one per CPU
+    transcode_workers: int = 2
+    transcode_cache_items: int = 256
+    transcode_cache_bytes: int = 64 * 1024 * 1024
+
+    # Cost ledger (empty path keeps it in memory) and budgets per caller and window,
+    # e.g. COST_BUDGETS='{"*": {"day": 500}, "all": {"month": 20000}}'
+    cost_ledger_path: str = ""
+    cost_budgets: Dict[str, Dict[str, float]] = {}
+
+    # Model catalog for URN validation and model search. Validation is "off",
+    # "syntax" (URN format only) or "catalog" (also checked against the catalog)
+    model_validation: str = "catalog"
+    model_catalog_url: str = "https://civitai.com/api/v1"
+    model_catalog_path: str = ""
+    model_catalog_refresh: float = 6 * 3600
+    model_catalog_pages: int = 5
+
+    # Create SDK clients and the download session in the background once an MCP
+    # client has connected, instead of on the first tool call
+    mcp_warmup: bool = True
+
+    # MCP tools return images larger than this as civitai://image/{hash} resource
+    # links served from the artifact mirror (needs ARTIFACT_DIR); 0 always inlines
+    mcp_image_inline_max_bytes: int = 0
+
+    # REST serving: JSON responses of at least api_compression_min_size bytes are
+    # compressed ("gzip", "auto" for brotli when installed, or "off"); app_http2
+    # serves over HTTP/2 with hypercorn (TLS when a certificate is configured, else h2c)
+    api_compression: str = "off"
+    api_compression_min_size: int = 1024
+    app_http2: bool = False
+    app_ssl_certfile: str = ""
+    app_ssl_keyfile: str = ""
+
+    # Port for the MCP server's Prometheus /metrics endpoint (0 disables it)
+    metrics_port: int = 0
+
+    # Request tracing: spans of sampled requests are appended to trace_path as
+    # JSON Lines (empty path disables tracing); sample rate is the fraction of
+    # requests traced unless the caller's traceparent header decides
+    trace_path: str = ""
+    trace_sample_rate: float = 1.0
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", case_sensitive=False, extra="ignore"
@@ -16,7 +151,7 @@ class Settings(BaseSettings):
 
     def validate_token(self) -> None:
         """Validate that API token is set."""
-        if not self.civitai_api_token:
+        if not self.civitai_api_token and not self.civitai_api_tokens.strip(", "):
             raise ValueError(
                 "CIVITAI_API_TOKEN not set. Please create a .env file with your API token.\n"
                 "Get your token from: https://civitai.com/user/account"
@@ -0,0 +1,57 @@
+"""Job domain model for the asynchronous job API."""
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a generation job."""
+
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    AVAILABLE = "available"
+    DOWNLOADED = "downloaded"
+    FAILED = "failed"
+
+    @property
+    def is_final(self) -> bool:
+        """Whether the job will not change status again."""
+        return self in (JobStatus.DOWNLOADED, JobStatus.FAILED)
+
+
+@dataclass
+class JobRecord:
+    """A generation job tracked by the job API."""
+
+    request: Dict[str, Any]
+    timeout: int = 300
+    poll_strategy: Optional[str] = None
+    priority: str = "normal"
+    caller: str = "anonymous"
+    callback_url: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    token: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for API responses and callbacks."""
+        return {
+            "id": self.id,
+            "status": self.status.value,
+            "request": self.request,
+            "token": self.token,
+            "result": self.result,
+            "error": self.error,
+            "events": self.events,
+            "callback_url": self.callback_url,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
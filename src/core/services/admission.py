@@ -0,0 +1,221 @@
+"""Admission control in front of upstream job submissions."""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.core.config.settings import Settings
+
+# Lower value is served first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a submission cannot be admitted; callers should retry later."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionStats:
+    """Queue depth and wait-time counters."""
+
+    admitted: int = 0
+    rejected: int = 0
+    max_queue_depth: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class AdmissionController:
+    """
+    Limit in-flight upstream jobs and their submission rate.
+
+    A caller holds a slot from submission until its job finishes. Slots are
+    granted while fewer than max_in_flight are held and the token bucket has
+    a token; otherwise callers wait in a bounded queue ordered by priority
+    class, then arrival. A full queue, or waiting longer than queue_timeout,
+    rejects with a Retry-After hint instead of piling more load upstream.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        rate: float = 5.0,
+        burst: int = 10,
+        queue_size: int = 100,
+        queue_timeout: float = 60.0,
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            max_in_flight: Maximum jobs holding a slot at once
+            rate: Submissions per second allowed by the token bucket (0 disables)
+            burst: Token bucket capacity
+            queue_size: Maximum callers waiting for a slot
+            queue_timeout: Maximum seconds a caller waits before rejection
+        """
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = burst
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.stats = AdmissionStats()
+        self._in_flight = 0
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._waiters: List[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionController":
+        """Create a controller configured from settings."""
+        return cls(
+            max_in_flight=settings.admission_max_in_flight,
+            rate=settings.admission_rate,
+            burst=settings.admission_burst,
+            queue_size=settings.admission_queue_size,
+            queue_timeout=settings.admission_queue_timeout,
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """Number of slots currently held."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a slot."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def check(self) -> None:
+        """Reject immediately if a new caller would not fit in the queue."""
+        depth = self.queue_depth
+        full = self._in_flight >= self.max_in_flight
+        if depth >= self.queue_size and (depth or full):
+            self.stats.rejected += 1
+            raise AdmissionRejected("Too many queued generations", self._retry_after())
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "normal") -> AsyncIterator[None]:
+        """Hold an in-flight slot for the duration of the block."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: str = "normal") -> None:
+        """Wait for a slot, or raise AdmissionRejected."""
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"Unknown priority '{priority}'. Choose from: {', '.join(PRIORITIES)}"
+            )
+
+        if not self.queue_depth and self._try_take():
+            self.stats.admitted += 1
+            return
+
+        self.check()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES[priority], next(self._sequence), future))
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.queue_depth)
+        self._dispatch()
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                self.release()
+            future.cancel()
+            self.stats.rejected += 1
+            raise AdmissionRejected(
+                f"Waited {self.queue_timeout:.0f}s for an upstream slot", self._retry_after()
+            ) from None
+        except asyncio.CancelledError:
+            # Hand the slot on if it was granted just as we were cancelled
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+            raise
+
+        waited = time.monotonic() - started
+        self.stats.admitted += 1
+        self.stats.total_wait += waited
+        self.stats.max_wait = max(self.stats.max_wait, waited)
+
+    def release(self) -> None:
+        """Return a slot and admit the next waiter if possible."""
+        self._in_flight -= 1
+        self._dispatch()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current gauges and cumulative counters."""
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.stats.max_queue_depth,
+            "admitted": self.stats.admitted,
+            "rejected": self.stats.rejected,
+            "avg_wait": self.stats.total_wait / self.stats.admitted if self.stats.admitted else 0.0,
+            "max_wait": self.stats.max_wait,
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _try_take(self) -> bool:
+        """Take a slot and a token if both are available."""
+        if self._in_flight >= self.max_in_flight:
+            return False
+        if self.rate > 0:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+        self._in_flight += 1
+        return True
+
+    def _dispatch(self) -> None:
+        """Grant slots to queued callers in priority order."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_take():
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+
+        # Capacity is free but the bucket is empty: come back when a token is due
+        if (
+            self._waiters
+            and self._timer is None
+            and self._in_flight < self.max_in_flight
+            and self.rate > 0
+        ):
+            delay = (1 - self._tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _retry_after(self) -> float:
+        """Rough seconds until a rejected caller would be admitted."""
+        if self.rate > 0:
+            return max(1.0, math.ceil((self.queue_depth + 1) / self.rate))
+        return max(1.0, math.ceil(self.queue_timeout / 4))
@@ -0,0 +1,314 @@
+"""Local mirror of downloaded images that outlives upstream blob URLs."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.core.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Artifact:
+    """A mirrored image and its metadata."""
+
+    job_id: str
+    sha256: str
+    size: int
+    content_type: str
+    path: Path
+    created_at: float
+    metadata: Dict[str, Any]
+
+
+class ArtifactStore:
+    """
+    Content-addressed image files on disk with metadata in SQLite.
+
+    Images are streamed to a temporary file while being hashed, then renamed
+    to {directory}/{hash[:2]}/{hash}, so identical images are stored once no
+    matter how many jobs produced them. A background sweeper deletes entries
+    older than the retention period and evicts least recently served entries
+    while the store exceeds its byte budget.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS artifacts (
+            job_id TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            content_type TEXT NOT NULL,
+            metadata TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS artifacts_sha256 ON artifacts (sha256);
+        CREATE INDEX IF NOT EXISTS artifacts_last_access ON artifacts (last_access);
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 5 * 1024 * 1024 * 1024,
+        retention: float = 30 * 86400,
+        sweep_interval: float = 300,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Root directory for image files and the metadata database
+            max_bytes: Byte budget for stored files
+            retention: Seconds to keep an entry after it was written
+            sweep_interval: Seconds between background retention sweeps
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self.sweep_interval = sweep_interval
+        self._conn = sqlite3.connect(self.directory / "artifacts.db", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+        self._lock = threading.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ArtifactStore":
+        """Create a store configured from settings."""
+        return cls(
+            directory=settings.artifact_dir,
+            max_bytes=settings.artifact_max_bytes,
+            retention=settings.artifact_retention,
+            sweep_interval=settings.artifact_sweep_interval,
+        )
+
+    async def _run(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Execute a statement in a worker thread and return its rows."""
+        def execute() -> List[tuple]:
+            with self._lock, self._conn:
+                return self._conn.execute(sql, params).fetchall()
+
+        return await asyncio.to_thread(execute)
+
+    def _path(self, sha256: str) -> Path:
+        return self.directory / sha256[:2] / sha256
+
+    async def write_stream(
+        self,
+        job_id: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Artifact:
+        """
+        Stream an image to disk and record it under a job id.
+
+        Args:
+            job_id: Job the image belongs to
+            chunks: Image bytes, in order
+            content_type: Image MIME type
+            metadata: Generation metadata (seed, cost, prompt, ...) to store alongside
+
+        Returns:
+            The stored artifact
+        """
+        self._ensure_sweeper()
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_name = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await asyncio.to_thread(file.write, chunk)
+            sha256 = digest.hexdigest()
+            path = self._path(sha256)
+            await asyncio.to_thread(_publish, Path(temp_name), path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+        now = time.time()
+        metadata = metadata or {}
+        await self._run(
+            "INSERT INTO artifacts (job_id, sha256, size, content_type, metadata, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(job_id) DO UPDATE SET "
+            "sha256 = excluded.sha256, size = excluded.size, content_type = excluded.content_type, "
+            "metadata = excluded.metadata, last_access = excluded.last_access",
+            (job_id, sha256, size, content_type, json.dumps(metadata), now, now),
+        )
+        return Artifact(job_id, sha256, size, content_type, path, now, metadata)
+
+    async def put(
+        self,
+        job_id: str,
+        image_data: bytes,
+        content_type: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Artifact:
+        """Store image bytes already in memory."""
+        async def single() -> AsyncIterator[bytes]:
+            yield image_data
+
+        return await self.write_stream(job_id, single(), content_type, metadata)
+
+    async def tee(
+        self,
+        job_id: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Pass chunks through while mirroring them to disk.
+
+        The artifact is only recorded if the stream is consumed to the end;
+        a client disconnecting mid-stream leaves no partial entry behind.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def mirrored() -> AsyncIterator[bytes]:
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+
+        writer = asyncio.create_task(self.write_stream(job_id, mirrored(), content_type, metadata))
+        try:
+            async for chunk in chunks:
+                queue.put_nowait(chunk)
+                yield chunk
+        except BaseException:
+            writer.cancel()
+            raise
+        queue.put_nowait(None)
+        try:
+            await writer
+        except Exception:
+            logger.warning("Mirroring image for job %s failed", job_id, exc_info=True)
+
+    async def get(self, job_id: str) -> Optional[Artifact]:
+        """Look up a job's artifact and mark it as recently served."""
+        rows = await self._run(
+            "UPDATE artifacts SET last_access = ? WHERE job_id = ? "
+            "RETURNING sha256, size, content_type, metadata, created_at",
+            (time.time(), job_id),
+        )
+        if not rows:
+            return None
+        sha256, size, content_type, metadata, created_at = rows[0]
+        path = self._path(sha256)
+        if not path.exists():
+            await self._run("DELETE FROM artifacts WHERE job_id = ?", (job_id,))
+            return None
+        return Artifact(job_id, sha256, size, content_type, path, created_at, json.loads(metadata))
+
+    async def find(self, sha256: str) -> Optional[Artifact]:
+        """Look up an artifact by content hash and mark it as recently served."""
+        rows = await self._run(
+            "UPDATE artifacts SET last_access = ? WHERE job_id = "
+            "(SELECT job_id FROM artifacts WHERE sha256 = ? ORDER BY last_access DESC LIMIT 1) "
+            "RETURNING job_id, size, content_type, metadata, created_at",
+            (time.time(), sha256),
+        )
+        if not rows:
+            return None
+        job_id, size, content_type, metadata, created_at = rows[0]
+        path = self._path(sha256)
+        if not path.exists():
+            await self._run("DELETE FROM artifacts WHERE sha256 = ?", (sha256,))
+            return None
+        return Artifact(job_id, sha256, size, content_type, path, created_at, json.loads(metadata))
+
+    async def iter_chunks(self, artifact: Artifact, chunk_size: int) -> AsyncIterator[bytes]:
+        """Read an artifact's file in chunks without blocking the event loop."""
+        file = await asyncio.to_thread(artifact.path.open, "rb")
+        try:
+            while chunk := await asyncio.to_thread(file.read, chunk_size):
+                yield chunk
+        finally:
+            file.close()
+
+    async def total_bytes(self) -> int:
+        """Bytes used by distinct stored files."""
+        rows = await self._run(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT sha256, size FROM artifacts)"
+        )
+        return rows[0][0]
+
+    async def enforce(self) -> int:
+        """
+        Apply retention and the byte budget.
+
+        Returns:
+            Number of entries removed
+        """
+        removed = await self._run(
+            "DELETE FROM artifacts WHERE created_at < ? RETURNING sha256",
+            (time.time() - self.retention,),
+        )
+        orphans = {sha256 for (sha256,) in removed}
+
+        total = await self.total_bytes()
+        while total > self.max_bytes:
+            rows = await self._run(
+                "DELETE FROM artifacts WHERE job_id = "
+                "(SELECT job_id FROM artifacts ORDER BY last_access LIMIT 1) RETURNING sha256, size"
+            )
+            if not rows:
+                break
+            removed.extend(rows)
+            orphans.add(rows[0][0])
+            total = await self.total_bytes()
+
+        for sha256 in orphans:
+            still_used = await self._run(
+                "SELECT 1 FROM artifacts WHERE sha256 = ? LIMIT 1", (sha256,)
+            )
+            if not still_used:
+                await asyncio.to_thread(self._path(sha256).unlink, missing_ok=True)
+        return len(removed)
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep())
+
+    async def _sweep(self) -> None:
+        """Enforce limits periodically for as long as the store is open."""
+        while True:
+            try:
+                await self.enforce()
+            except Exception:
+                logger.warning("Artifact sweep failed", exc_info=True)
+            await asyncio.sleep(self.sweep_interval)
+
+    async def close(self) -> None:
+        """Stop the sweeper and close the database."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        with self._lock:
+            self._conn.close()
+
+
+def _publish(temp_path: Path, path: Path) -> None:
+    """Move a finished temporary file into place, keeping an existing copy."""
+    path.parent.mkdir(exist_ok=True)
+    if path.exists():
+        temp_path.unlink()
+    else:
+        os.replace(temp_path, path)
@@ -0,0 +1,299 @@
+"""State shared between workers: key-value records, locks, counters and sets."""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Set, Tuple, Union
+
+from src.core.config.settings import Settings
+
+BACKENDS = ("memory", "redis")
+
+Value = Union[bytes, str]
+
+
+class CoordinationBackend(ABC):
+    """
+    Small key-value interface shared by every worker of a deployment.
+
+    Values are bytes (str is stored UTF-8 encoded). Keys may expire after a
+    TTL; set with only_if_absent is an atomic claim, usable as a lock.
+    """
+
+    # Whether other processes see the same state; a process-local backend
+    # lets callers skip work that only matters between workers
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return a key's value, or None if it is missing or expired."""
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: Value, ttl: Optional[float] = None, only_if_absent: bool = False
+    ) -> bool:
+        """
+        Store a value.
+
+        Args:
+            key: Key to write
+            value: Bytes or text to store
+            ttl: Seconds until the key expires (None keeps it)
+            only_if_absent: Only write if the key does not exist
+
+        Returns:
+            Whether the value was written
+        """
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> int:
+        """Delete keys; return how many existed."""
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add to an integer counter, setting ttl when the counter is created."""
+
+    @abstractmethod
+    async def sadd(self, key: str, *members: str) -> None:
+        """Add members to a set."""
+
+    @abstractmethod
+    async def srem(self, key: str, *members: str) -> None:
+        """Remove members from a set."""
+
+    @abstractmethod
+    async def smembers(self, key: str) -> Set[str]:
+        """Return the members of a set."""
+
+    async def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+def _encode(value: Value) -> bytes:
+    return value.encode() if isinstance(value, str) else value
+
+
+class MemoryBackend(CoordinationBackend):
+    """Process-local backend; the default for single-worker deployments."""
+
+    # Sweep expired keys once per this many writes so unread keys do not pile up
+    _SWEEP_EVERY = 1000
+
+    def __init__(self):
+        # key -> (value, expires_at or None)
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._writes = 0
+
+    def _live(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def _write(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        self._writes += 1
+        if self._writes % self._SWEEP_EVERY == 0:
+            now = time.monotonic()
+            for stale in [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]:
+                del self._data[stale]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self._live(key)
+        if isinstance(value, int):
+            return str(value).encode()
+        return value if isinstance(value, bytes) else None
+
+    async def set(
+        self, key: str, value: Value, ttl: Optional[float] = None, only_if_absent: bool = False
+    ) -> bool:
+        if only_if_absent and self._live(key) is not None:
+            return False
+        self._write(key, _encode(value), ttl)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(
+            1 for key in keys if self._live(key) is not None and self._data.pop(key, None)
+        )
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        value = self._live(key)
+        if value is None:
+            self._write(key, amount, ttl)
+            return amount
+        count = int(value) + amount
+        self._data[key] = (count, self._data[key][1])
+        return count
+
+    async def sadd(self, key: str, *members: str) -> None:
+        members_set = self._live(key)
+        if not isinstance(members_set, set):
+            members_set = set()
+            self._write(key, members_set, None)
+        members_set.update(members)
+
+    async def srem(self, key: str, *members: str) -> None:
+        members_set = self._live(key)
+        if isinstance(members_set, set):
+            members_set.difference_update(members)
+            if not members_set:
+                del self._data[key]
+
+    async def smembers(self, key: str) -> Set[str]:
+        members_set = self._live(key)
+        return set(members_set) if isinstance(members_set, set) else set()
+
+
+class RedisBackend(CoordinationBackend):
+    """
+    Backend on any server speaking the Redis protocol (Redis, Valkey, KeyDB...).
+
+    Uses the redis.asyncio client (the "redis" extra) over a pool of
+    connections. A pooled connection the server dropped while idle is
+    replaced before use, and a command that fails on a broken connection is
+    retried once on a fresh one. Every key is namespaced with prefix so
+    deployments can share a server.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "civitai:",
+        pool_size: int = 10,
+        timeout: float = 5.0,
+    ):
+        """
+        Initialize the backend; connections are opened on first use.
+
+        Args:
+            url: redis://[[user]:password@]host[:port][/db] (or rediss:// for TLS)
+            prefix: Prepended to every key
+            pool_size: Maximum open connections
+            timeout: Seconds to wait for a connection or a reply
+        """
+        try:
+            from redis.asyncio import Redis
+            from redis.asyncio.retry import Retry
+            from redis.backoff import NoBackoff
+        except ImportError:
+            raise RuntimeError(
+                "The redis coordination backend requires redis: "
+                "install civitai-mcp-server[redis]"
+            ) from None
+
+        self.prefix = prefix
+        # RESP2 keeps servers without HELLO (older Redis and compatibles) working
+        self._client = Redis.from_url(
+            url,
+            protocol=2,
+            max_connections=pool_size,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+            retry=Retry(NoBackoff(), 1),
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RedisBackend":
+        """Create a backend configured from settings."""
+        return cls(
+            url=settings.redis_url,
+            prefix=settings.redis_prefix,
+            pool_size=settings.redis_pool_size,
+        )
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(self._key(key))
+
+    async def set(
+        self, key: str, value: Value, ttl: Optional[float] = None, only_if_absent: bool = False
+    ) -> bool:
+        px = max(1, int(ttl * 1000)) if ttl is not None else None
+        written = await self._client.set(self._key(key), _encode(value), px=px, nx=only_if_absent)
+        return bool(written)
+
+    async def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return await self._client.delete(*(self._key(key) for key in keys))
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        if ttl is None:
+            return await self._client.incrby(self._key(key), amount)
+        # Create the counter with its expiry first; INCRBY keeps an existing TTL
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(key), 0, px=max(1, int(ttl * 1000)), nx=True)
+            pipe.incrby(self._key(key), amount)
+            _, count = await pipe.execute()
+        return count
+
+    async def sadd(self, key: str, *members: str) -> None:
+        if members:
+            await self._client.sadd(self._key(key), *members)
+
+    async def srem(self, key: str, *members: str) -> None:
+        if members:
+            await self._client.srem(self._key(key), *members)
+
+    async def smembers(self, key: str) -> Set[str]:
+        return {member.decode() for member in await self._client.smembers(self._key(key))}
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        await self._client.aclose()
+
+
+class SharedRateLimiter:
+    """
+    Limit submissions per second across every worker sharing a backend.
+
+    Time is cut into windows of burst / rate seconds and each window admits
+    burst submissions, counted with one atomic increment, so the long-run
+    rate matches a token bucket of the same rate and burst. Callers over the
+    limit sleep until the next window.
+    """
+
+    def __init__(self, backend: CoordinationBackend, rate: float, burst: int, name: str = "admission"):
+        self.backend = backend
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.name = name
+
+    @classmethod
+    def from_settings(cls, backend: CoordinationBackend, settings: Settings) -> "SharedRateLimiter":
+        """Create a limiter using the admission rate and burst from settings."""
+        return cls(backend, settings.admission_rate, settings.admission_burst)
+
+    async def acquire(self) -> None:
+        """Wait until a submission is allowed."""
+        if self.rate <= 0:
+            return
+        window = self.burst / self.rate
+        while True:
+            now = time.time()
+            index = int(now // window)
+            count = await self.backend.incr(f"rate:{self.name}:{index}", ttl=window * 2)
+            if count <= self.burst:
+                return
+            await asyncio.sleep((index + 1) * window - now)
+
+
+def create_coordination_backend(settings: Settings) -> CoordinationBackend:
+    """Create the coordination backend selected in settings."""
+    if settings.coordination_backend == "memory":
+        return MemoryBackend()
+    if settings.coordination_backend == "redis":
+        return RedisBackend.from_settings(settings)
+    raise ValueError(
+        f"Unknown coordination backend '{settings.coordination_backend}'. "
+        f"Choose from: {', '.join(BACKENDS)}"
+    )
@@ -0,0 +1,307 @@
+"""Per-job cost ledger and spending budgets."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.config.settings import Settings
+
+# Budget windows; each is a fixed UTC-aligned period (calendar month for "month")
+WINDOWS = ("hour", "day", "week", "month")
+
+# Budget keys with special meaning: defaults for callers without their own
+# entry, and the combined spend of every caller
+DEFAULT_CALLER = "*"
+ALL_CALLERS = "all"
+
+GROUP_BY = ("caller", "model", "api_key")
+
+
+class BudgetExceeded(Exception):
+    """Raised when a submission would take a caller over budget."""
+
+    def __init__(self, caller: str, window: str, limit: float, spent: float, retry_after: float):
+        scope = "All callers" if caller == ALL_CALLERS else f"Caller '{caller}'"
+        super().__init__(
+            f"{scope} has spent {spent:g} of its per-{window} budget of {limit:g}"
+        )
+        self.caller = caller
+        self.window = window
+        self.limit = limit
+        self.spent = spent
+        self.retry_after = retry_after
+
+
+def window_bounds(window: str, now: float) -> Tuple[float, float]:
+    """Start and end timestamps of the window containing now."""
+    moment = datetime.fromtimestamp(now, timezone.utc)
+    if window == "hour":
+        start = moment.replace(minute=0, second=0, microsecond=0)
+        return start.timestamp(), start.timestamp() + 3600
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == "day":
+        return day.timestamp(), day.timestamp() + 86400
+    if window == "week":
+        start = day.timestamp() - day.weekday() * 86400
+        return start, start + 7 * 86400
+    if window == "month":
+        start = day.replace(day=1)
+        end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+        return start.timestamp(), end.timestamp()
+    raise ValueError(f"Unknown budget window '{window}'. Choose from: {', '.join(WINDOWS)}")
+
+
+class CostLedger:
+    """
+    Record the cost of every job and enforce spending budgets.
+
+    Every job is written to SQLite with its caller, model and API key, so
+    spend can be summarized along any of them. Budget checks never touch the
+    database: spend for the current window of every caller is kept in memory
+    (loaded once from the ledger on first use) and updated as jobs are
+    recorded, so a check is a few dict lookups.
+
+    A check also counts estimated cost of submissions in flight, priced at
+    the last observed cost for the model, so a burst of concurrent requests
+    cannot overshoot the budget while earlier jobs are still being recorded.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS costs (
+            job_id TEXT,
+            caller TEXT NOT NULL,
+            model TEXT NOT NULL,
+            api_key TEXT NOT NULL,
+            cost REAL NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS costs_created_at ON costs (created_at);
+        CREATE INDEX IF NOT EXISTS costs_caller ON costs (caller, created_at);
+    """
+
+    def __init__(
+        self, path: str = ":memory:", budgets: Optional[Dict[str, Dict[str, float]]] = None
+    ):
+        """
+        Initialize the ledger.
+
+        Args:
+            path: SQLite database path (":memory:" keeps the ledger in process)
+            budgets: Limits per caller and window, e.g. {"*": {"day": 500}};
+                "*" applies to callers without their own entry and "all" to
+                the combined spend of every caller
+        """
+        self.budgets = budgets or {}
+        for limits in self.budgets.values():
+            for window in limits:
+                window_bounds(window, time.time())
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(self._SCHEMA)
+        self._lock = threading.Lock()
+        self._loaded = False
+        # (caller, window) -> [window start, spent]
+        self._spent: Dict[Tuple[str, str], List[float]] = {}
+        self._pending: Dict[str, float] = {}
+        self._last_cost: Dict[str, float] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "CostLedger":
+        """Create a ledger configured from settings."""
+        return cls(path=settings.cost_ledger_path or ":memory:", budgets=settings.cost_budgets)
+
+    async def _run(self, sql: str, params: Any = ()) -> List[tuple]:
+        """Execute a statement in a worker thread and return its rows."""
+        def execute() -> List[tuple]:
+            with self._lock, self._conn:
+                if isinstance(params, list):
+                    self._conn.executemany(sql, params)
+                    return []
+                return self._conn.execute(sql, params).fetchall()
+
+        return await asyncio.to_thread(execute)
+
+    async def _ensure_loaded(self) -> None:
+        """Load current-window spend from the ledger once, so limits survive restarts."""
+        if self._loaded:
+            return
+        now = time.time()
+        windows = {window for limits in self.budgets.values() for window in limits}
+        totals = {}
+        for window in windows:
+            start, _ = window_bounds(window, now)
+            totals[window] = await self._run(
+                "SELECT caller, SUM(cost) FROM costs WHERE created_at >= ? GROUP BY caller",
+                (start,),
+            )
+        # A concurrent first call may have finished loading while this one waited
+        if self._loaded:
+            return
+        for window, rows in totals.items():
+            for caller, spent in rows:
+                self._add(caller, window, spent, now)
+                self._add(ALL_CALLERS, window, spent, now)
+        self._loaded = True
+
+    def _limits(self, caller: str) -> Dict[str, float]:
+        if caller == ALL_CALLERS:
+            return self.budgets.get(ALL_CALLERS, {})
+        return self.budgets.get(caller, self.budgets.get(DEFAULT_CALLER, {}))
+
+    def _window_spend(self, caller: str, window: str, now: float) -> float:
+        entry = self._spent.get((caller, window))
+        if entry is None or entry[0] != window_bounds(window, now)[0]:
+            return 0.0
+        return entry[1]
+
+    def _add(self, caller: str, window: str, amount: float, now: float) -> None:
+        start, _ = window_bounds(window, now)
+        entry = self._spent.get((caller, window))
+        if entry is None or entry[0] != start:
+            entry = self._spent[(caller, window)] = [start, 0.0]
+        entry[1] += amount
+
+    def estimate(self, model: str, quantity: int = 1) -> float:
+        """Expected cost of a submission, from the last observed cost for the model."""
+        return self._last_cost.get(model, 0.0) * quantity
+
+    async def check(self, caller: str, model: str, quantity: int = 1) -> float:
+        """
+        Raise if a submission would exceed any budget that applies to the caller.
+
+        Returns:
+            The submission's estimated cost
+
+        Raises:
+            BudgetExceeded: With the window and seconds until it resets
+        """
+        await self._ensure_loaded()
+        estimate = self.estimate(model, quantity)
+        now = time.time()
+        for scope in (caller, ALL_CALLERS):
+            pending = self._pending.get(scope, 0.0)
+            for window, limit in self._limits(scope).items():
+                spent = self._window_spend(scope, window, now)
+                if spent >= limit or spent + pending + estimate > limit:
+                    _, end = window_bounds(window, now)
+                    raise BudgetExceeded(scope, window, limit, spent, end - now)
+        return estimate
+
+    async def reserve(self, caller: str, model: str, quantity: int = 1) -> float:
+        """Check budgets and count the estimated cost as in flight until released."""
+        estimate = await self.check(caller, model, quantity)
+        for scope in (caller, ALL_CALLERS):
+            self._pending[scope] = self._pending.get(scope, 0.0) + estimate
+        return estimate
+
+    def release(self, caller: str, estimate: float) -> None:
+        """Stop counting a reservation once its submission is recorded or failed."""
+        for scope in (caller, ALL_CALLERS):
+            remaining = self._pending.get(scope, 0.0) - estimate
+            if remaining > 1e-9:
+                self._pending[scope] = remaining
+            else:
+                self._pending.pop(scope, None)
+
+    async def record(
+        self, caller: str, model: str, api_key: str, jobs: List[Dict[str, Any]]
+    ) -> float:
+        """
+        Record submitted jobs and their costs.
+
+        Args:
+            caller: Client the jobs were submitted for
+            model: Model URN
+            api_key: Label of the API key that paid for the jobs
+            jobs: Submitted jobs, with jobId and cost
+
+        Returns:
+            Total cost of the jobs
+        """
+        await self._ensure_loaded()
+        now = time.time()
+        costs = [float(job.get("cost") or 0) for job in jobs]
+        total = sum(costs)
+        if jobs:
+            self._last_cost[model] = total / len(jobs)
+        windows = {window for limits in self.budgets.values() for window in limits}
+        for window in windows:
+            self._add(caller, window, total, now)
+            self._add(ALL_CALLERS, window, total, now)
+        await self._run(
+            "INSERT INTO costs (job_id, caller, model, api_key, cost, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (job.get("jobId"), caller, model, api_key, cost, now)
+                for job, cost in zip(jobs, costs)
+            ],
+        )
+        return total
+
+    async def summary(
+        self,
+        group_by: str = "caller",
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        caller: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Total spend and job counts grouped by caller, model or API key.
+
+        Args:
+            group_by: Column to group on (caller, model or api_key)
+            since: Only include jobs recorded at or after this timestamp
+            until: Only include jobs recorded before this timestamp
+            caller: Only include jobs for this caller
+
+        Returns:
+            One dict per group with jobs and cost, most expensive first
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"Cannot group by '{group_by}'. Choose from: {', '.join(GROUP_BY)}")
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if caller is not None:
+            clauses.append("caller = ?")
+            params.append(caller)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = await self._run(
+            f"SELECT {group_by}, COUNT(*), SUM(cost) FROM costs {where} "
+            f"GROUP BY {group_by} ORDER BY SUM(cost) DESC",
+            tuple(params),
+        )
+        return [{group_by: name, "jobs": jobs, "cost": cost} for name, jobs, cost in rows]
+
+    async def budget_status(self, caller: str) -> List[Dict[str, Any]]:
+        """Spend against every budget that applies to a caller, in the current windows."""
+        await self._ensure_loaded()
+        now = time.time()
+        status = []
+        for scope in (caller, ALL_CALLERS):
+            for window, limit in self._limits(scope).items():
+                spent = self._window_spend(scope, window, now)
+                _, end = window_bounds(window, now)
+                status.append({
+                    "caller": scope,
+                    "window": window,
+                    "limit": limit,
+                    "spent": spent,
+                    "remaining": max(0.0, limit - spent),
+                    "resets_in": round(end - now, 3),
+                })
+        return status
+
+    async def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,123 @@
+"""Write-ahead journal of submitted upstream jobs, so they survive restarts."""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.core.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JournalEntry:
+    """A paid upstream submission whose result has not been delivered yet."""
+
+    token: str
+    request: Dict[str, Any]
+    jobs: List[Dict[str, Any]]
+    key: str
+    caller: str = "anonymous"
+    timeout: int = 300
+    job_id: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+
+
+class JobJournal:
+    """
+    Append-only journal of upstream job tokens.
+
+    A submission is appended (and fsynced) as soon as upstream accepts it,
+    before its result is awaited, and a completion record is appended once the
+    result has been delivered or the job has failed. After a crash or restart
+    the submissions without a completion are the jobs still worth polling:
+    they have been paid for and their tokens would otherwise be lost.
+
+    The file is one JSON object per line. It is compacted to the outstanding
+    submissions when opened and whenever completed records dominate it; a
+    torn final line from a crash mid-write is skipped.
+    """
+
+    # Compact once this many lines exist beyond the outstanding submissions
+    _COMPACT_AFTER = 1000
+
+    def __init__(self, path: str):
+        """
+        Open the journal, replaying and compacting any existing file.
+
+        Args:
+            path: Journal file; use one per process
+        """
+        started = time.perf_counter()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, JournalEntry] = self._replay()
+        self._lines = 0
+        self._compact()
+        # Seconds spent reading and compacting the journal at startup
+        self.replay_seconds = time.perf_counter() - started
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> Optional["JobJournal"]:
+        """Create the journal configured in settings, or None if it is disabled."""
+        return cls(settings.job_journal_path) if settings.job_journal_path else None
+
+    def _replay(self) -> Dict[str, JournalEntry]:
+        pending: Dict[str, JournalEntry] = {}
+        if not self.path.exists():
+            return pending
+        with self.path.open() as journal:
+            for number, line in enumerate(journal, 1):
+                try:
+                    record = json.loads(line)
+                    if record["op"] == "submit":
+                        entry = JournalEntry(**record["entry"])
+                        pending[entry.token] = entry
+                    elif record["op"] == "done":
+                        pending.pop(record["token"], None)
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Skipping unreadable line %d of job journal %s", number, self.path)
+        return pending
+
+    def _compact(self) -> None:
+        """Rewrite the journal with only the outstanding submissions."""
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("w") as journal:
+            for entry in list(self._pending.values()):
+                journal.write(json.dumps({"op": "submit", "entry": asdict(entry)}) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(tmp_path, self.path)
+        self._lines = len(self._pending)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._lines - len(self._pending) >= self._COMPACT_AFTER:
+                self._compact()
+            with self.path.open("a") as journal:
+                journal.write(json.dumps(record) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+            self._lines += 1
+
+    def pending(self) -> List[JournalEntry]:
+        """Submissions not yet completed, oldest first."""
+        return sorted(self._pending.values(), key=lambda entry: entry.submitted_at)
+
+    async def submit(self, entry: JournalEntry) -> None:
+        """Durably record an accepted submission."""
+        self._pending[entry.token] = entry
+        await asyncio.to_thread(self._append, {"op": "submit", "entry": asdict(entry)})
+
+    async def done(self, token: Optional[str]) -> None:
+        """Record that a submission's result was delivered or that it failed."""
+        if token is None or self._pending.pop(token, None) is None:
+            return
+        await asyncio.to_thread(self._append, {"op": "done", "token": token})
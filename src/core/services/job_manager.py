@@ -0,0 +1,321 @@
+"""Background execution of asynchronous generation jobs."""
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.models.job import JobRecord, JobStatus
+from src.core.services.admission import PRIORITIES
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.job_journal import JournalEntry
+from src.core.services.job_store import JobStore
+from src.core.services.progress import PhaseTimer
+
+logger = logging.getLogger(__name__)
+
+# Seconds between store reads when following a job another worker may be running
+SHARED_EVENT_POLL = 1.0
+
+
+class JobManager:
+    """
+    Accept generation jobs immediately and run them in the background.
+
+    Each job moves through queued -> processing -> available -> downloaded
+    (or failed); every transition is written to the job store as a progress
+    event, pushed to live subscribers, and the optional callback URL is
+    notified once the job reaches a final status.
+    """
+
+    def __init__(self, service: CivitaiService, store: JobStore, settings: Settings):
+        self.service = service
+        self.store = store
+        self.settings = settings
+        self._tasks: Set[asyncio.Task] = set()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._last_purge = 0.0
+        self.recovery: Dict[str, Any] = {"jobs": 0, "failed": 0, "seconds": 0.0}
+
+    async def submit(
+        self,
+        request: GenerateImageRequest,
+        timeout: int = 300,
+        poll_strategy: Optional[str] = None,
+        priority: str = "normal",
+        callback_url: Optional[str] = None,
+        caller: str = "anonymous",
+    ) -> JobRecord:
+        """
+        Record a new job and start it in the background.
+
+        Returns:
+            The queued job record
+
+        Raises:
+            AdmissionRejected: If the submission queue is already full
+            BudgetExceeded: If the caller has already spent its budget
+        """
+        # Fail fast on bad input, a full queue or a spent budget rather than in the background task
+        self.service.get_polling_strategy(poll_strategy)
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"Unknown priority '{priority}'. Choose from: {', '.join(PRIORITIES)}"
+            )
+        self.service.admission.check()
+        await self.service.ledger.check(caller, request.model)
+
+        job = JobRecord(
+            request=asdict(request),
+            timeout=timeout,
+            poll_strategy=poll_strategy,
+            priority=priority,
+            callback_url=callback_url,
+            caller=caller,
+        )
+        PhaseTimer(job.id, job.created_at, job.events).transition(job.status.value)
+        await self.store.save(job)
+        self._spawn(job)
+        await self._maybe_purge()
+        return job
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        """Fetch a job record."""
+        return await self.store.get(job_id)
+
+    async def get_image(self, job_id: str) -> Optional[tuple[bytes, str]]:
+        """Fetch a finished job's image bytes and content type."""
+        return await self.store.get_image(job_id)
+
+    async def events(
+        self, job_id: str, heartbeat: Optional[float] = None
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Stream a job's progress events until it reaches a final status.
+
+        Past events are replayed first, so late subscribers see the full history.
+
+        Args:
+            job_id: Job to follow
+            heartbeat: If set, yield None after this many idle seconds so
+                callers can keep connections alive
+
+        Raises:
+            KeyError: If the job does not exist
+        """
+        # Subscribe before reading the record so no transition is missed
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            job = await self.store.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+
+            seen = set()
+            for event in list(job.events):
+                seen.add(event["status"])
+                yield event
+            if job.status.is_final:
+                return
+
+            wait = heartbeat
+            if self.store.shared:
+                # Transitions made by other workers only reach this one through the store
+                wait = min(heartbeat or SHARED_EVENT_POLL, SHARED_EVENT_POLL)
+            idle_since = time.monotonic()
+            while True:
+                try:
+                    events = [await asyncio.wait_for(queue.get(), wait)]
+                except asyncio.TimeoutError:
+                    if not self.store.shared:
+                        yield None
+                        continue
+                    job = await self.store.get(job_id)
+                    events = job.events if job is not None else []
+                    fresh = any(event["status"] not in seen for event in events)
+                    # Allow for timer resolution when the heartbeat equals the poll interval
+                    if not fresh and heartbeat is not None:
+                        if time.monotonic() - idle_since >= heartbeat - 1e-3:
+                            idle_since = time.monotonic()
+                            yield None
+                for event in events:
+                    if event["status"] in seen:
+                        continue
+                    seen.add(event["status"])
+                    idle_since = time.monotonic()
+                    yield event
+                    if JobStatus(event["status"]).is_final:
+                        return
+        finally:
+            subscribers = self._subscribers.get(job_id, set())
+            subscribers.discard(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    async def resume(self) -> Dict[str, Any]:
+        """
+        Pick up jobs interrupted by a restart.
+
+        Submissions left in the service's journal are polled again under
+        their job ids, recreating records a process-local store has lost.
+        Unless the store is shared with other workers, stored jobs that were
+        still queued are started again, ones already available are only
+        downloaded, and ones whose upstream token was never journaled are
+        marked failed since they can no longer be followed.
+
+        Returns:
+            Number of resumed and failed jobs, and seconds recovery took
+        """
+        started = time.perf_counter()
+        stored: Dict[str, JobRecord] = {}
+        if not self.store.shared:
+            stored = {job.id: job for job in await self.store.list_unfinished()}
+        journal = self.service.journal
+        entries: List[JournalEntry] = journal.pending() if journal is not None else []
+
+        resumed = failed = 0
+        for entry in entries:
+            job = stored.pop(entry.job_id, None) if entry.job_id else None
+            if job is None and entry.job_id and await self.store.get(entry.job_id):
+                # Finished before the journal heard about it
+                await self.service.finish_journal(entry.token)
+                continue
+            if job is None:
+                job = JobRecord(
+                    request=entry.request,
+                    timeout=entry.timeout,
+                    caller=entry.caller,
+                    created_at=entry.submitted_at,
+                )
+                if entry.job_id:
+                    job.id = entry.job_id
+            job.token = entry.token
+            if job.status == JobStatus.AVAILABLE and job.result:
+                # Only the download was interrupted
+                self._spawn(job)
+            else:
+                if job.status != JobStatus.PROCESSING:
+                    await self._transition(
+                        job, JobStatus.PROCESSING, token=entry.token, resumed=True
+                    )
+                self._spawn(job, entry)
+            resumed += 1
+
+        for job in stored.values():
+            if job.status == JobStatus.QUEUED or (
+                job.status == JobStatus.AVAILABLE and job.result and job.result.get("blob_url")
+            ):
+                self._spawn(job)
+                resumed += 1
+            else:
+                job.error = "Interrupted by a restart before its upstream job was journaled"
+                await self._transition(job, JobStatus.FAILED, error=job.error)
+                failed += 1
+
+        seconds = time.perf_counter() - started
+        if journal is not None:
+            seconds += journal.replay_seconds
+        self.recovery = {"jobs": resumed, "failed": failed, "seconds": round(seconds, 3)}
+        logger.info(
+            "Recovered %d interrupted jobs (%d unrecoverable) in %.3fs", resumed, failed, seconds
+        )
+        return self.recovery
+
+    async def close(self, drain_timeout: float = 0.0) -> None:
+        """
+        Stop running jobs and close the store.
+
+        Args:
+            drain_timeout: Seconds to let running jobs finish before they are
+                cancelled; cancelled jobs stay journaled for the next process
+        """
+        if self._tasks and drain_timeout > 0:
+            _, pending = await asyncio.wait(list(self._tasks), timeout=drain_timeout)
+            if pending:
+                logger.warning("Cancelling %d jobs still running after the drain deadline", len(pending))
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.store.close()
+
+    def _spawn(self, job: JobRecord, entry: Optional[JournalEntry] = None) -> None:
+        task = asyncio.create_task(self._run(job, entry))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: JobRecord, entry: Optional[JournalEntry] = None) -> None:
+        """
+        Generate, download and store a job's image, recording every transition.
+
+        Args:
+            job: Job to run
+            entry: Journaled submission to resume instead of submitting anew
+        """
+        request = GenerateImageRequest(**job.request)
+
+        async def on_status(status: str, details: Dict[str, Any]) -> None:
+            if status == JobStatus.PROCESSING.value:
+                job.token = details.get("token")
+            else:
+                job.result = details
+            # The upstream token is kept on the job, not published in its events
+            public = {key: value for key, value in details.items() if key != "token"}
+            await self._transition(job, JobStatus(status), **public)
+
+        try:
+            if entry is not None:
+                result = await self.service.resume(entry, job.poll_strategy)
+                await on_status(JobStatus.AVAILABLE.value, result)
+            elif job.status == JobStatus.AVAILABLE:
+                result = job.result
+            else:
+                result = await self.service.generate(
+                    request=request,
+                    timeout=job.timeout,
+                    poll_strategy=job.poll_strategy,
+                    on_status=on_status,
+                    priority=job.priority,
+                    caller=job.caller,
+                    job_id=job.id,
+                )
+            image_data, content_type = await self.service.download_result(result)
+            await self.store.set_image(job.id, image_data, content_type)
+            job.result = {**result, "content_type": content_type, "size": len(image_data)}
+            await self._transition(job, JobStatus.DOWNLOADED, size=len(image_data))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            await self._transition(job, JobStatus.FAILED, error=job.error)
+        await self.service.finish_journal(job.token)
+
+        if job.callback_url:
+            await self._notify(job)
+
+    async def _transition(self, job: JobRecord, status: JobStatus, **details: Any) -> None:
+        """Record a status change, persist it and publish the progress event."""
+        event = PhaseTimer(job.id, job.created_at, job.events).transition(
+            status.value, **details
+        )
+        job.status = status
+        job.updated_at = event["timestamp"]
+        await self.store.save(job)
+        for queue in self._subscribers.get(job.id, ()):
+            queue.put_nowait(event)
+
+    async def _notify(self, job: JobRecord) -> None:
+        """POST the final job record to its callback URL; failures are only logged."""
+        try:
+            await self.service.send_callback(job.callback_url, job.to_dict())
+        except Exception:
+            logger.warning("Callback for job %s to %s failed", job.id, job.callback_url, exc_info=True)
+
+    async def _maybe_purge(self) -> None:
+        """Drop expired jobs at most once a minute."""
+        now = time.time()
+        if now - self._last_purge >= 60:
+            self._last_purge = now
+            await self.store.purge(now - self.settings.job_ttl)
@@ -0,0 +1,277 @@
+"""Pluggable storage for asynchronous generation jobs."""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.config.settings import Settings
+from src.core.models.job import JobRecord, JobStatus
+from src.core.services.coordination import CoordinationBackend, create_coordination_backend
+
+
+class JobStore(ABC):
+    """Stores job records and their downloaded image bytes."""
+
+    # Whether other workers write to the same store, so progress of jobs they
+    # run can only be seen by reading it back
+    shared = False
+
+    @abstractmethod
+    async def save(self, job: JobRecord) -> None:
+        """Insert or replace a job record."""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        """Fetch a job record by id."""
+
+    @abstractmethod
+    async def set_image(self, job_id: str, image_data: bytes, content_type: str) -> None:
+        """Attach downloaded image bytes to a job."""
+
+    @abstractmethod
+    async def get_image(self, job_id: str) -> Optional[Tuple[bytes, str]]:
+        """Return (image bytes, content type) for a job, if downloaded."""
+
+    @abstractmethod
+    async def list_unfinished(self) -> List[JobRecord]:
+        """Return every job that has not reached a final status."""
+
+    @abstractmethod
+    async def purge(self, older_than: float) -> int:
+        """Delete jobs last updated before the given timestamp; return the count."""
+
+    async def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class MemoryJobStore(JobStore):
+    """Process-local job store; jobs are lost on restart."""
+
+    def __init__(self):
+        self._jobs: Dict[str, JobRecord] = {}
+        self._images: Dict[str, Tuple[bytes, str]] = {}
+
+    async def save(self, job: JobRecord) -> None:
+        self._jobs[job.id] = job
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        return self._jobs.get(job_id)
+
+    async def set_image(self, job_id: str, image_data: bytes, content_type: str) -> None:
+        self._images[job_id] = (image_data, content_type)
+
+    async def get_image(self, job_id: str) -> Optional[Tuple[bytes, str]]:
+        return self._images.get(job_id)
+
+    async def list_unfinished(self) -> List[JobRecord]:
+        return [job for job in self._jobs.values() if not job.status.is_final]
+
+    async def purge(self, older_than: float) -> int:
+        expired = [job_id for job_id, job in self._jobs.items() if job.updated_at < older_than]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._images.pop(job_id, None)
+        return len(expired)
+
+
+class SqliteJobStore(JobStore):
+    """SQLite-backed job store so jobs survive restarts."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            image BLOB,
+            content_type TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+        CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at);
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+        self._lock = threading.Lock()
+
+    async def _run(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Execute a statement in a worker thread and return its rows."""
+        def execute() -> List[tuple]:
+            with self._lock, self._conn:
+                return self._conn.execute(sql, params).fetchall()
+
+        return await asyncio.to_thread(execute)
+
+    async def save(self, job: JobRecord) -> None:
+        await self._run(
+            "INSERT INTO jobs (id, status, data, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET status = excluded.status, "
+            "data = excluded.data, updated_at = excluded.updated_at",
+            (job.id, job.status.value, json.dumps(_dump(job)), job.updated_at),
+        )
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        rows = await self._run("SELECT data FROM jobs WHERE id = ?", (job_id,))
+        return _load(json.loads(rows[0][0])) if rows else None
+
+    async def set_image(self, job_id: str, image_data: bytes, content_type: str) -> None:
+        await self._run(
+            "UPDATE jobs SET image = ?, content_type = ? WHERE id = ?",
+            (image_data, content_type, job_id),
+        )
+
+    async def get_image(self, job_id: str) -> Optional[Tuple[bytes, str]]:
+        rows = await self._run(
+            "SELECT image, content_type FROM jobs WHERE id = ? AND image IS NOT NULL",
+            (job_id,),
+        )
+        return (rows[0][0], rows[0][1]) if rows else None
+
+    async def list_unfinished(self) -> List[JobRecord]:
+        final = tuple(status.value for status in JobStatus if status.is_final)
+        rows = await self._run(
+            f"SELECT data FROM jobs WHERE status NOT IN ({', '.join('?' * len(final))})",
+            final,
+        )
+        return [_load(json.loads(row[0])) for row in rows]
+
+    async def purge(self, older_than: float) -> int:
+        rows = await self._run(
+            "DELETE FROM jobs WHERE updated_at < ? RETURNING id", (older_than,)
+        )
+        return len(rows)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SharedJobStore(JobStore):
+    """
+    Job store on the coordination backend, visible to every worker.
+
+    Each job is a JSON record with its image under a sibling key; both expire
+    after ttl, so purging is left to the backend. Unfinished job ids are kept
+    in a set for list_unfinished.
+    """
+
+    _UNFINISHED = "jobs:unfinished"
+
+    def __init__(self, backend: CoordinationBackend, ttl: float, owns_backend: bool = False):
+        """
+        Initialize the store.
+
+        Args:
+            backend: Coordination backend holding the jobs
+            ttl: Seconds a job is kept after its last update
+            owns_backend: Close the backend when the store is closed
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.owns_backend = owns_backend
+        self.shared = backend.shared
+
+    async def save(self, job: JobRecord) -> None:
+        await self.backend.set(f"job:{job.id}", json.dumps(_dump(job)), ttl=self.ttl)
+        if job.status.is_final:
+            await self.backend.srem(self._UNFINISHED, job.id)
+        else:
+            await self.backend.sadd(self._UNFINISHED, job.id)
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        data = await self.backend.get(f"job:{job_id}")
+        return _load(json.loads(data)) if data is not None else None
+
+    async def set_image(self, job_id: str, image_data: bytes, content_type: str) -> None:
+        # Content type first, then a newline, then the image bytes
+        await self.backend.set(
+            f"job:{job_id}:image", content_type.encode() + b"\n" + image_data, ttl=self.ttl
+        )
+
+    async def get_image(self, job_id: str) -> Optional[Tuple[bytes, str]]:
+        data = await self.backend.get(f"job:{job_id}:image")
+        if data is None:
+            return None
+        content_type, _, image_data = data.partition(b"\n")
+        return image_data, content_type.decode()
+
+    async def list_unfinished(self) -> List[JobRecord]:
+        jobs, expired = [], []
+        for job_id in await self.backend.smembers(self._UNFINISHED):
+            job = await self.get(job_id)
+            if job is None:
+                expired.append(job_id)
+            elif not job.status.is_final:
+                jobs.append(job)
+        await self.backend.srem(self._UNFINISHED, *expired)
+        return jobs
+
+    async def purge(self, older_than: float) -> int:
+        # Records expire on their own after ttl
+        return 0
+
+    async def close(self) -> None:
+        if self.owns_backend:
+            await self.backend.close()
+
+
+def create_job_store(
+    settings: Settings, backend: Optional[CoordinationBackend] = None
+) -> JobStore:
+    """
+    Create the job store selected in settings.
+
+    Args:
+        settings: Application settings
+        backend: Coordination backend for the "shared" store; one is created
+            from settings if not given
+    """
+    if settings.job_store == "memory":
+        return MemoryJobStore()
+    if settings.job_store == "sqlite":
+        return SqliteJobStore(settings.job_store_path)
+    if settings.job_store == "shared":
+        if backend is None:
+            return SharedJobStore(
+                create_coordination_backend(settings), settings.job_ttl, owns_backend=True
+            )
+        return SharedJobStore(backend, settings.job_ttl)
+    raise ValueError(
+        f"Unknown job store '{settings.job_store}'. Choose from: memory, sqlite, shared"
+    )
+
+
+def _dump(job: JobRecord) -> Dict[str, Any]:
+    data = job.to_dict()
+    data["timeout"] = job.timeout
+    data["poll_strategy"] = job.poll_strategy
+    data["priority"] = job.priority
+    data["caller"] = job.caller
+    return data
+
+
+def _load(data: Dict[str, Any]) -> JobRecord:
+    return JobRecord(
+        id=data["id"],
+        status=JobStatus(data["status"]),
+        request=data["request"],
+        timeout=data["timeout"],
+        poll_strategy=data.get("poll_strategy"),
+        priority=data.get("priority", "normal"),
+        caller=data.get("caller", "anonymous"),
+        callback_url=data.get("callback_url"),
+        token=data.get("token"),
+        result=data.get("result"),
+        error=data.get("error"),
+        events=data.get("events", []),
+        created_at=data["created_at"],
+        updated_at=data.get("updated_at", time.time()),
+    )
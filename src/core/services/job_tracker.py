@@ -0,0 +1,260 @@
+"""Shared job-status poller for in-flight generations."""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.core.services.polling import PollingStrategy
+from src.core.services.resilience import RetryPolicy, UpstreamError
+from src.core.services.tracing import current_span
+
+StatusFetcher = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class _TrackedToken:
+    """Polling state for one upstream token and everyone waiting on it."""
+
+    token: str
+    job_ids: List[Optional[str]]
+    strategy: PollingStrategy
+    started: float
+    next_poll: float
+    attempts: int = 0
+    failures: int = 0
+    # Seconds from the first wait until every job was available
+    available_after: Optional[float] = None
+    waiters: List[asyncio.Future] = field(default_factory=list)
+
+
+class JobTracker:
+    """
+    Poll every outstanding token from a single background task.
+
+    Callers register a token and await a future that resolves with the result
+    items once every job under the token is available. Waiters on the same
+    token share one status request per tick, tokens due in the same tick are
+    fetched together, and the task exits when nothing is in flight. Transient
+    status failures reschedule the token with backoff rather than failing its
+    waiters, so a retry never holds up the rest of the tick.
+    """
+
+    def __init__(
+        self,
+        fetch_status: StatusFetcher,
+        max_concurrent_polls: int = 16,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            fetch_status: Coroutine returning the status dict for a token
+            max_concurrent_polls: Maximum status requests in flight per tick
+            retry_policy: Policy for retrying failed status requests (none if omitted)
+        """
+        self._fetch_status = fetch_status
+        self._max_concurrent_polls = max_concurrent_polls
+        self.retry_policy = retry_policy
+        self._tokens: Dict[str, _TrackedToken] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.poll_calls = 0
+        self.ticks = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of tokens currently being tracked."""
+        return len(self._tokens)
+
+    async def wait(
+        self,
+        token: str,
+        job_ids: List[Optional[str]],
+        timeout: float,
+        strategy: PollingStrategy,
+    ) -> List[Dict[str, Any]]:
+        """
+        Wait until every job under a token has an available result.
+
+        Args:
+            token: Upstream token returned on submission
+            job_ids: Submitted job ids, used to order the results
+            timeout: Maximum wait time in seconds
+            strategy: Polling strategy deciding when this token is polled
+
+        The caller's current span records how many status requests the token
+        took and how long until its results were available.
+
+        Returns:
+            Result items (with blobUrl and seed), in submitted job order
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        tracked = self._tokens.get(token)
+        if tracked is None:
+            now = loop.time()
+            tracked = _TrackedToken(
+                token=token,
+                job_ids=list(job_ids),
+                strategy=strategy,
+                started=now,
+                next_poll=now + strategy.first_delay(),
+            )
+            self._tokens[token] = tracked
+        tracked.waiters.append(future)
+        self._ensure_running()
+
+        try:
+            done, _ = await asyncio.wait({future}, timeout=timeout)
+            if not done:
+                raise TimeoutError(
+                    f"Image generation did not complete within {timeout} seconds"
+                )
+            return future.result()
+        finally:
+            current_span().set_attributes(
+                polls=tracked.attempts, time_to_available=tracked.available_after
+            )
+            self._discard_waiter(tracked, future)
+
+    async def close(self) -> None:
+        """Stop the background task and fail any outstanding waiters."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for tracked in self._tokens.values():
+            for waiter in tracked.waiters:
+                if not waiter.done():
+                    waiter.set_exception(RuntimeError("Job tracker closed"))
+        self._tokens.clear()
+
+    def _ensure_running(self) -> None:
+        """Start the poller if needed, or wake it so new tokens are polled now."""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    def _discard_waiter(self, tracked: _TrackedToken, future: asyncio.Future) -> None:
+        """Drop a waiter; stop tracking the token once nobody is waiting."""
+        if future in tracked.waiters:
+            tracked.waiters.remove(future)
+        if not tracked.waiters and self._tokens.get(tracked.token) is tracked:
+            del self._tokens[tracked.token]
+
+    async def _run(self) -> None:
+        """Poll due tokens until nothing is in flight."""
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self._max_concurrent_polls)
+
+        async def poll(tracked: _TrackedToken) -> None:
+            async with semaphore:
+                await self._poll(tracked)
+
+        while self._tokens:
+            self._wakeup.clear()
+            now = loop.time()
+            due = [t for t in self._tokens.values() if t.next_poll <= now]
+            if due:
+                self.ticks += 1
+                await asyncio.gather(*(poll(tracked) for tracked in due))
+
+            if not self._tokens:
+                break
+            delay = min(t.next_poll for t in self._tokens.values()) - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _poll(self, tracked: _TrackedToken) -> None:
+        """Fetch one token's status and resolve its waiters if complete."""
+        loop = asyncio.get_running_loop()
+        self.poll_calls += 1
+        tracked.attempts += 1
+        if self.retry_policy is not None:
+            self.retry_policy.record_call()
+        try:
+            status = await self._fetch_status(tracked.token)
+            results = collect_results(status, tracked.job_ids)
+        except UpstreamError as e:
+            tracked.failures += 1
+            if self.retry_policy is not None and self.retry_policy.should_retry(
+                e, tracked.failures, idempotent=True
+            ):
+                tracked.next_poll = loop.time() + self.retry_policy.delay(tracked.failures, e)
+            else:
+                self._finish(tracked, exception=e)
+            return
+        except Exception as e:
+            self._finish(tracked, exception=e)
+            return
+
+        tracked.failures = 0
+
+        if results is not None:
+            tracked.available_after = loop.time() - tracked.started
+            tracked.strategy.stats.record(tracked.available_after, tracked.attempts)
+            self._finish(tracked, results=results)
+        else:
+            delay = tracked.strategy.next_delay(tracked.attempts, status)
+            tracked.next_poll = loop.time() + delay
+
+    def _finish(
+        self,
+        tracked: _TrackedToken,
+        results: Optional[List[Dict[str, Any]]] = None,
+        exception: Optional[BaseException] = None,
+    ) -> None:
+        """Resolve every waiter on a token and stop tracking it."""
+        if self._tokens.get(tracked.token) is tracked:
+            del self._tokens[tracked.token]
+        for waiter in tracked.waiters:
+            if waiter.done():
+                continue
+            if exception is not None:
+                waiter.set_exception(exception)
+            else:
+                waiter.set_result(results)
+
+
+def collect_results(
+    status: Dict[str, Any], job_ids: List[Optional[str]]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract available result items from a status response.
+
+    Returns:
+        Result items in submitted job order once every job is available, else None
+    """
+    expected = max(len(job_ids), 1)
+    available = {}
+    for index, job in enumerate(status.get("jobs") or []):
+        result_item = _available_result(job.get("result"))
+        if result_item is not None:
+            available[job.get("jobId") or index] = result_item
+
+    if len(available) < expected:
+        return None
+    if all(job_id in available for job_id in job_ids):
+        return [available[job_id] for job_id in job_ids]
+    return list(available.values())[:expected]
+
+
+def _available_result(result: Any) -> Optional[Dict[str, Any]]:
+    """Return the first result item once its blob is available, else None."""
+    if isinstance(result, dict):
+        result = [result]
+    if result and isinstance(result, list):
+        result_item = result[0]
+        if result_item.get("available") and result_item.get("blobUrl"):
+            return result_item
+    return None
@@ -0,0 +1,321 @@
+"""Lightweight Prometheus-format metrics for the generation pipeline."""
+
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; generation phases range from milliseconds (submit) to minutes (poll)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class Metric:
+    """A named metric family with optional labels."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, Tuple[str, ...], float]]:
+        """Yield (sample name, label values, value) triples."""
+        return iter(())
+
+    def render(self) -> List[str]:
+        """Render the family in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, values, value in self.samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, key, value
+
+
+class Gauge(Metric):
+    """Point-in-time value, either set directly or read from a function at scrape time."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        if self._function is not None:
+            yield self.name, (), float(self._function())
+            return
+        for key, value in self._values.items():
+            yield self.name, key, value
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block, whether or not it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self):
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", key + (_format_value(bound),), cumulative
+            yield f"{self.name}_sum", key, total
+            yield f"{self.name}_count", key, cumulative
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        bucket_labels = self.labelnames + ("le",)
+        for name, values, value in self.samples():
+            labelnames = bucket_labels if name.endswith("_bucket") else self.labelnames
+            lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every family in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class PipelineMetrics(MetricsRegistry):
+    """
+    Metrics for one CivitaiService instance.
+
+    Recording is a dict update on the event loop thread, so instrumentation
+    costs well under a microsecond per call; gauges that mirror existing
+    state are read from callbacks only when scraped.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.phase_seconds = self.histogram(
+            "civitai_phase_duration_seconds",
+            "Time spent in each generation phase (queue, submit, poll, download).",
+            ["phase"],
+        )
+        self.generation_seconds = self.histogram(
+            "civitai_generation_duration_seconds",
+            "End-to-end generate-and-download latency by cache outcome.",
+            ["cache"],
+        )
+        self.generations = self.counter(
+            "civitai_generations_total",
+            "Completed generate-and-download calls by cache outcome.",
+            ["cache"],
+        )
+        self.poll_requests = self.counter(
+            "civitai_poll_requests_total",
+            "Job status requests sent upstream.",
+        )
+        self.upstream_errors = self.counter(
+            "civitai_upstream_errors_total",
+            "Failed upstream calls by operation and error type.",
+            ["operation", "type"],
+        )
+        self.upstream_retries = self.counter(
+            "civitai_upstream_retries_total",
+            "Retried upstream calls by operation and error type.",
+            ["operation", "type"],
+        )
+        self.circuit_open = self.gauge(
+            "civitai_circuit_open",
+            "Whether an upstream circuit breaker is open or half-open (1) or closed (0).",
+            ["upstream"],
+        )
+        self.key_submissions = self.counter(
+            "civitai_key_submissions_total",
+            "Accepted submissions by API key.",
+            ["key"],
+        )
+        self.key_cost = self.counter(
+            "civitai_key_cost_total",
+            "Buzz cost of accepted jobs by API key.",
+            ["key"],
+        )
+        self.key_rate_limited = self.counter(
+            "civitai_key_rate_limited_total",
+            "Rate-limited (429) upstream responses by API key.",
+            ["key"],
+        )
+        self.downloaded_bytes = self.counter(
+            "civitai_downloaded_bytes_total",
+            "Image bytes downloaded from blob storage.",
+        )
+
+    @contextmanager
+    def phase(self, phase: str, operation: Optional[str] = None) -> Iterator[None]:
+        """
+        Time a pipeline phase and count the error type if it raises.
+
+        Args:
+            phase: Phase label for the duration histogram
+            operation: Operation label for upstream errors (defaults to phase)
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.upstream_errors.inc(operation=operation or phase, type=type(e).__name__)
+            raise
+        finally:
+            self.phase_seconds.observe(time.perf_counter() - started, phase=phase)
+
+
+async def start_metrics_server(registry: MetricsRegistry, host: str, port: int):
+    """
+    Serve a registry at /metrics on its own port.
+
+    Used by processes without an HTTP app of their own, such as the stdio MCP server.
+
+    Returns:
+        The aiohttp AppRunner; call its cleanup() to stop serving
+    """
+    from aiohttp import web
+
+    async def handle(request: "web.Request") -> "web.Response":
+        return web.Response(
+            body=registry.render().encode(), headers={"Content-Type": CONTENT_TYPE}
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
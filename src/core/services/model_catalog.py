@@ -0,0 +1,398 @@
+"""Cached catalog of Civitai models for URN validation and search."""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from src.core.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+URN_PATTERN = re.compile(
+    r"^urn:air:(?P<ecosystem>[a-z0-9]+):(?P<type>[a-z0-9]+):(?P<source>[a-z0-9]+):"
+    r"(?P<model_id>[a-zA-Z0-9_-]+)(?:@(?P<version_id>[a-zA-Z0-9_-]+))?$"
+)
+
+VALIDATION_MODES = ("off", "syntax", "catalog")
+
+# Civitai base model names mapped to AIR ecosystems
+ECOSYSTEMS = {
+    "sd 1": "sd1",
+    "sd 2": "sd2",
+    "sd 3": "sd3",
+    "sdxl": "sdxl",
+    "pony": "sdxl",
+    "illustrious": "sdxl",
+    "noobai": "sdxl",
+    "flux.1": "flux1",
+}
+
+# Civitai model types mapped to AIR types
+TYPES = {
+    "checkpoint": "checkpoint",
+    "lora": "lora",
+    "locon": "lycoris",
+    "dora": "lora",
+    "textualinversion": "embedding",
+    "vae": "vae",
+}
+
+
+@dataclass
+class ModelEntry:
+    """One model version in the catalog."""
+
+    urn: str
+    name: str
+    version: str
+    model_id: str
+    version_id: str
+    base_model: str
+    type: str
+    # Whether urn is the API's own air field rather than one guessed from the base model
+    authoritative: bool = False
+
+
+def parse_urn(urn: str) -> Dict[str, Optional[str]]:
+    """
+    Split an AIR URN into its parts.
+
+    Raises:
+        ValueError: If the string is not a model URN
+    """
+    match = URN_PATTERN.match(urn.strip())
+    if match is None:
+        raise ValueError(
+            f"Invalid model URN '{urn}'. Expected urn:air:<ecosystem>:<type>:civitai:"
+            "<model id>@<version id>, e.g. urn:air:sd1:checkpoint:civitai:4384@128713"
+        )
+    return match.groupdict()
+
+
+def _ecosystem(base_model: str) -> str:
+    lowered = base_model.lower()
+    for prefix, ecosystem in ECOSYSTEMS.items():
+        if lowered.startswith(prefix):
+            return ecosystem
+    return re.sub(r"[^a-z0-9]", "", lowered) or "unknown"
+
+
+def entries_from_model(model: Dict[str, Any]) -> List[ModelEntry]:
+    """Catalog entries for every version of a model from the Civitai REST API."""
+    model_type = str(model.get("type") or "")
+    air_type = TYPES.get(model_type.lower(), model_type.lower())
+    entries = []
+    for version in model.get("modelVersions") or []:
+        base_model = str(version.get("baseModel") or "")
+        air = version.get("air")
+        urn = air or (
+            f"urn:air:{_ecosystem(base_model)}:{air_type}:civitai:{model['id']}@{version['id']}"
+        )
+        entries.append(ModelEntry(
+            urn=urn,
+            name=str(model.get("name") or ""),
+            version=str(version.get("name") or ""),
+            model_id=str(model["id"]),
+            version_id=str(version["id"]),
+            base_model=base_model,
+            type=model_type,
+            authoritative=bool(air),
+        ))
+    return entries
+
+
+def _words(text: str) -> Set[str]:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+class ModelCatalog:
+    """
+    Locally cached, indexed catalog of popular models.
+
+    The catalog is fetched from the Civitai REST API (the most downloaded
+    models, a few pages deep), indexed by URN, version id, name words, base
+    model and type, and optionally persisted to disk so a restart starts warm.
+    Nothing is fetched until the catalog is first used. Reads never wait on the
+    network once the catalog has loaded: a stale catalog is served while a
+    background refresh replaces it.
+
+    Validation is answered from the index. A well-formed URN that is not in
+    the catalog is looked up once by version id; the answer is cached, so a
+    bad URN costs one lookup and is then rejected without any network call.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://civitai.com/api/v1",
+        path: str = "",
+        refresh_interval: float = 6 * 3600,
+        pages: int = 5,
+        mode: str = "catalog",
+    ):
+        """
+        Initialize the catalog.
+
+        Args:
+            base_url: Civitai REST API root
+            path: JSON file to persist the catalog in (empty keeps it in memory)
+            refresh_interval: Seconds before the catalog is considered stale
+            pages: Pages of 100 models fetched per refresh
+            mode: "off" skips validation, "syntax" only checks the URN format,
+                "catalog" also checks it against the catalog
+        """
+        if mode not in VALIDATION_MODES:
+            raise ValueError(
+                f"Unknown model validation mode '{mode}'. Choose from: {', '.join(VALIDATION_MODES)}"
+            )
+        self.base_url = base_url.rstrip("/")
+        self.path = Path(path) if path else None
+        self.refresh_interval = refresh_interval
+        self.pages = pages
+        self.mode = mode
+        self.fetched_at = 0.0
+        self._entries: List[ModelEntry] = []
+        self._by_urn: Dict[str, ModelEntry] = {}
+        self._by_version: Dict[str, ModelEntry] = {}
+        self._by_word: Dict[str, Set[int]] = {}
+        self._by_base: Dict[str, Set[int]] = {}
+        self._by_type: Dict[str, Set[int]] = {}
+        self._missing: Set[str] = set()
+        self._session = None
+        self._refreshing: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ModelCatalog":
+        """Create a catalog configured from settings."""
+        return cls(
+            base_url=settings.model_catalog_url,
+            path=settings.model_catalog_path,
+            refresh_interval=settings.model_catalog_refresh,
+            pages=settings.model_catalog_pages,
+            mode=settings.model_validation,
+        )
+
+    @property
+    def loaded(self) -> bool:
+        """Whether a catalog has been fetched or read from disk."""
+        return self.fetched_at > 0
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.fetched_at > self.refresh_interval
+
+    def _index(self, entries: List[ModelEntry], fetched_at: float) -> None:
+        """Replace the catalog and rebuild every index."""
+        by_word: Dict[str, Set[int]] = {}
+        by_base: Dict[str, Set[int]] = {}
+        by_type: Dict[str, Set[int]] = {}
+        for position, entry in enumerate(entries):
+            for word in _words(f"{entry.name} {entry.version}"):
+                by_word.setdefault(word, set()).add(position)
+            by_base.setdefault(entry.base_model.lower(), set()).add(position)
+            by_type.setdefault(entry.type.lower(), set()).add(position)
+        self._entries = entries
+        self._by_urn = {entry.urn: entry for entry in entries}
+        self._by_version = {entry.version_id: entry for entry in entries}
+        self._by_word, self._by_base, self._by_type = by_word, by_base, by_type
+        self.fetched_at = fetched_at
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        return self._session
+
+    async def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """GET a JSON document, returning None for 404."""
+        async with self._get_session().get(url, params=params) as response:
+            if response.status == 404:
+                return None
+            response.raise_for_status()
+            return await response.json()
+
+    async def fetch(self) -> List[ModelEntry]:
+        """Fetch the most downloaded models from the Civitai REST API."""
+        entries: List[ModelEntry] = []
+        url: Optional[str] = f"{self.base_url}/models"
+        params: Optional[Dict[str, Any]] = {"limit": 100, "sort": "Most Downloaded"}
+        for _ in range(self.pages):
+            if url is None:
+                break
+            page = await self._get_json(url, params) or {}
+            for model in page.get("items", []):
+                entries.extend(entries_from_model(model))
+            # Later pages are addressed by the absolute nextPage URL
+            url, params = (page.get("metadata") or {}).get("nextPage"), None
+        return entries
+
+    async def refresh(self) -> None:
+        """Fetch the catalog, index it and persist it if a path is configured."""
+        entries = await self.fetch()
+        now = time.time()
+        self._index(entries, now)
+        self._missing.clear()
+        if self.path is not None:
+            await asyncio.to_thread(self._save, entries, now)
+
+    def _save(self, entries: List[ModelEntry], fetched_at: float) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(json.dumps({
+            "fetched_at": fetched_at,
+            "entries": [asdict(entry) for entry in entries],
+        }))
+        temp.replace(self.path)
+
+    def _read(self) -> None:
+        """Load the persisted catalog, if any."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+            self._index([ModelEntry(**entry) for entry in data["entries"]], data["fetched_at"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring unreadable model catalog %s", self.path, exc_info=True)
+
+    def _revalidate(self) -> None:
+        """Load or refresh in the background unless that is already running."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._refresh_logged())
+
+    async def _refresh_logged(self) -> None:
+        try:
+            if not self.loaded:
+                await asyncio.to_thread(self._read)
+            if self.stale:
+                await self.refresh()
+        except Exception:
+            logger.warning("Model catalog refresh failed; serving the cached catalog", exc_info=True)
+
+    async def start(self) -> None:
+        """
+        Load the persisted catalog, if any, without touching the network.
+
+        The catalog is fetched by the first search or validation and
+        refreshed in the background when a later one finds it stale.
+        """
+        await asyncio.to_thread(self._read)
+
+    async def entries(self) -> List[ModelEntry]:
+        """
+        Every catalog entry, fetching on first use and revalidating when stale.
+
+        Only the very first call waits for the network; later calls return
+        the cached catalog immediately.
+        """
+        if not self.loaded:
+            await asyncio.to_thread(self._read)
+        if not self.loaded:
+            await self.refresh()
+        elif self.stale:
+            self._revalidate()
+        return self._entries
+
+    async def search(
+        self,
+        query: str = "",
+        base_model: str = "",
+        model_type: str = "",
+        limit: int = 20,
+    ) -> List[ModelEntry]:
+        """
+        Find models by name words, base model and type, most downloaded first.
+
+        Args:
+            query: Words that must all appear in the model or version name
+            base_model: Exact base model, e.g. "SDXL 1.0" (case-insensitive)
+            model_type: Exact model type, e.g. "Checkpoint" (case-insensitive)
+            limit: Maximum results
+        """
+        entries = await self.entries()
+        candidates: Optional[Set[int]] = None
+        filters = [self._by_word.get(word, set()) for word in _words(query)]
+        if base_model:
+            filters.append(self._by_base.get(base_model.lower(), set()))
+        if model_type:
+            filters.append(self._by_type.get(model_type.lower(), set()))
+        for positions in sorted(filters, key=len):
+            candidates = positions if candidates is None else candidates & positions
+        if candidates is None:
+            return entries[:limit]
+        return [entries[position] for position in sorted(candidates)[:limit]]
+
+    async def validate(self, urn: str) -> None:
+        """
+        Reject a model URN that is malformed or not a known model.
+
+        Known URNs are answered from memory. Until the catalog has loaded
+        (the first validation starts loading it) only the format is checked;
+        lookup failures let the request through rather
+        than blocking generation on the catalog API. The whole URN must match
+        only when the API gave the version's URN; a URN the catalog guessed
+        from the base model is matched on model and version ids.
+
+        Raises:
+            ValueError: With a suggestion when the version is known under another URN
+        """
+        if self.mode == "off":
+            return
+        parts = parse_urn(urn)
+        if self.mode == "syntax":
+            return
+        if self.stale:
+            # The first validation starts the initial fetch, later ones refresh
+            self._revalidate()
+        if not self.loaded or urn in self._by_urn:
+            return
+
+        version_id = parts["version_id"]
+        if version_id is None:
+            return
+        known = self._by_version.get(version_id)
+        if known is None and version_id not in self._missing:
+            try:
+                known = await self._lookup(version_id)
+            except Exception:
+                logger.warning("Model version lookup for %s failed", version_id, exc_info=True)
+                return
+        if known is None:
+            raise ValueError(f"Unknown model '{urn}': no model version {version_id} on Civitai")
+        if known.authoritative and known.urn != urn:
+            raise ValueError(f"Model version {version_id} is '{known.urn}', not '{urn}'")
+        if known.model_id != parts["model_id"]:
+            raise ValueError(
+                f"Model version {version_id} belongs to model {known.model_id} "
+                f"({known.name}), not {parts['model_id']}"
+            )
+
+    async def _lookup(self, version_id: str) -> Optional[ModelEntry]:
+        """Look up one version outside the catalog, caching a miss."""
+        version = await self._get_json(f"{self.base_url}/model-versions/{version_id}")
+        if version is None:
+            self._missing.add(version_id)
+            return None
+        model = {**(version.get("model") or {}), "id": version.get("modelId"),
+                 "modelVersions": [version]}
+        [entry] = entries_from_model(model)
+        self._by_urn[entry.urn] = entry
+        self._by_version[version_id] = entry
+        return entry
+
+    async def close(self) -> None:
+        """Stop a background refresh and close the HTTP session."""
+        if self._refreshing is not None:
+            self._refreshing.cancel()
+            try:
+                await self._refreshing
+            except asyncio.CancelledError:
+                pass
+        self._refreshing = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
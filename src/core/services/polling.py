@@ -0,0 +1,185 @@
+"""Polling strategies for the shared job tracker."""
+
+import random
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from src.core.config.settings import Settings
+
+
+@dataclass
+class PollingStats:
+    """Latency and request counters for one polling strategy."""
+
+    jobs: int = 0
+    polls: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    def record(self, latency: float, polls: int) -> None:
+        """Record a completed token."""
+        self.jobs += 1
+        self.polls += polls
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summarize the counters."""
+        return {
+            "jobs": self.jobs,
+            "polls": self.polls,
+            "polls_per_job": self.polls / self.jobs if self.jobs else 0.0,
+            "avg_latency": self.total_latency / self.jobs if self.jobs else 0.0,
+            "max_latency": self.max_latency,
+        }
+
+
+class PollingStrategy(ABC):
+    """Decides when the tracker polls a token next."""
+
+    name: str
+
+    def __init__(self):
+        self.stats = PollingStats()
+
+    @abstractmethod
+    def first_delay(self) -> float:
+        """Delay between submission and the first status poll."""
+
+    @abstractmethod
+    def next_delay(self, attempt: int, status: Dict[str, Any]) -> float:
+        """
+        Delay before the next poll after an incomplete status.
+
+        Args:
+            attempt: Number of polls made so far for the token (1-based)
+            status: The status response from the latest poll
+        """
+
+
+class FixedPolling(PollingStrategy):
+    """Poll at a constant interval, starting immediately."""
+
+    name = "fixed"
+
+    def __init__(self, interval: float = 3.0):
+        super().__init__()
+        self.interval = interval
+
+    def first_delay(self) -> float:
+        return 0.0
+
+    def next_delay(self, attempt: int, status: Dict[str, Any]) -> float:
+        return self.interval
+
+
+class BackoffPolling(PollingStrategy):
+    """Poll aggressively at first, then back off exponentially with jitter."""
+
+    name = "backoff"
+
+    def __init__(
+        self,
+        initial_interval: float = 0.5,
+        max_interval: float = 10.0,
+        factor: float = 1.5,
+        jitter: float = 0.1,
+    ):
+        super().__init__()
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+
+    def first_delay(self) -> float:
+        return self._jittered(self.initial_interval)
+
+    def next_delay(self, attempt: int, status: Dict[str, Any]) -> float:
+        delay = self.initial_interval * self.factor ** attempt
+        return self._jittered(min(delay, self.max_interval))
+
+    def _jittered(self, delay: float) -> float:
+        """Spread delays by +/- jitter so tokens don't poll in lockstep."""
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class AdaptivePolling(BackoffPolling):
+    """Back off exponentially, but wake up around the upstream ETA when one is reported."""
+
+    name = "adaptive"
+
+    def next_delay(self, attempt: int, status: Dict[str, Any]) -> float:
+        eta = estimate_remaining(status)
+        if eta is None:
+            return super().next_delay(attempt, status)
+        delay = min(max(eta, self.initial_interval), self.max_interval)
+        return self._jittered(delay)
+
+
+def build_strategies(settings: Settings) -> Dict[str, PollingStrategy]:
+    """Create one instance of every strategy configured from settings."""
+    backoff_args = dict(
+        initial_interval=settings.poll_initial_interval,
+        max_interval=settings.poll_max_interval,
+        factor=settings.poll_backoff_factor,
+        jitter=settings.poll_jitter,
+    )
+    strategies = [
+        FixedPolling(settings.poll_interval),
+        BackoffPolling(**backoff_args),
+        AdaptivePolling(**backoff_args),
+    ]
+    return {strategy.name: strategy for strategy in strategies}
+
+
+def estimate_remaining(status: Dict[str, Any]) -> Optional[float]:
+    """
+    Estimate seconds until the soonest pending job starts, from queue-position fields.
+
+    Looks at serviceProviders.*.queuePosition on each job, which carries either an
+    estimatedStartDuration (TimeSpan dict or "hh:mm:ss" string) or an
+    estimatedStartDate timestamp. Returns None when no estimate is reported.
+    """
+    estimates = []
+    for job in status.get("jobs") or []:
+        providers = job.get("serviceProviders") or {}
+        for provider in providers.values():
+            position = (provider or {}).get("queuePosition") or {}
+            seconds = _duration_seconds(position.get("estimatedStartDuration"))
+            if seconds is None:
+                seconds = _seconds_until(position.get("estimatedStartDate"))
+            if seconds is not None:
+                estimates.append(max(seconds, 0.0))
+    return min(estimates) if estimates else None
+
+
+def _duration_seconds(duration: Any) -> Optional[float]:
+    """Convert a TimeSpan dict or "[d.]hh:mm:ss[.fff]" string to seconds."""
+    if isinstance(duration, dict):
+        return duration.get("totalSeconds")
+    if isinstance(duration, str):
+        days = 0
+        try:
+            if "." in duration.split(":")[0]:
+                day_part, duration = duration.split(".", 1)
+                days = int(day_part)
+            hours, minutes, seconds = duration.split(":")
+            return days * 86400 + int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        except ValueError:
+            return None
+    return None
+
+
+def _seconds_until(timestamp: Any) -> Optional[float]:
+    """Seconds from now until an ISO-8601 timestamp."""
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - datetime.now(timezone.utc)).total_seconds()
@@ -0,0 +1,70 @@
+"""Progress events for generation status transitions."""
+
+import time
+from typing import Any, Dict, List, Optional
+
+# Ordered happy-path statuses; "failed" can follow any of them
+PROGRESS_STEPS = ["queued", "processing", "available", "downloaded"]
+
+
+class PhaseTimer:
+    """
+    Turn status transitions into progress events with per-phase timing.
+
+    Each event records when the transition happened, the total time elapsed
+    since the first event, and how long the job spent in the previous phase.
+    """
+
+    def __init__(
+        self,
+        job_id: Optional[str] = None,
+        started: Optional[float] = None,
+        events: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """
+        Initialize the timer.
+
+        Args:
+            job_id: Job the events belong to
+            started: Start time for elapsed durations (defaults to now)
+            events: Existing event history to continue; appended to in place
+        """
+        self.job_id = job_id
+        self.started = started if started is not None else time.time()
+        self.events = events if events is not None else []
+
+    def transition(self, status: str, **details: Any) -> Dict[str, Any]:
+        """
+        Record a transition and return its event.
+
+        Details are added to the event, except any that would replace the
+        timer's own fields (e.g. an upstream result's job_id).
+        """
+        now = time.time()
+        previous = self.events[-1] if self.events else None
+        event = {
+            **details,
+            "job_id": self.job_id,
+            "status": status,
+            "timestamp": now,
+            "elapsed": now - self.started,
+            "phase": previous["status"] if previous else None,
+            "phase_duration": now - previous["timestamp"] if previous else 0.0,
+        }
+        self.events.append(event)
+        return event
+
+
+def progress_step(status: str) -> int:
+    """Position of a status in PROGRESS_STEPS (final for unknown/failed statuses)."""
+    if status in PROGRESS_STEPS:
+        return PROGRESS_STEPS.index(status)
+    return len(PROGRESS_STEPS) - 1
+
+
+def describe(event: Dict[str, Any]) -> str:
+    """Human-readable progress message for an event."""
+    message = event["status"]
+    if event.get("phase"):
+        message += f" ({event['phase']} took {event['phase_duration']:.1f}s)"
+    return message
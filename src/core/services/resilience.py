@@ -0,0 +1,316 @@
+"""Retries, circuit breaking and error classification for upstream calls."""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from src.core.config.settings import Settings
+
+
+class UpstreamError(Exception):
+    """
+    An upstream call failed.
+
+    Attributes:
+        status_code: HTTP status the API should answer with
+        retryable: Whether repeating the call may succeed
+        request_sent: False when upstream provably never accepted the request,
+            so even a non-idempotent call (a paid submission) is safe to repeat
+        retry_after: Seconds the caller should wait before retrying, if known
+    """
+
+    status_code = 502
+    retryable = False
+
+    def __init__(
+        self,
+        message: str,
+        operation: str = "",
+        retry_after: Optional[float] = None,
+        request_sent: bool = True,
+    ):
+        super().__init__(message)
+        self.operation = operation
+        self.retry_after = retry_after
+        self.request_sent = request_sent
+
+
+class UpstreamRejected(UpstreamError):
+    """Upstream refused the request as invalid; retrying will not help."""
+
+    status_code = 400
+
+
+class UpstreamRateLimited(UpstreamError):
+    """Upstream answered 429; the request was not accepted."""
+
+    status_code = 429
+    retryable = True
+
+    def __init__(self, message: str, operation: str = "", retry_after: Optional[float] = None):
+        super().__init__(message, operation, retry_after, request_sent=False)
+
+
+class UpstreamUnavailable(UpstreamError):
+    """Upstream answered 5xx or could not be reached."""
+
+    status_code = 503
+    retryable = True
+
+
+class UpstreamTimeout(UpstreamError):
+    """A single upstream call timed out."""
+
+    status_code = 504
+    retryable = True
+
+
+class CircuitOpen(UpstreamError):
+    """Calls are short-circuited while upstream is degraded."""
+
+    status_code = 503
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"Upstream {name} is unavailable; failing fast", name, retry_after, request_sent=False
+        )
+
+
+def status_error(
+    status: int, operation: str, retry_after: Optional[str] = None
+) -> UpstreamError:
+    """Build the typed error for an unsuccessful HTTP status."""
+    message = f"Upstream {operation} failed: HTTP {status}"
+    if status == 429:
+        return UpstreamRateLimited(message, operation, _parse_retry_after(retry_after))
+    if status in (408, 504):
+        return UpstreamTimeout(message, operation)
+    if status >= 500:
+        return UpstreamUnavailable(message, operation, _parse_retry_after(retry_after))
+    if status in (400, 422):
+        return UpstreamRejected(message, operation)
+    return UpstreamError(message, operation)
+
+
+def classify(error: BaseException, operation: str) -> UpstreamError:
+    """Map an SDK, aiohttp or httpx exception to a typed upstream error."""
+    if isinstance(error, UpstreamError):
+        return error
+
+    # The SDK raises its own HTTPException with status_code; aiohttp uses status
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if isinstance(status, int):
+        headers = getattr(error, "headers", None) or {}
+        return status_error(status, operation, headers.get("Retry-After"))
+
+    if isinstance(error, asyncio.TimeoutError):
+        return UpstreamTimeout(f"Upstream {operation} timed out", operation)
+
+    import aiohttp
+    import httpx
+
+    if isinstance(error, (httpx.TimeoutException, aiohttp.ServerTimeoutError)):
+        return UpstreamTimeout(f"Upstream {operation} timed out", operation)
+    if isinstance(error, (httpx.ConnectError, aiohttp.ClientConnectorError)):
+        # The connection was never established, so nothing reached upstream
+        return UpstreamUnavailable(
+            f"Could not connect for {operation}: {error}", operation, request_sent=False
+        )
+    if isinstance(error, (httpx.TransportError, aiohttp.ClientError)):
+        return UpstreamUnavailable(f"Upstream {operation} failed: {error}", operation)
+    return UpstreamError(f"Upstream {operation} failed: {error}", operation)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while an upstream is degraded.
+
+    After failure_threshold consecutive availability failures (5xx, timeouts,
+    connection errors) the circuit opens and calls raise CircuitOpen without
+    touching upstream. After reset_timeout one probe call is let through;
+    its success closes the circuit and its failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        on_state_change: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_state_change = on_state_change
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        """Raise CircuitOpen unless a call may go ahead."""
+        if self.state == self.CLOSED or self.failure_threshold <= 0:
+            return
+        remaining = self._opened_at + self.reset_timeout - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        raise CircuitOpen(self.name, max(remaining, 1.0))
+
+    def record_cancelled(self) -> None:
+        """Free the probe slot if a half-open probe was cancelled."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self, error: UpstreamError) -> None:
+        # Rejections and rate limits say nothing about upstream health
+        if not isinstance(error, (UpstreamUnavailable, UpstreamTimeout)):
+            if self._probing:
+                self.record_success()
+            return
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold > 0:
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        if self.on_state_change is not None:
+            self.on_state_change(self.name, state)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, bounded by a retry budget.
+
+    Only retryable errors are retried, and non-idempotent calls only when the
+    request never reached upstream. The budget earns budget_ratio retries per
+    call (capped at budget_cap), so when upstream degrades retries stop at a
+    fraction of normal traffic instead of multiplying it.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 5.0,
+        budget_ratio: float = 0.2,
+        budget_cap: float = 10.0,
+        on_retry: Optional[Callable[[UpstreamError], None]] = None,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_cap = budget_cap
+        self.on_retry = on_retry
+        self._budget = budget_cap
+
+    @classmethod
+    def from_settings(cls, settings: Settings, **kwargs: Any) -> "RetryPolicy":
+        """Create a policy configured from settings."""
+        return cls(
+            attempts=settings.retry_attempts,
+            base_delay=settings.retry_base_delay,
+            max_delay=settings.retry_max_delay,
+            budget_ratio=settings.retry_budget_ratio,
+            **kwargs,
+        )
+
+    def record_call(self) -> None:
+        """Earn retry budget for a first attempt."""
+        self._budget = min(self.budget_cap, self._budget + self.budget_ratio)
+
+    def should_retry(self, error: UpstreamError, attempt: int, idempotent: bool) -> bool:
+        """
+        Decide whether to retry after a failed attempt, spending budget if so.
+
+        Args:
+            error: The classified failure
+            attempt: Number of attempts made so far (1 after the first failure)
+            idempotent: Whether repeating a call that reached upstream is safe
+        """
+        if attempt >= self.attempts or not error.retryable:
+            return False
+        if not idempotent and error.request_sent:
+            return False
+        if self._budget < 1:
+            return False
+        self._budget -= 1
+        if self.on_retry is not None:
+            self.on_retry(error)
+        return True
+
+    def delay(self, attempt: int, error: Optional[UpstreamError] = None) -> float:
+        """Seconds to wait before the next attempt, honouring Retry-After."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if error is not None and error.retry_after:
+            return min(max(backoff, error.retry_after), self.max_delay)
+        return backoff
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        operation: str,
+        breaker: CircuitBreaker,
+        idempotent: bool,
+    ) -> Any:
+        """
+        Call fn through the circuit breaker, retrying per this policy.
+
+        Raises:
+            UpstreamError: Typed failure of the last attempt, or CircuitOpen
+        """
+        self.record_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await guarded(fn, operation, breaker)
+            except UpstreamError as error:
+                if not self.should_retry(error, attempt, idempotent):
+                    raise
+                await asyncio.sleep(self.delay(attempt, error))
+
+
+async def guarded(
+    fn: Callable[[], Awaitable[Any]], operation: str, breaker: CircuitBreaker
+) -> Any:
+    """Make one call through a circuit breaker, raising typed upstream errors."""
+    breaker.before_call()
+    try:
+        result = await fn()
+    except (asyncio.CancelledError, ValueError, TypeError):
+        # Cancellation and local validation errors (e.g. the SDK input schema)
+        # say nothing about upstream health
+        breaker.record_cancelled()
+        raise
+    except Exception as e:
+        error = classify(e, operation)
+        breaker.record_failure(error)
+        if error is e:
+            raise
+        raise error from e
+    breaker.record_success()
+    return result
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a delta-seconds Retry-After header."""
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
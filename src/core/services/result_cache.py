@@ -0,0 +1,270 @@
+"""Content-addressed cache of generated images for deterministic requests."""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.core.config.settings import Settings
+from src.core.services.coordination import CoordinationBackend
+
+# Bump to invalidate every cached entry when the key derivation changes
+CACHE_KEY_VERSION = 1
+
+
+def cache_key(input_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Hash the upstream generation input into a cache key.
+
+    Only seeded requests are deterministic, so requests without a seed (or with
+    a negative "random" seed) are not cacheable and return None.
+
+    Args:
+        input_data: Civitai API input built from the request
+
+    Returns:
+        Hex digest identifying the generation, or None if not cacheable
+    """
+    seed = input_data.get("params", {}).get("seed")
+    if seed is None or seed < 0:
+        return None
+    canonical = json.dumps(
+        {"v": CACHE_KEY_VERSION, "input": input_data},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters."""
+
+    memory_hits: int = 0
+    shared_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+
+class ResultCache:
+    """
+    Tiered result cache: an in-memory LRU in front of an on-disk store.
+
+    The memory tier is bounded by entry count and total bytes. The disk tier
+    keeps each entry as an image file plus a JSON metadata sidecar, expires
+    entries after a TTL and evicts least recently used entries once the byte
+    budget is exceeded. Disk I/O runs in worker threads.
+
+    Given a shared coordination backend, entries are also published there
+    (expiring after the same TTL) and looked up between the memory and disk
+    tiers, so a result generated by one worker is a hit on every other.
+    """
+
+    def __init__(
+        self,
+        memory_items: int = 128,
+        memory_bytes: int = 256 * 1024 * 1024,
+        directory: Optional[str] = None,
+        ttl: float = 86400,
+        disk_bytes: int = 2 * 1024 * 1024 * 1024,
+        shared: Optional[CoordinationBackend] = None,
+    ):
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self.directory = Path(directory) if directory else None
+        self.ttl = ttl
+        self.disk_bytes = disk_bytes
+        self.shared = shared
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._memory_size = 0
+        self._disk_index: Optional["OrderedDict[str, tuple[float, int]]"] = None
+        self._disk_lock = asyncio.Lock()
+
+    @classmethod
+    def from_settings(
+        cls, settings: Settings, shared: Optional[CoordinationBackend] = None
+    ) -> "ResultCache":
+        """Create a cache configured from settings, optionally shared through a backend."""
+        return cls(
+            memory_items=settings.result_cache_memory_items,
+            memory_bytes=settings.result_cache_memory_bytes,
+            directory=settings.result_cache_dir or None,
+            ttl=settings.result_cache_ttl,
+            disk_bytes=settings.result_cache_disk_bytes,
+            shared=shared,
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached result, promoting disk hits into memory."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            stored_at, result = entry
+            if time.time() - stored_at <= self.ttl:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return dict(result)
+            self._evict_memory(key)
+
+        published = await self.get_shared(key)
+        if published is not None:
+            self._memory_put(key, published, time.time())
+            self.stats.shared_hits += 1
+            return dict(published)
+
+        if self.directory is not None:
+            async with self._disk_lock:
+                loaded = await asyncio.to_thread(self._disk_get, key)
+            if loaded is not None:
+                stored_at, result = loaded
+                self._memory_put(key, result, stored_at)
+                self.stats.disk_hits += 1
+                return dict(result)
+
+        self.stats.misses += 1
+        return None
+
+    async def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result containing image_data bytes and metadata."""
+        stored_at = time.time()
+        self._memory_put(key, result, stored_at)
+        if self.shared is not None:
+            await self.shared.set(f"result:{key}", _pack(result), ttl=self.ttl)
+        if self.directory is not None:
+            async with self._disk_lock:
+                await asyncio.to_thread(self._disk_put, key, result, stored_at)
+
+    async def get_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a result published by any worker, without touching the local tiers."""
+        if self.shared is None:
+            return None
+        packed = await self.shared.get(f"result:{key}")
+        return _unpack(packed) if packed is not None else None
+
+    # Memory tier
+
+    def _memory_put(self, key: str, result: Dict[str, Any], stored_at: float) -> None:
+        size = len(result["image_data"])
+        if size > self.memory_bytes:
+            return
+        self._evict_memory(key)
+        self._memory[key] = (stored_at, dict(result))
+        self._memory_size += size
+        while len(self._memory) > self.memory_items or self._memory_size > self.memory_bytes:
+            self._evict_memory(next(iter(self._memory)))
+
+    def _evict_memory(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_size -= len(entry[1]["image_data"])
+
+    # Disk tier (called from worker threads while holding the disk lock)
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.img", self.directory / f"{key}.json"
+
+    def _load_index(self) -> "OrderedDict[str, tuple[float, int]]":
+        """Scan the cache directory once, ordering entries by last access."""
+        if self._disk_index is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for meta_path in self.directory.glob("*.json"):
+                image_path = meta_path.with_suffix(".img")
+                try:
+                    meta = json.loads(meta_path.read_text())
+                    entries.append((
+                        image_path.stat().st_atime,
+                        meta_path.stem,
+                        meta["stored_at"],
+                        meta["size"],
+                    ))
+                except (OSError, ValueError, KeyError):
+                    self._unlink(meta_path.stem)
+            entries.sort()
+            self._disk_index = OrderedDict(
+                (key, (stored_at, size)) for _, key, stored_at, size in entries
+            )
+        return self._disk_index
+
+    def _disk_get(self, key: str) -> Optional[tuple[float, Dict[str, Any]]]:
+        index = self._load_index()
+        if key not in index:
+            return None
+        stored_at, _ = index[key]
+        if time.time() - stored_at > self.ttl:
+            self._disk_remove(key)
+            return None
+
+        image_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text())
+            image_data = image_path.read_bytes()
+        except (OSError, ValueError):
+            self._disk_remove(key)
+            return None
+        os.utime(image_path)
+        index.move_to_end(key)
+        return stored_at, {**meta["result"], "image_data": image_data}
+
+    def _disk_put(self, key: str, result: Dict[str, Any], stored_at: float) -> None:
+        index = self._load_index()
+        image_data = result["image_data"]
+        if len(image_data) > self.disk_bytes:
+            return
+        metadata = {k: v for k, v in result.items() if k != "image_data"}
+        image_path, meta_path = self._paths(key)
+
+        # Write to temp files and rename so readers never see partial entries
+        for path, content in (
+            (image_path, image_data),
+            (meta_path, json.dumps({
+                "stored_at": stored_at,
+                "size": len(image_data),
+                "result": metadata,
+            }).encode()),
+        ):
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+
+        index.pop(key, None)
+        index[key] = (stored_at, len(image_data))
+        self._enforce_disk_budget()
+
+    def _enforce_disk_budget(self) -> None:
+        index = self._disk_index
+        now = time.time()
+        for key in [k for k, (stored_at, _) in index.items() if now - stored_at > self.ttl]:
+            self._disk_remove(key)
+        total = sum(size for _, size in index.values())
+        while index and total > self.disk_bytes:
+            key, (_, size) = next(iter(index.items()))
+            self._disk_remove(key)
+            total -= size
+
+    def _disk_remove(self, key: str) -> None:
+        self._disk_index.pop(key, None)
+        self._unlink(key)
+
+    def _unlink(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _pack(result: Dict[str, Any]) -> bytes:
+    """Serialize a result as its JSON metadata, a newline, then the image bytes."""
+    metadata = {k: v for k, v in result.items() if k != "image_data"}
+    return json.dumps(metadata).encode() + b"\n" + result["image_data"]
+
+
+def _unpack(packed: bytes) -> Dict[str, Any]:
+    metadata, _, image_data = packed.partition(b"\n")
+    return {**json.loads(metadata), "image_data": image_data}
@@ -0,0 +1,186 @@
+"""Coalescing of identical concurrent calls."""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from src.core.services.coordination import CoordinationBackend
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[..., Awaitable[None]]
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters for executed, coalesced and abandoned calls."""
+
+    executed: int = 0
+    coalesced: int = 0
+    cancelled: int = 0
+
+
+@dataclass
+class _Flight:
+    """One in-flight call, how many callers are waiting on it and their listeners."""
+
+    task: Optional[asyncio.Task] = None
+    waiters: int = 0
+    listeners: List[Listener] = field(default_factory=list)
+    # Everything published so far, replayed to callers that join late
+    events: List[tuple] = field(default_factory=list)
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time and share its outcome.
+
+    The first caller for a key starts the work in its own task; callers that
+    arrive while it runs await the same task instead of starting another. A
+    caller that is cancelled only stops waiting. The shared task is cancelled
+    once every caller has gone, so abandoned work does not keep running.
+
+    The running call can publish events (e.g. status transitions) to every
+    caller's listener; callers that join late first receive what was already
+    published.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.stats = SingleFlightStats()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._flights)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        listener: Optional[Listener] = None,
+    ) -> Any:
+        """
+        Run fn under key, or join the call already running under key.
+
+        Args:
+            key: Identity of the call; equal keys are coalesced
+            fn: Zero-argument coroutine function doing the work
+            listener: Awaited with each event the call publishes while this
+                caller waits
+
+        Returns:
+            The result of the shared call
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.ensure_future(fn())
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.stats.executed += 1
+        else:
+            self.stats.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            if listener is not None:
+                missed = list(flight.events)
+                flight.listeners.append(listener)
+                for event in missed:
+                    await self._notify(flight, listener, event)
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if listener in flight.listeners:
+                flight.listeners.remove(listener)
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self.stats.cancelled += 1
+
+    async def publish(self, key: Hashable, *event: Any) -> None:
+        """
+        Send an event from the call running under key to every waiting caller's listener.
+
+        A listener that fails is logged and dropped rather than failing the
+        shared call, which other callers still depend on.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            return
+        flight.events.append(event)
+        for listener in list(flight.listeners):
+            await self._notify(flight, listener, event)
+
+    @staticmethod
+    async def _notify(flight: _Flight, listener: Listener, event: tuple) -> None:
+        try:
+            await listener(*event)
+        except Exception:
+            logger.warning("Dropping a coalesced caller's failing listener", exc_info=True)
+            if listener in flight.listeners:
+                flight.listeners.remove(listener)
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        """Drop a finished call so the next caller starts fresh work."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+class SharedFlight:
+    """
+    Extend single-flight across workers sharing a coordination backend.
+
+    The worker that claims a key's lock runs the call; the others poll for the
+    result it publishes until the lock is released, and take over if none
+    appeared (the holder failed). The lock expires after ttl so a crashed
+    worker cannot hold a key forever.
+    """
+
+    def __init__(self, backend: CoordinationBackend, poll_interval: float = 0.25):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.stats = SingleFlightStats()
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Awaitable[Optional[Any]]],
+        ttl: float,
+    ) -> Any:
+        """
+        Run fn under key unless another worker is already running it.
+
+        Args:
+            key: Identity of the call across workers
+            fn: Zero-argument coroutine function doing the work; it must
+                publish its result where lookup finds it
+            lookup: Returns the published result, or None
+            ttl: Seconds before an unreleased lock expires
+
+        Returns:
+            The result of fn, or the one another worker published
+        """
+        lock = f"flight:{key}"
+        joined = False
+        while True:
+            if await self.backend.set(lock, b"1", ttl=ttl, only_if_absent=True):
+                self.stats.executed += 1
+                try:
+                    return await fn()
+                finally:
+                    await self.backend.delete(lock)
+
+            if not joined:
+                joined = True
+                self.stats.coalesced += 1
+            while await self.backend.get(lock) is not None:
+                result = await lookup()
+                if result is not None:
+                    return result
+                await asyncio.sleep(self.poll_interval)
+            result = await lookup()
+            if result is not None:
+                return result
@@ -0,0 +1,158 @@
+"""Parameter sweeps: a grid of generations over axes of request parameters."""
+
+import io
+import itertools
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.contracts.requests import GenerateImageRequest
+
+# Request fields that may be swept; the model stays fixed for a whole grid
+SWEEP_AXES = (
+    "prompt",
+    "negative_prompt",
+    "width",
+    "height",
+    "scheduler",
+    "steps",
+    "cfg_scale",
+    "seed",
+    "clip_skip",
+)
+
+
+@dataclass
+class SweepCell:
+    """One point of a sweep grid."""
+
+    index: int
+    params: Dict[str, Any]
+    request: GenerateImageRequest
+
+    @property
+    def seeded(self) -> bool:
+        """Whether the cell is deterministic (and so cacheable)."""
+        return self.request.seed is not None and self.request.seed >= 0
+
+
+@dataclass
+class SweepGroup:
+    """Cells answered by a single upstream submission."""
+
+    request: GenerateImageRequest
+    cells: List[SweepCell] = field(default_factory=list)
+
+    @property
+    def quantity(self) -> int:
+        """Images to request: one per cell for random seeds, otherwise one shared image."""
+        return 1 if self.cells[0].seeded else len(self.cells)
+
+
+def expand_sweep(
+    base: GenerateImageRequest, axes: Dict[str, Sequence[Any]], max_cells: int
+) -> List[SweepCell]:
+    """
+    Expand parameter axes over a base request into the cartesian product.
+
+    Cells are numbered in row-major order, with the last axis varying fastest.
+
+    Args:
+        base: Request supplying every parameter that is not swept
+        axes: Request field name to the values to try for it
+        max_cells: Largest grid allowed
+
+    Returns:
+        One cell per combination of axis values
+
+    Raises:
+        ValueError: For unknown or empty axes, or a grid larger than max_cells
+    """
+    for name, values in axes.items():
+        if name not in SWEEP_AXES:
+            raise ValueError(
+                f"Cannot sweep '{name}'. Choose from: {', '.join(SWEEP_AXES)}"
+            )
+        if isinstance(values, (str, bytes)) or not values:
+            raise ValueError(f"Axis '{name}' needs a non-empty list of values")
+    size = 1
+    for values in axes.values():
+        size *= len(values)
+    if size > max_cells:
+        raise ValueError(f"Sweep of {size} cells exceeds the limit of {max_cells}")
+
+    names = list(axes)
+    return [
+        SweepCell(index, dict(zip(names, values)), replace(base, **dict(zip(names, values))))
+        for index, values in enumerate(itertools.product(*axes.values()))
+    ]
+
+
+def plan_sweep(cells: List[SweepCell]) -> List[SweepGroup]:
+    """
+    Group cells so each distinct generation is submitted once.
+
+    Seeded cells with identical parameters are the same image and share one
+    job. Random-seed cells that only repeat each other (e.g. seed=[-1, -1, -1])
+    are submitted together as one job with a quantity, yielding that many
+    variations under a single token. Groups keep the order of their first cell.
+    """
+    groups: Dict[tuple, SweepGroup] = {}
+    for cell in cells:
+        key = tuple(sorted(asdict(cell.request).items()))
+        group = groups.setdefault(key, SweepGroup(cell.request))
+        group.cells.append(cell)
+    return list(groups.values())
+
+
+def cell_label(params: Dict[str, Any]) -> str:
+    """Short caption naming a cell's swept values, e.g. "cfg_scale=7 steps=20"."""
+    return " ".join(f"{name}={value}" for name, value in params.items())
+
+
+def grid_columns(axes: Dict[str, Sequence[Any]]) -> int:
+    """Columns of a contact sheet laid out as the grid: one per value of the last axis."""
+    return len(list(axes.values())[-1]) if axes else 1
+
+
+def contact_sheet(
+    images: List[Optional[bytes]], labels: List[str], columns: int, cell_size: int
+) -> bytes:
+    """
+    Composite sweep results into one labelled PNG grid.
+
+    CPU-bound; runs in a worker process so compositing never blocks the event
+    loop. Missing images (failed cells) are left as blank tiles.
+
+    Args:
+        images: Encoded image per cell, in cell order, or None for a failed cell
+        labels: Caption per cell
+        columns: Cells per row
+        cell_size: Longest edge of each tile in pixels
+    """
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        raise RuntimeError(
+            "Contact sheets require Pillow: install civitai-mcp-server[images]"
+        ) from None
+
+    caption = 14
+    columns = max(1, min(columns, len(images)))
+    rows = -(-len(images) // columns)
+    sheet = Image.new("RGB", (columns * cell_size, rows * (cell_size + caption)), "white")
+    draw = ImageDraw.Draw(sheet)
+    for index, (image_data, label) in enumerate(zip(images, labels)):
+        left = (index % columns) * cell_size
+        top = (index // columns) * (cell_size + caption)
+        if image_data is not None:
+            with Image.open(io.BytesIO(image_data)) as image:
+                image.thumbnail((cell_size, cell_size), Image.Resampling.LANCZOS)
+                offset = ((cell_size - image.width) // 2, (cell_size - image.height) // 2)
+                sheet.paste(image.convert("RGB"), (left + offset[0], top + offset[1]))
+        else:
+            draw.rectangle((left, top, left + cell_size - 1, top + cell_size - 1), fill="lightgray")
+        draw.text((left + 2, top + cell_size + 1), label, fill="black")
+
+    output = io.BytesIO()
+    sheet.save(output, format="PNG", optimize=True)
+    return output.getvalue()
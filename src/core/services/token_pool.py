@@ -0,0 +1,181 @@
+"""Pool of Civitai API tokens, each with its own SDK client."""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from src.core.config.settings import Settings
+from src.core.services.resilience import UpstreamError, UpstreamRateLimited
+
+
+@dataclass
+class ApiKey:
+    """One API token, its SDK client and its usage counters."""
+
+    token: str
+    client: Any = None
+    in_flight: int = 0
+    submissions: int = 0
+    jobs: int = 0
+    cost: float = 0.0
+    rate_limited: int = 0
+    errors: int = 0
+    consecutive_limits: int = 0
+    cooldown_until: float = 0.0
+
+    @property
+    def label(self) -> str:
+        """Identifier safe to log and expose: the token's last four characters."""
+        return f"...{self.token[-4:]}"
+
+    def as_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "key": self.label,
+            "in_flight": self.in_flight,
+            "submissions": self.submissions,
+            "jobs": self.jobs,
+            "cost": self.cost,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "cooldown_remaining": round(max(0.0, self.cooldown_until - now), 3),
+        }
+
+
+class TokenPool:
+    """
+    Balance submissions across several API tokens.
+
+    Every token gets an isolated SDK client, so one process can spread load
+    over several accounts and their separate rate limits. Each submission
+    goes to the token with the fewest jobs in flight, preferring tokens that
+    have been rate limited least. A 429 puts the token in a cooldown that
+    doubles with each consecutive 429 (or follows Retry-After when longer);
+    while every token is cooling down, acquire raises UpstreamRateLimited so
+    the retry policy waits for the earliest one to recover.
+
+    Jobs must be polled with the token that submitted them, so the pool also
+    remembers which key owns each upstream job token until it is finished.
+    """
+
+    def __init__(
+        self,
+        tokens: List[str],
+        cooldown: float = 10.0,
+        max_cooldown: float = 300.0,
+        base_url: str = "",
+        client_factory: Optional[Callable[[str], Any]] = None,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            tokens: API tokens; duplicates and blanks are ignored
+            cooldown: Seconds a token rests after its first consecutive 429
+            max_cooldown: Upper bound on a token's cooldown
+            base_url: Orchestration API URL override applied to every client
+            client_factory: Builds the SDK client for a token (defaults to civitai.Civitai)
+        """
+        unique = list(dict.fromkeys(token.strip() for token in tokens if token.strip()))
+        if not unique:
+            raise ValueError("At least one API token is required")
+        self.keys = [ApiKey(token) for token in unique]
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.base_url = base_url
+        self._client_factory = client_factory or self._sdk_client
+        self._owners: Dict[str, ApiKey] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings, api_token: str = "") -> "TokenPool":
+        """Create a pool from civitai_api_tokens, falling back to a single token."""
+        tokens = settings.civitai_api_tokens.split(",") if settings.civitai_api_tokens else []
+        return cls(
+            tokens or [api_token or settings.civitai_api_token],
+            cooldown=settings.token_cooldown,
+            max_cooldown=settings.token_max_cooldown,
+            base_url=settings.civitai_base_url,
+        )
+
+    def _sdk_client(self, token: str) -> Any:
+        # The SDK builds a module-level client from the environment at import
+        # time; every pooled client then gets its own token
+        os.environ.setdefault("CIVITAI_API_TOKEN", token)
+        import civitai
+
+        client = civitai.Civitai()
+        client.api_token = token
+        client.headers["Authorization"] = f"Bearer {token}"
+        return client
+
+    def client(self, key: ApiKey) -> Any:
+        """Lazily create the SDK client for a key."""
+        if key.client is None:
+            key.client = self._client_factory(key.token)
+            if self.base_url:
+                key.client.base_path = self.base_url
+        return key.client
+
+    def acquire(self) -> ApiKey:
+        """
+        Pick the key for a new submission and count it as in flight.
+
+        Raises:
+            UpstreamRateLimited: Every key is cooling down after a 429
+        """
+        now = time.monotonic()
+        ready = [key for key in self.keys if key.cooldown_until <= now]
+        if not ready:
+            wait = min(key.cooldown_until for key in self.keys) - now
+            raise UpstreamRateLimited(
+                "Every API token is rate limited", "submit", retry_after=wait
+            )
+        key = min(ready, key=lambda k: (k.in_flight, k.consecutive_limits, k.submissions))
+        key.in_flight += 1
+        return key
+
+    def release(self, key: ApiKey) -> None:
+        """Stop counting a job against a key."""
+        key.in_flight = max(0, key.in_flight - 1)
+
+    def record_submission(self, key: ApiKey, job_token: str, jobs: List[Dict[str, Any]]) -> None:
+        """Record an accepted submission and remember which key owns its token."""
+        key.submissions += 1
+        key.jobs += len(jobs)
+        key.cost += sum(job.get("cost") or 0 for job in jobs)
+        key.consecutive_limits = 0
+        self._owners[job_token] = key
+
+    def record_failure(self, key: ApiKey, error: UpstreamError) -> None:
+        """Count a failed call, cooling the key down if it was rate limited."""
+        if not isinstance(error, UpstreamRateLimited):
+            key.errors += 1
+            return
+        key.rate_limited += 1
+        key.consecutive_limits += 1
+        cooldown = min(self.max_cooldown, self.cooldown * 2 ** (key.consecutive_limits - 1))
+        if error.retry_after:
+            cooldown = min(self.max_cooldown, max(cooldown, error.retry_after))
+        key.cooldown_until = time.monotonic() + cooldown
+
+    def adopt(self, job_token: str, label: str) -> ApiKey:
+        """Reattach a job submitted before a restart to its key, found by label."""
+        key = next((key for key in self.keys if key.label == label), self.keys[0])
+        key.in_flight += 1
+        self._owners[job_token] = key
+        return key
+
+    def owner(self, job_token: str) -> ApiKey:
+        """Key that submitted a job token (the first key if it is unknown)."""
+        return self._owners.get(job_token, self.keys[0])
+
+    def finish(self, job_token: str) -> None:
+        """Forget a job token and release its key."""
+        key = self._owners.pop(job_token, None)
+        if key is not None:
+            self.release(key)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Usage, cost and cooldown for every key."""
+        now = time.monotonic()
+        return [key.as_dict(now) for key in self.keys]
@@ -0,0 +1,320 @@
+"""Request tracing: nested spans, correlation IDs and a local JSONL exporter."""
+
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.core.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_HEADER = "X-Correlation-ID"
+TRACEPARENT_HEADER = "traceparent"
+
+# W3C trace context: version-trace_id-parent_id-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+# Client-supplied correlation IDs are echoed in headers and logs, so keep them tame
+_CORRELATION_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+@dataclass
+class TraceContext:
+    """Trace a request belongs to, shared by every span started while handling it."""
+
+    correlation_id: str
+    trace_id: str
+    parent_id: Optional[str] = None
+    # Decided by the first span of the request unless the caller's traceparent did
+    sampled: Optional[bool] = None
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    correlation_id: str
+    sampled: bool = True
+    start_time: float = field(default_factory=time.time)
+    end_time: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    status: str = "ok"
+    error: Optional[str] = None
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds from start to end, or None while the span is open."""
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the span started."""
+        return time.perf_counter() - self._started
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header continuing the trace from this span."""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        """Record a point in time within the span, e.g. the result becoming available."""
+        self.events.append({"name": name, "offset": round(self.elapsed, 6), **attributes})
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+        status_code = getattr(error, "status_code", None)
+        if status_code is not None:
+            self.attributes["status_code"] = status_code
+
+    def end(self) -> None:
+        self.end_time = self.start_time + self.elapsed
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-serializable record of a finished span."""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "correlation_id": self.correlation_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+class _NoopSpan(Span):
+    """Span handed out while tracing is disabled; it records nothing."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan("noop", "0" * 32, "0" * 16, None, "", sampled=False)
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("civitai_span", default=None)
+_trace_context: ContextVar[Optional[TraceContext]] = ContextVar("civitai_trace", default=None)
+
+
+def current_span() -> Span:
+    """The innermost open span of the running task, or a no-op span outside any."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def correlation_id() -> Optional[str]:
+    """Correlation ID of the request being handled, if one is bound."""
+    context = _trace_context.get()
+    return context.correlation_id if context is not None else None
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    """Parse a W3C traceparent header into (trace_id, parent span id, sampled)."""
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+@contextmanager
+def bind_trace(
+    correlation: Optional[str] = None, traceparent: Optional[str] = None
+) -> Iterator[TraceContext]:
+    """
+    Bind the trace of an incoming request for the duration of the block.
+
+    Spans started inside the block (including in tasks it spawns) join the
+    same trace. A caller's traceparent continues its trace and sampling
+    decision; otherwise a new trace is started. The correlation ID is the
+    caller's, if it is well formed, else the trace ID.
+
+    Args:
+        correlation: Correlation ID supplied by the caller
+        traceparent: W3C traceparent supplied by the caller
+    """
+    parent = parse_traceparent(traceparent)
+    if correlation is not None and not _CORRELATION_ID.match(correlation):
+        correlation = None
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    elif correlation is not None and _TRACE_ID.match(correlation):
+        trace_id, parent_id, sampled = correlation, None, None
+    else:
+        trace_id, parent_id, sampled = uuid.uuid4().hex, None, None
+    context = TraceContext(correlation or trace_id, trace_id, parent_id, sampled)
+    token = _trace_context.set(context)
+    try:
+        yield context
+    finally:
+        _trace_context.reset(token)
+
+
+class JsonlSpanExporter:
+    """
+    Append finished spans to a JSON Lines file, one span per line.
+
+    Spans are buffered and written together once the outermost span of a
+    trace ends, from a worker thread when called on the event loop. The file
+    can be inspected directly, e.g. grep a correlation ID or load it with
+    pandas.read_json(path, lines=True).
+    """
+
+    def __init__(self, path: str, max_buffer: int = 256):
+        """
+        Initialize the exporter.
+
+        Args:
+            path: File to append to; its directory is created if missing
+            max_buffer: Spans buffered before writing even if no trace has ended
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_buffer = max_buffer
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self.exported = 0
+
+    def export(self, span: Span, flush: bool = False) -> None:
+        """Buffer a finished span, writing the buffer out if flush is set or it is full."""
+        self._buffer.append(json.dumps(span.as_dict(), default=str))
+        self.exported += 1
+        if flush or len(self._buffer) >= self.max_buffer:
+            lines, self._buffer = self._buffer, []
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._write(lines)
+            else:
+                loop.run_in_executor(None, self._write, lines)
+
+    def flush(self) -> None:
+        """Write any buffered spans now."""
+        lines, self._buffer = self._buffer, []
+        if lines:
+            self._write(lines)
+
+    def _write(self, lines: List[str]) -> None:
+        try:
+            with self._lock, self.path.open("a") as output:
+                output.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.warning("Could not write %d spans to %s: %s", len(lines), self.path, e)
+
+
+class Tracer:
+    """
+    Start nested spans and hand finished, sampled ones to an exporter.
+
+    The current span is tracked per task in a context variable, so spans
+    nest across awaits and child tasks without being passed around. With no
+    exporter, span() hands out a shared no-op span and costs next to nothing.
+    """
+
+    def __init__(self, exporter: Optional[JsonlSpanExporter] = None, sample_rate: float = 1.0):
+        """
+        Initialize the tracer.
+
+        Args:
+            exporter: Destination for finished spans (tracing is off without one)
+            sample_rate: Fraction of traces recorded (0-1), unless a caller's
+                traceparent says otherwise
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Trace sample rate must be between 0 and 1")
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Tracer":
+        """Create the tracer configured in settings; disabled if no trace path is set."""
+        exporter = JsonlSpanExporter(settings.trace_path) if settings.trace_path else None
+        return cls(exporter, settings.trace_sample_rate)
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """
+        Time the block as a span, a child of the current span if there is one.
+
+        An exception escaping the block marks the span as failed and is re-raised.
+
+        Args:
+            name: Operation name, e.g. "civitai.submit"
+            **attributes: Initial span attributes
+        """
+        if self.exporter is None:
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(
+                name, parent.trace_id, uuid.uuid4().hex[:16], parent.span_id,
+                parent.correlation_id, parent.sampled, attributes=attributes,
+            )
+        else:
+            context = _trace_context.get()
+            if context is None:
+                trace_id = uuid.uuid4().hex
+                context = TraceContext(trace_id, trace_id)
+            if context.sampled is None:
+                context.sampled = random.random() < self.sample_rate
+            span = Span(
+                name, context.trace_id, uuid.uuid4().hex[:16], context.parent_id,
+                context.correlation_id, context.sampled, attributes=attributes,
+            )
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            if span.sampled:
+                self.exporter.export(span, flush=parent is None)
+
+    def close(self) -> None:
+        """Write out any buffered spans."""
+        if self.exporter is not None:
+            self.exporter.flush()
@@ -0,0 +1,198 @@
+"""Image transcoding and thumbnailing in a worker process pool."""
+
+import asyncio
+import hashlib
+import io
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+from src.core.config.settings import Settings
+
+T = TypeVar("T")
+
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+
+# Longest edge used when a thumbnail is requested without max_dimension
+THUMBNAIL_SIZE = 256
+
+
+@dataclass(frozen=True)
+class OutputOptions:
+    """Requested output encoding for a generated image."""
+
+    format: Optional[str] = None
+    quality: int = 85
+    max_dimension: Optional[int] = None
+    thumbnail: bool = False
+
+    def validate(self) -> None:
+        """Raise ValueError for unsupported options."""
+        if self.format is not None and self.format not in FORMATS:
+            raise ValueError(
+                f"Unknown output format '{self.format}'. Choose from: {', '.join(FORMATS)}"
+            )
+        if not 1 <= self.quality <= 100:
+            raise ValueError("Quality must be between 1 and 100")
+        if self.max_dimension is not None and self.max_dimension < 1:
+            raise ValueError("max_dimension must be positive")
+
+    @property
+    def is_noop(self) -> bool:
+        """Whether the original bytes can be returned untouched."""
+        return self.format is None and self.max_dimension is None and not self.thumbnail
+
+    @property
+    def target_dimension(self) -> Optional[int]:
+        """Longest edge of the output, if it is being resized."""
+        if self.max_dimension is not None:
+            return self.max_dimension
+        return THUMBNAIL_SIZE if self.thumbnail else None
+
+
+def transcode_image(
+    image_data: bytes, image_format: str, quality: int, max_dimension: Optional[int]
+) -> bytes:
+    """
+    Re-encode an image, shrinking it to fit max_dimension if given.
+
+    CPU-bound; runs in a worker process so encoding never blocks the event loop.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError(
+            "Image transcoding requires Pillow: install civitai-mcp-server[images]"
+        ) from None
+
+    with Image.open(io.BytesIO(image_data)) as image:
+        image.load()
+        if max_dimension:
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        if image_format == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        output = io.BytesIO()
+        if image_format == "png":
+            image.save(output, format="PNG", optimize=True)
+        else:
+            image.save(output, format=image_format.upper(), quality=quality)
+        return output.getvalue()
+
+
+class Transcoder:
+    """
+    Apply output options to images, caching each variant.
+
+    Encoding runs in a lazily started process pool. Variants are cached in an
+    LRU bounded by entry count and bytes, keyed by the source image hash and
+    the output parameters, so repeated requests for the same variant are free.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cache_items: int = 256,
+        cache_bytes: int = 64 * 1024 * 1024,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Initialize the transcoder.
+
+        Args:
+            max_workers: Worker processes (defaults to the CPU count)
+            cache_items: Maximum cached variants
+            cache_bytes: Maximum total bytes of cached variants
+            executor: Executor to use instead of a private process pool
+        """
+        self.max_workers = max_workers
+        self.cache_items = cache_items
+        self.cache_bytes = cache_bytes
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._cache: "OrderedDict[str, tuple[bytes, str]]" = OrderedDict()
+        self._cache_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Transcoder":
+        """Create a transcoder configured from settings."""
+        return cls(
+            max_workers=settings.transcode_workers or None,
+            cache_items=settings.transcode_cache_items,
+            cache_bytes=settings.transcode_cache_bytes,
+        )
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def apply(
+        self, image_data: bytes, content_type: str, options: OutputOptions
+    ) -> tuple[bytes, str]:
+        """
+        Transcode an image per the output options.
+
+        Returns:
+            Tuple of (image bytes, content type); the input unchanged for no-op options
+        """
+        options.validate()
+        if options.is_noop:
+            return image_data, content_type
+
+        image_format = options.format or _format_of(content_type)
+        dimension = options.target_dimension
+        source_hash = hashlib.sha256(image_data).hexdigest()
+        key = f"{source_hash}:{image_format}:{options.quality}:{dimension or 0}"
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        output = await loop.run_in_executor(
+            self._get_executor(),
+            transcode_image,
+            image_data,
+            image_format,
+            options.quality,
+            dimension,
+        )
+        variant = (output, FORMATS[image_format])
+        self._store(key, variant)
+        return variant
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run another CPU-bound image function in the worker pool, uncached."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    def _store(self, key: str, variant: tuple[bytes, str]) -> None:
+        size = len(variant[0])
+        if size > self.cache_bytes:
+            return
+        self._cache[key] = variant
+        self._cache_size += size
+        while len(self._cache) > self.cache_items or self._cache_size > self.cache_bytes:
+            _, (evicted, _) = self._cache.popitem(last=False)
+            self._cache_size -= len(evicted)
+
+    def close(self) -> None:
+        """Shut down the worker pool without waiting for queued work."""
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _format_of(content_type: str) -> str:
+    """Output format matching a content type, defaulting to png."""
+    for image_format, mime in FORMATS.items():
+        if content_type.split(";")[0].strip() == mime:
+            return image_format
+    return "png"
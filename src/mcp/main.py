@@ -1,6 +1,18 @@
 """MCP server entry point."""
 
-from src.mcp.server import mcp
+import time
+
+
+def main() -> None:
+    """Run the MCP server, timing its startup from process entry."""
+    # Clients spawn this process per session, so importing the server is part of
+    # the first tool call's latency; measure it instead of starting after it
+    started = time.perf_counter()
+    from src.mcp import server
+
+    server.startup_began(started)
+    server.mcp.run()
+
 
 if __name__ == "__main__":
-    mcp.run()
+    main()
@@ -1,22 +1,166 @@
 """MCP server setup for Civitai image generation."""
 
-from mcp.server.fastmcp import FastMCP, Image
+import asyncio
+import functools
+import hashlib
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+
+from mcp import types
+from mcp.server.fastmcp import Context, FastMCP, Image
+from mcp.server.fastmcp.resources import Resource
+from pydantic import Field
+from mcp.types import ImageContent
 
 from src.contracts.requests import GenerateImageRequest
 from src.core.config.settings import settings
 from src.core.services.civitai_service import CivitaiService
+from src.core.services.metrics import start_metrics_server
+from src.core.services.model_catalog import ModelCatalog
+from src.core.services.progress import PROGRESS_STEPS, PhaseTimer, describe, progress_step
+from src.core.services.sweep import cell_label, expand_sweep, grid_columns
+from src.core.services.tracing import bind_trace, correlation_id
+from src.core.services.transcoding import OutputOptions
+
+logger = logging.getLogger(__name__)
 
 # Validate settings
 settings.validate_token()
 
-# Initialize service
-service = CivitaiService(settings.civitai_api_token)
+# Initialize service; SDK clients and the HTTP session are created on first use
+# or by the warm-up after the client handshake
+service = CivitaiService(settings.civitai_api_token, settings)
+catalog = ModelCatalog.from_settings(settings)
+
+# Seconds from the start of startup to each milestone; the entry point moves the
+# start back to process entry, otherwise it is the end of this module's imports
+startup: dict = {}
+_started = time.perf_counter()
+_warmup: asyncio.Task | None = None
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Server lifespan: serve metrics if configured, resume journaled jobs; drain and close sessions on shutdown."""
+    recovered = service.recover()
+    if recovered:
+        logger.info(
+            "Resuming %d journaled jobs (journal replayed in %.3fs)",
+            recovered,
+            service.journal.replay_seconds,
+        )
+    if settings.mcp_image_inline_max_bytes and service.artifacts is None:
+        logger.warning("MCP_IMAGE_INLINE_MAX_BYTES needs ARTIFACT_DIR; images stay inline")
+    metrics_runner = None
+    if settings.metrics_port:
+        metrics_runner = await start_metrics_server(
+            service.metrics, settings.app_host, settings.metrics_port
+        )
+    _report_startup("ready")
+    try:
+        yield
+    finally:
+        if _warmup is not None:
+            _warmup.cancel()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await service.drain(settings.shutdown_drain_timeout)
+        await catalog.close()
+        await service.close()
+
+
+def startup_began(started: float) -> None:
+    """
+    Measure startup milestones from started and report the server as imported.
+
+    Args:
+        started: time.perf_counter() reading taken before the server was imported
+    """
+    global _started
+    _started = started
+    _report_startup("imported")
+
+
+def _report_startup(milestone: str) -> None:
+    """Record and log how long startup took to reach a milestone."""
+    startup[milestone] = time.perf_counter() - _started
+    startup_seconds.set(startup[milestone], phase=milestone)
+    logger.info("MCP startup: %s after %.0f ms", milestone, startup[milestone] * 1000)
+
+
+async def _warm_up() -> None:
+    try:
+        await service.warm_up()
+        # A persisted catalog is loaded here; otherwise it is fetched on first use
+        await catalog.start()
+        _report_startup("warm")
+    except Exception:
+        logger.warning("Client warm-up failed; clients are created on first use", exc_info=True)
+
+
+async def _on_initialized(notification: types.InitializedNotification) -> None:
+    """Warm up clients in the background once the handshake has been answered."""
+    global _warmup
+    _report_startup("initialized")
+    if settings.mcp_warmup and _warmup is None:
+        _warmup = asyncio.create_task(_warm_up())
+
+
+startup_seconds = service.metrics.gauge(
+    "civitai_mcp_startup_seconds",
+    "Seconds from process entry to each MCP startup milestone.",
+    ["phase"],
+)
+
+# Images referenced instead of inlined, by content hash
+IMAGE_URI = "civitai://image/{hash}"
+
+
+def _traced(tool):
+    """
+    Run a tool inside a trace span named after it.
+
+    The trace continues the correlation_id or traceparent the client sent in
+    the request's _meta, if any; the correlation ID is returned in the _meta
+    of every image.
+    """
+
+    @functools.wraps(tool)
+    async def traced(*args, **kwargs):
+        ctx = kwargs.get("ctx")
+        with bind_trace(
+            _request_meta(ctx, "correlation_id"), _request_meta(ctx, "traceparent")
+        ), service.tracer.span(f"mcp.{tool.__name__}", caller=_caller(ctx)):
+            return await tool(*args, **kwargs)
+
+    return traced
+
 
 # Create FastMCP server
-mcp = FastMCP("civitai-image-generator")
+# Images delivered again are registered again as resources; that is expected
+mcp = FastMCP(
+    "civitai-image-generator", lifespan=lifespan, warn_on_duplicate_resources=False
+)
 
 
-@mcp.tool()
+def _on_handshake_complete(handler) -> None:
+    """
+    Await handler when a client sends notifications/initialized.
+
+    FastMCP has no public hook for the end of the handshake, so this is the
+    only place that reaches into its low-level server; TestInitializedHook
+    fails if a FastMCP upgrade moves it.
+    """
+    mcp._mcp_server.notification_handlers[types.InitializedNotification] = handler
+
+
+_on_handshake_complete(_on_initialized)
+
+
+@mcp.tool(structured_output=False)
+@_traced
 async def generate_image(
     model: str,
     prompt: str,
@@ -27,9 +171,18 @@ async def generate_image(
     cfg_scale: float = 7.0,
     seed: int = -1,
     timeout: int = 300,
-) -> Image:
+    poll_strategy: str = "",
+    format: str = "",
+    quality: int = 85,
+    max_dimension: int = 0,
+    thumbnail: bool = False,
+    ctx: Context | None = None,
+) -> Image | types.ResourceLink:
     """Generate an AI image using Civitai.
 
+    Images over the server's inline size limit are returned as a
+    civitai://image/{hash} resource link to read instead of inline bytes.
+
     Args:
         model: Model URN (e.g., urn:air:sd1:checkpoint:civitai:4384@128713)
         prompt: Text description of the image to generate
@@ -40,7 +193,22 @@ async def generate_image(
         cfg_scale: Prompt adherence strength
         seed: Random seed for reproducibility
         timeout: Maximum wait time in seconds
+        poll_strategy: Polling strategy (fixed, backoff or adaptive; default from settings)
+        format: Re-encode the image as webp, jpeg or png (default: original format)
+        quality: Encoding quality for webp/jpeg (1-100)
+        max_dimension: Shrink so the longest edge is at most this many pixels (0 keeps size)
+        thumbnail: Return a small preview (256px longest edge unless max_dimension is set)
     """
+    output = OutputOptions(
+        format=format or None,
+        quality=quality,
+        max_dimension=max_dimension or None,
+        thumbnail=thumbnail,
+    )
+    output.validate()
+    # Reject unknown models before anything reaches upstream
+    await catalog.validate(model)
+
     # Create request
     request = GenerateImageRequest(
         model=model,
@@ -53,14 +221,357 @@ async def generate_image(
         seed=seed,
     )
 
+    # Report status transitions as MCP progress notifications
+    timer = PhaseTimer()
+
+    async def on_status(status: str, details: dict) -> None:
+        await _report_progress(ctx, timer.transition(status))
+
+    await on_status("queued", {})
+
     # Generate and download image
     result = await service.generate_and_download(
-        request=request, timeout=timeout, poll_interval=3
+        request=request,
+        timeout=timeout,
+        poll_strategy=poll_strategy or None,
+        on_status=on_status,
+        caller=_caller(ctx),
     )
 
+    # Smaller payloads reach the model context faster
+    if not output.is_noop:
+        result = await service.apply_output(result, output)
+    return await _deliver(result)
+
+
+@mcp.tool(structured_output=False)
+@_traced
+async def generate_images(
+    model: str,
+    prompt: str,
+    quantity: int = 4,
+    prompts: list[str] | None = None,
+    width: int = 512,
+    height: int = 512,
+    negative_prompt: str = "",
+    steps: int = 20,
+    cfg_scale: float = 7.0,
+    seed: int = -1,
+    timeout: int = 300,
+    poll_strategy: str = "",
+    ctx: Context | None = None,
+) -> list[Image | types.ResourceLink | str]:
+    """Generate several AI images using Civitai in one round trip.
+
+    Images over the server's inline size limit are returned as
+    civitai://image/{hash} resource links. Images that failed are reported
+    as text after the ones that succeeded.
+
+    Args:
+        model: Model URN (e.g., urn:air:sd1:checkpoint:civitai:4384@128713)
+        prompt: Text description of the images to generate
+        quantity: Number of variations to generate per prompt
+        prompts: Optional list of prompts to use instead of prompt
+        width: Image width in pixels
+        height: Image height in pixels
+        negative_prompt: Things to avoid in the images
+        steps: Number of inference steps
+        cfg_scale: Prompt adherence strength
+        seed: Random seed for reproducibility
+        timeout: Maximum wait time in seconds
+        poll_strategy: Polling strategy (fixed, backoff or adaptive; default from settings)
+    """
+    await catalog.validate(model)
+    requests = [
+        GenerateImageRequest(
+            model=model,
+            prompt=item,
+            width=width,
+            height=height,
+            negative_prompt=negative_prompt,
+            steps=steps,
+            cfg_scale=cfg_scale,
+            seed=seed,
+        )
+        for item in (prompts or [prompt])
+    ]
+
+    results = await service.generate_batch(
+        requests=requests,
+        quantity=quantity,
+        timeout=timeout,
+        poll_strategy=poll_strategy or None,
+        caller=_caller(ctx),
+    )
+
+    failures = [
+        f"Image for prompt {result['prompt']!r} failed: {result['error']}"
+        for result in results
+        if "error" in result
+    ]
+    images = [await _deliver(result) for result in results if "error" not in result]
+    return images + failures
+
+
+@mcp.tool(structured_output=False)
+@_traced
+async def sweep(
+    model: str,
+    prompt: str,
+    axes: dict[str, list],
+    width: int = 512,
+    height: int = 512,
+    negative_prompt: str = "",
+    steps: int = 20,
+    cfg_scale: float = 7.0,
+    seed: int = -1,
+    contact_sheet: bool = True,
+    timeout: int = 300,
+    poll_strategy: str = "",
+    ctx: Context | None = None,
+) -> list[Image | types.ResourceLink | str]:
+    """Generate a grid of AI images over parameter axes in one call.
+
+    Every combination of axis values is one cell, e.g.
+    axes={"cfg_scale": [5, 7, 9], "seed": [1, 2]} generates six images.
+    Cached cells return at once and the rest run in parallel; progress is
+    reported as each cell finishes.
+
+    Args:
+        model: Model URN (e.g., urn:air:sd1:checkpoint:civitai:4384@128713)
+        prompt: Text description of the images to generate
+        axes: Parameter name to the values to try: prompt, negative_prompt,
+            width, height, scheduler, steps, cfg_scale, seed or clip_skip
+        width: Image width in pixels, unless swept
+        height: Image height in pixels, unless swept
+        negative_prompt: Things to avoid in the images, unless swept
+        steps: Number of inference steps, unless swept
+        cfg_scale: Prompt adherence strength, unless swept
+        seed: Random seed, unless swept; fix it to compare the other axes
+        contact_sheet: Return one labelled grid image instead of an image per cell
+        timeout: Maximum wait time in seconds
+        poll_strategy: Polling strategy (fixed, backoff or adaptive; default from settings)
+    """
+    await catalog.validate(model)
+    base = GenerateImageRequest(
+        model=model,
+        prompt=prompt,
+        width=width,
+        height=height,
+        negative_prompt=negative_prompt,
+        steps=steps,
+        cfg_scale=cfg_scale,
+        seed=seed,
+    )
+    cells = expand_sweep(base, axes, settings.sweep_max_cells)
+
+    results = []
+    async for result in await service.sweep(
+        cells,
+        timeout=timeout,
+        poll_strategy=poll_strategy or None,
+        caller=_caller(ctx),
+    ):
+        results.append(result)
+        await _report_cell(ctx, result, len(results), len(cells))
+    results.sort(key=lambda result: result["cell"])
+
+    failures = [
+        f"Cell {result['cell']} ({cell_label(result['params'])}) failed: {result['error']}"
+        for result in results
+        if "error" in result
+    ]
+    if contact_sheet:
+        sheet, _ = await service.contact_sheet(results, grid_columns(axes))
+        meta = {
+            "cells": [
+                {
+                    "cell": result["cell"],
+                    "params": result["params"],
+                    **{key: result[key] for key in ("seed", "job_id") if key in result},
+                }
+                for result in results
+            ]
+        }
+        sheet_result = {"image_data": sheet, "content_type": "image/png"}
+        return [await _deliver(sheet_result, meta), *failures]
+    images = [await _deliver(result) for result in results if "error" not in result]
+    return images + failures
+
+
+@mcp.tool()
+async def search_models(
+    query: str = "",
+    base_model: str = "",
+    type: str = "",
+    limit: int = 20,
+) -> list[dict]:
+    """Search Civitai models by name, base model and type, most downloaded first.
+
+    Use the returned urn as the model argument of generate_image.
+
+    Args:
+        query: Words that must all appear in the model or version name
+        base_model: Base model filter, e.g. "SD 1.5", "SDXL 1.0", "Pony", "Flux.1 D"
+        type: Model type filter, e.g. "Checkpoint" or "LORA"
+        limit: Maximum number of results
+    """
+    entries = await catalog.search(query, base_model, type, limit)
+    return [asdict(entry) for entry in entries]
+
+
+@mcp.tool()
+async def list_models(base_model: str = "", type: str = "Checkpoint", limit: int = 50) -> list[dict]:
+    """List the most downloaded Civitai models, optionally filtered.
+
+    Args:
+        base_model: Base model filter, e.g. "SD 1.5" or "SDXL 1.0"
+        type: Model type filter (default Checkpoint; empty for every type)
+        limit: Maximum number of results
+    """
+    entries = await catalog.search("", base_model, type, limit)
+    return [asdict(entry) for entry in entries]
+
+
+def _caller(ctx: Context | None) -> str:
+    """Client that generation costs are charged to."""
+    try:
+        return (ctx.client_id if ctx is not None else None) or "mcp"
+    except ValueError:
+        # No active request context (e.g. tool called directly)
+        return "mcp"
+
+
+def _request_meta(ctx: Context | None, key: str) -> str | None:
+    """A string field of the _meta the client sent with the current request, if present."""
+    try:
+        meta = ctx.request_context.meta if ctx is not None else None
+    except ValueError:
+        # No active request context (e.g. tool called directly)
+        return None
+    value = getattr(meta, key, None)
+    return value if isinstance(value, str) else None
+
+
+async def _report_progress(ctx: Context | None, event: dict) -> None:
+    """Send a progress notification if the client asked for progress."""
+    if ctx is None:
+        return
+    try:
+        await ctx.report_progress(
+            progress=progress_step(event["status"]),
+            total=len(PROGRESS_STEPS) - 1,
+            message=describe(event),
+        )
+    except ValueError:
+        # No active request context (e.g. tool called directly)
+        pass
+
+
+async def _report_cell(ctx: Context | None, result: dict, done: int, total: int) -> None:
+    """Send a progress notification for a finished sweep cell."""
+    if ctx is None:
+        return
+    outcome = "failed" if "error" in result else result.get("cache") or "done"
+    try:
+        await ctx.report_progress(
+            progress=done,
+            total=total,
+            message=f"Cell {result['cell']} ({cell_label(result['params'])}): {outcome}",
+        )
+    except ValueError:
+        # No active request context (e.g. tool called directly)
+        pass
+
+
+class ResultImage(Image):
+    """Image that carries generation metadata into the MCP content _meta field."""
+
+    def __init__(self, data: bytes, format: str, meta: dict):
+        super().__init__(data=data, format=format)
+        self.meta = meta
+
+    def to_image_content(self) -> ImageContent:
+        content = super().to_image_content()
+        content.meta = self.meta
+        return content
+
+
+def _image_meta(result: dict) -> dict:
+    """Seed/job/cache details of a result, sent as the image's metadata."""
+    return {
+        key: result[key]
+        for key in ("seed", "job_id", "cost", "cache", "cell", "params")
+        if result.get(key) is not None
+    }
+
+
+def _to_image(result: dict, meta: dict | None = None) -> Image:
+    """Convert a generation result into an MCP Image."""
     # Extract format from content type (e.g., "image/png" -> "png", "image/jpeg" -> "jpeg")
     content_type = result.get("content_type", "image/png")
     image_format = content_type.split("/")[-1] if "/" in content_type else "png"
 
-    # Return as Image object
-    return Image(data=result["image_data"], format=image_format)
+    # Return as Image object, with seed/job/cache details as metadata
+    return ResultImage(
+        data=result["image_data"], format=image_format, meta=meta or _image_meta(result)
+    )
+
+
+async def _deliver(result: dict, meta: dict | None = None) -> Image | types.ResourceLink:
+    """
+    Inline an image, or store it and return a resource link if it is over the inline limit.
+
+    Links keep large images out of the JSON-RPC message; the client reads
+    the bytes through the civitai://image/{hash} resource when it wants them.
+    """
+    meta = meta or _image_meta(result)
+    if correlation_id() is not None:
+        meta = {**meta, "correlation_id": correlation_id()}
+    image_data = result["image_data"]
+    limit = settings.mcp_image_inline_max_bytes
+    if not limit or len(image_data) <= limit or service.artifacts is None:
+        return _to_image(result, meta)
+
+    content_type = result.get("content_type", "image/png").split(";")[0].strip()
+    sha256 = hashlib.sha256(image_data).hexdigest()
+    if await service.artifacts.find(sha256) is None:
+        await service.artifacts.put(f"mcp:{sha256}", image_data, content_type, meta)
+    uri = IMAGE_URI.format(hash=sha256)
+    mcp.add_resource(StoredImage(
+        uri=uri, name=f"image-{sha256[:12]}", mime_type=content_type, sha256=sha256
+    ))
+    return types.ResourceLink(
+        type="resource_link",
+        uri=uri,
+        name=f"image-{sha256[:12]}",
+        mimeType=content_type,
+        size=len(image_data),
+        _meta=meta,
+    )
+
+
+class StoredImage(Resource):
+    """An image in the artifact mirror, read from disk only when a client asks for it."""
+
+    sha256: str = Field(exclude=True)
+
+    async def read(self) -> bytes:
+        return await _read_stored(self.sha256)
+
+
+async def _read_stored(sha256: str) -> bytes:
+    artifact = await service.artifacts.find(sha256) if service.artifacts is not None else None
+    if artifact is None:
+        raise ValueError(f"Image {sha256} is not in the local store")
+    chunks = service.artifacts.iter_chunks(artifact, settings.stream_chunk_size)
+    return b"".join([chunk async for chunk in chunks])
+
+
+# Images linked by this process are registered as resources of their own, served
+# with their MIME type; the template covers links from earlier processes
+@mcp.resource(IMAGE_URI, name="image", mime_type="image/png")
+async def stored_image(hash: str) -> bytes:
+    """Image returned by an earlier tool call as a civitai://image/{hash} link."""
+    return await _read_stored(hash)
+
@@ -0,0 +1,100 @@
+"""Integration tests against the local fake Civitai backend."""
+
+import pytest
+
+from benchmarks.fake_civitai import FakeBackendConfig, FakeCivitai
+from benchmarks.run import percentile, run_benchmark
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.polling import AdaptivePolling, estimate_remaining
+from src.core.services.resilience import UpstreamRateLimited
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+
+
+def _settings(url: str) -> Settings:
+    """Default polling strategy, starting fast and without jitter so poll counts are exact."""
+    return Settings(civitai_base_url=url, poll_initial_interval=0.02, poll_jitter=0)
+
+
+class TestFakeBackend:
+    """Test the service end to end through the real SDK."""
+
+    @pytest.mark.asyncio
+    async def test_generate_and_download(self):
+        """Test a generation is submitted, polled on its ETA and downloaded."""
+        config = FakeBackendConfig(job_duration_min=1.0, job_duration_max=1.0, blob_size=1024)
+        async with FakeCivitai(config) as backend:
+            settings = _settings(backend.url)
+            service = CivitaiService("token", settings)
+            result = await service.generate_and_download(
+                GenerateImageRequest(model=MODEL, prompt="p", seed=7)
+            )
+            await service.close()
+
+        assert settings.poll_strategy == "adaptive"
+        assert result["seed"] == 7
+        assert result["content_type"] == "image/png"
+        assert len(result["image_data"]) == 1024
+        assert backend.stats.submits == 1
+        assert backend.stats.downloads == 1
+        # The first poll reports the ETA and the next lands on it (one more if it
+        # lands a hair early); backoff from 0.02s alone would take nine polls
+        assert 2 <= backend.stats.polls <= 3
+
+    @pytest.mark.asyncio
+    async def test_status_keeps_queue_position_eta(self):
+        """Test polled status carries the provider ETA, and adaptive polling sleeps until it."""
+        config = FakeBackendConfig(job_duration_min=5, job_duration_max=5, blob_size=64)
+        async with FakeCivitai(config) as backend:
+            service = CivitaiService("token", _settings(backend.url))
+            token, _ = await service._submit(GenerateImageRequest(model=MODEL, prompt="p"))
+            status = await service._fetch_status(token)
+            service.tokens.finish(token)
+            await service.close()
+
+        eta = estimate_remaining(status)
+        strategy = AdaptivePolling(initial_interval=0.5, max_interval=10, jitter=0)
+        assert 4 < eta <= 5
+        assert strategy.next_delay(1, status) == eta
+
+    @pytest.mark.asyncio
+    async def test_throttled_submission_surfaces_429(self):
+        """Test 429s are retried, then reach the caller as a rate-limit error."""
+        async with FakeCivitai(FakeBackendConfig(throttle_rate=1.0)) as backend:
+            settings = _settings(backend.url).model_copy(update={"retry_base_delay": 0.01, "token_cooldown": 0})
+            service = CivitaiService("token", settings)
+            with pytest.raises(UpstreamRateLimited) as exc:
+                await service.generate(GenerateImageRequest(model=MODEL, prompt="p"))
+            await service.close()
+
+        assert exc.value.status_code == 429
+        assert backend.stats.throttled == settings.retry_attempts
+        assert backend.stats.jobs == 0
+
+
+class TestBenchmark:
+    """Test the benchmark harness."""
+
+    def test_percentile_interpolates(self):
+        """Test percentiles interpolate between sorted samples."""
+        assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+        assert percentile([1.0], 99) == 1.0
+        assert percentile([], 95) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_api_level_reports_latency_and_upstream_calls(self):
+        """Test a small API run reports every request and its upstream traffic."""
+        config = FakeBackendConfig(job_duration_min=0.01, job_duration_max=0.02, blob_size=64)
+        async with FakeCivitai(config) as backend:
+            results = await run_benchmark(
+                ["api"], [2], 4, backend, Settings(poll_initial_interval=0.01, poll_jitter=0)
+            )
+
+        [result] = results
+        assert result["succeeded"] == 4
+        assert result["failed"] == 0
+        assert result["upstream"]["submits"] == 4
+        assert result["upstream"]["downloads"] == 4
+        assert 0 < result["latency"]["p50"] <= result["latency"]["p99"]
@@ -0,0 +1,100 @@
+"""Startup budget tests for the MCP server process."""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Generous enough for slow CI machines; a regression that imports the SDK,
+# aiohttp or Pillow eagerly, or blocks startup on the network, still fails
+IMPORT_BUDGET = 2.0
+READY_BUDGET = 5.0
+
+# Loaded by the background warm-up or on first use, never at import
+DEFERRED_MODULES = ("civitai", "aiohttp", "PIL")
+
+
+def _env() -> dict:
+    """Default settings, so startup work the defaults enable counts against the budgets."""
+    env = {key: value for key, value in os.environ.items() if key != "MODEL_VALIDATION"}
+    return {**env, "CIVITAI_API_TOKEN": "startup-test"}
+
+
+def _message(payload: dict) -> bytes:
+    return (json.dumps({"jsonrpc": "2.0", **payload}) + "\n").encode()
+
+
+async def _response(stdout: asyncio.StreamReader, request_id: int) -> dict:
+    while True:
+        line = await stdout.readline()
+        if not line:
+            raise AssertionError("MCP server exited before responding")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+class TestMcpStartup:
+    """Test the MCP server starts within its budgets."""
+
+    def test_import_budget_and_deferred_clients(self):
+        """Test importing the server is fast and leaves the heavy client libraries unloaded."""
+        script = (
+            "import json, sys, time\n"
+            "started = time.perf_counter()\n"
+            "import src.mcp.server\n"
+            "print(json.dumps({'seconds': time.perf_counter() - started, "
+            f"'loaded': [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=ROOT, env=_env(), capture_output=True, text=True, check=True, timeout=60,
+        )
+        report = json.loads(output.stdout.strip().splitlines()[-1])
+
+        assert report["loaded"] == []
+        assert report["seconds"] < IMPORT_BUDGET
+
+    @pytest.mark.asyncio
+    async def test_cold_start_to_first_tool_ready(self):
+        """Test a freshly spawned server answers the handshake and lists tools within budget."""
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "src.mcp.main",
+            cwd=ROOT, env=_env(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            process.stdin.write(_message({
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2025-06-18",
+                    "capabilities": {},
+                    "clientInfo": {"name": "startup-test", "version": "0"},
+                },
+            }))
+            await asyncio.wait_for(_response(process.stdout, 1), READY_BUDGET)
+            process.stdin.write(_message({"method": "notifications/initialized"}))
+            process.stdin.write(_message({"id": 2, "method": "tools/list"}))
+            tools = await asyncio.wait_for(_response(process.stdout, 2), READY_BUDGET)
+            ready = time.perf_counter() - started
+
+            assert "generate_image" in {tool["name"] for tool in tools["result"]["tools"]}
+            assert ready < READY_BUDGET
+        finally:
+            process.stdin.close()
+            try:
+                await asyncio.wait_for(process.wait(), 10)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
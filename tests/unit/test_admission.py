@@ -0,0 +1,114 @@
+"""Unit tests for admission control."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service
+from src.api.main import create_app
+from src.core.services.admission import AdmissionController, AdmissionRejected
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+
+
+class TestAdmissionController:
+    """Test slot, queue and rate limiting."""
+
+    @pytest.mark.asyncio
+    async def test_in_flight_limit(self):
+        """Test callers beyond max_in_flight wait for a release."""
+        controller = AdmissionController(max_in_flight=1, rate=0)
+        await controller.acquire()
+
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        assert controller.queue_depth == 1
+
+        controller.release()
+        await asyncio.wait_for(waiter, 1)
+        assert controller.in_flight == 1
+        assert controller.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        """Test queued high-priority callers are admitted before earlier low ones."""
+        controller = AdmissionController(max_in_flight=1, rate=0)
+        await controller.acquire()
+        order = []
+
+        async def take(priority):
+            async with controller.slot(priority):
+                order.append(priority)
+
+        tasks = [asyncio.create_task(take(p)) for p in ("low", "normal", "high")]
+        await asyncio.sleep(0.01)
+        controller.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["high", "normal", "low"]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects(self):
+        """Test a full queue rejects immediately with a retry hint."""
+        controller = AdmissionController(max_in_flight=1, rate=0, queue_size=1)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire()
+        assert exc.value.retry_after >= 1
+        assert controller.stats.rejected == 1
+
+        waiter.cancel()
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout_rejects(self):
+        """Test waiting longer than queue_timeout rejects."""
+        controller = AdmissionController(max_in_flight=1, rate=0, queue_timeout=0.01)
+        await controller.acquire()
+
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire()
+        assert controller.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_paces_submissions(self):
+        """Test an empty bucket delays admission until a token refills."""
+        controller = AdmissionController(max_in_flight=10, rate=50, burst=1)
+        loop = asyncio.get_running_loop()
+        await controller.acquire()
+
+        started = loop.time()
+        await controller.acquire()
+
+        assert loop.time() - started >= 0.015
+        assert controller.in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_unknown_priority(self):
+        """Test unknown priority classes are rejected as bad input."""
+        with pytest.raises(ValueError):
+            await AdmissionController().acquire("urgent")
+
+
+class TestAdmissionRoutes:
+    """Test rejected submissions surface as 503."""
+
+    def test_rejection_maps_to_503_with_retry_after(self):
+        """Test the route returns Retry-After when admission fails."""
+        service = MagicMock()
+        service.get_cached = AsyncMock(return_value=None)
+        service.generate_and_download = AsyncMock(
+            side_effect=AdmissionRejected("Too many queued generations", 4)
+        )
+        app = create_app()
+        app.dependency_overrides[get_civitai_service] = lambda: service
+
+        response = TestClient(app).post("/images", json={"model": MODEL, "prompt": "p"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "4"
@@ -0,0 +1,162 @@
+"""Unit tests for the local image mirror."""
+
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service
+from src.api.main import create_app
+from src.core.config.settings import Settings
+from src.core.services.artifact_store import ArtifactStore
+from src.core.services.civitai_service import CivitaiService
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+class TestArtifactStore:
+    """Test writing, deduplication and limits."""
+
+    @pytest.mark.asyncio
+    async def test_stream_write_and_get(self, tmp_path):
+        """Test streamed chunks are stored by content hash with their metadata."""
+        store = ArtifactStore(str(tmp_path))
+        artifact = await store.write_stream(
+            "job-1", _chunks(b"abc", b"def"), "image/png", {"seed": 4}
+        )
+
+        found = await store.get("job-1")
+
+        assert found.sha256 == artifact.sha256
+        assert found.path.read_bytes() == b"abcdef"
+        assert found.path.parent.name == artifact.sha256[:2]
+        assert found.metadata == {"seed": 4}
+        assert not list(tmp_path.glob("*.part"))
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_identical_images_stored_once(self, tmp_path):
+        """Test two jobs with the same bytes share one file."""
+        store = ArtifactStore(str(tmp_path))
+        first = await store.put("job-1", b"same", "image/png")
+        second = await store.put("job-2", b"same", "image/png")
+
+        assert first.path == second.path
+        assert await store.total_bytes() == 4
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_find_by_hash_reads_in_chunks(self, tmp_path):
+        """Test an artifact is found by content hash and read back chunk by chunk."""
+        store = ArtifactStore(str(tmp_path))
+        artifact = await store.put("job-1", b"abcdef", "image/png")
+
+        found = await store.find(artifact.sha256)
+        chunks = [chunk async for chunk in store.iter_chunks(found, 4)]
+
+        assert found.job_id == "job-1"
+        assert chunks == [b"abcd", b"ef"]
+        assert await store.find("0" * 64) is None
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_budget_evicts_least_recently_served(self, tmp_path):
+        """Test the byte budget removes least recently served entries and their files."""
+        store = ArtifactStore(str(tmp_path), max_bytes=10)
+        old = await store.put("old", b"x" * 6, "image/png")
+        await store.put("new", b"y" * 6, "image/png")
+
+        await store.enforce()
+
+        assert await store.get("old") is None
+        assert not old.path.exists()
+        assert await store.get("new") is not None
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_retention_expires_entries(self, tmp_path):
+        """Test entries older than the retention period are removed."""
+        store = ArtifactStore(str(tmp_path), retention=0.01)
+        await store.put("job-1", b"img", "image/png")
+        time.sleep(0.02)
+
+        assert await store.enforce() == 1
+        assert await store.get("job-1") is None
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_tee_mirrors_consumed_stream(self, tmp_path):
+        """Test tee passes chunks through and records the image once consumed."""
+        store = ArtifactStore(str(tmp_path))
+
+        received = [c async for c in store.tee("job-1", _chunks(b"ab", b"cd"), "image/png")]
+
+        assert received == [b"ab", b"cd"]
+        assert (await store.get("job-1")).path.read_bytes() == b"abcd"
+        await store.close()
+
+
+class TestServiceMirroring:
+    """Test downloads are mirrored when the store is enabled."""
+
+    @pytest.mark.asyncio
+    async def test_download_result_writes_mirror(self, tmp_path):
+        """Test download_result streams the image into the store."""
+        service = CivitaiService("token", Settings(artifact_dir=str(tmp_path)))
+        service.open_image_stream = AsyncMock(
+            return_value=(_chunks(b"img", b"data"), "image/webp", None)
+        )
+
+        image_data, content_type = await service.download_result(
+            {"job_id": "job-1", "blob_url": "http://blob", "seed": 2}
+        )
+
+        assert image_data == b"imgdata"
+        assert content_type == "image/webp"
+        artifact = await service.artifacts.get("job-1")
+        assert artifact.metadata["seed"] == 2
+        await service.close()
+
+
+class TestImageRoute:
+    """Test GET /images/{job_id}."""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        """Client whose service has a store containing one image."""
+        import asyncio
+
+        store = ArtifactStore(str(tmp_path))
+        asyncio.run(store.put("job-1", b"0123456789", "image/png", {"seed": 5, "job_id": "job-1"}))
+        service = MagicMock()
+        service.artifacts = store
+        app = create_app()
+        app.dependency_overrides[get_civitai_service] = lambda: service
+        return TestClient(app)
+
+    def test_serves_file_with_etag(self, client):
+        """Test the image is served with a content-hash ETag and metadata headers."""
+        response = client.get("/images/job-1")
+
+        assert response.status_code == 200
+        assert response.content == b"0123456789"
+        assert response.headers["content-type"] == "image/png"
+        assert response.headers["x-seed"] == "5"
+
+        cached = client.get("/images/job-1", headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
+
+    def test_range_request(self, client):
+        """Test byte ranges are honoured."""
+        response = client.get("/images/job-1", headers={"Range": "bytes=2-5"})
+
+        assert response.status_code == 206
+        assert response.content == b"2345"
+
+    def test_unknown_job(self, client):
+        """Test unknown job ids are 404."""
+        assert client.get("/images/missing").status_code == 404
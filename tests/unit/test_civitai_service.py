@@ -0,0 +1,248 @@
+"""Unit tests for Civitai service."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.contracts.requests import GenerateImageRequest
+
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.resilience import UpstreamError
+
+
+class TestSharedSession:
+    """Test the shared HTTP session used for blob downloads."""
+
+    @pytest.mark.asyncio
+    async def test_session_is_created_lazily_and_reused(self):
+        """Test the session is only created on first use and then reused."""
+        service = CivitaiService("token", Settings(http_pool_limit_per_host=7))
+        assert service._session is None
+
+        session = service._get_session()
+        assert service._get_session() is session
+        assert session.connector.limit_per_host == 7
+
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_close_releases_session(self):
+        """Test close() closes the session and a new one is created afterwards."""
+        service = CivitaiService("token", Settings())
+        session = service._get_session()
+
+        await service.close()
+
+        assert session.closed
+        assert service._session is None
+        new_session = service._get_session()
+        assert new_session is not session
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_close_without_session(self):
+        """Test close() is a no-op when no download ever happened."""
+        service = CivitaiService("token", Settings())
+        await service.close()
+        assert service._session is None
+
+
+class TestImageStream:
+    """Test streaming blob downloads."""
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_bounded_chunks(self):
+        """Test the blob is yielded in chunks no larger than chunk_size."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+
+        payload = bytes(range(256)) * 40
+
+        async def blob(request):
+            return web.Response(body=payload, content_type="image/webp")
+
+        app = web.Application()
+        app.router.add_get("/blob", blob)
+        async with TestServer(app) as server:
+            service = CivitaiService("token", Settings())
+            chunks, content_type, content_length = await service.open_image_stream(
+                str(server.make_url("/blob")), chunk_size=1024
+            )
+            received = [chunk async for chunk in chunks]
+            await service.close()
+
+        assert content_type == "image/webp"
+        assert content_length == str(len(payload))
+        assert b"".join(received) == payload
+        assert max(len(chunk) for chunk in received) <= 1024
+
+    @pytest.mark.asyncio
+    async def test_stream_raises_on_http_error(self):
+        """Test a non-200 status is raised before streaming starts."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+
+        async def missing(request):
+            return web.Response(status=404)
+
+        app = web.Application()
+        app.router.add_get("/blob", missing)
+        async with TestServer(app) as server:
+            service = CivitaiService("token", Settings())
+            with pytest.raises(Exception, match="HTTP 404"):
+                await service.open_image_stream(str(server.make_url("/blob")))
+            await service.close()
+
+
+def _fake_client(quantity_by_prompt: dict[str, int]):
+    """Build a fake SDK client whose jobs complete on the second poll."""
+    client = MagicMock()
+    polls: dict[str, int] = {}
+
+    async def create(input):
+        prompt = input["params"]["prompt"]
+        count = input.get("quantity", 1)
+        assert count == quantity_by_prompt[prompt]
+        jobs = [{"jobId": f"{prompt}-{i}", "cost": 1.0} for i in range(count)]
+        return {"token": f"token-{prompt}", "jobs": jobs}
+
+    async def get(token):
+        prompt = token.removeprefix("token-")
+        polls[token] = polls.get(token, 0) + 1
+        done = polls[token] > 1
+        return {
+            "token": token,
+            "jobs": [
+                {
+                    "jobId": f"{prompt}-{i}",
+                    "result": [{
+                        "available": done,
+                        "blobUrl": f"http://blob/{prompt}-{i}" if done else None,
+                        "seed": i,
+                    }],
+                }
+                # Upstream may list jobs in any order
+                for i in reversed(range(quantity_by_prompt[prompt]))
+            ],
+        }
+
+    client.image.create = AsyncMock(side_effect=create)
+    client.jobs.get = AsyncMock(side_effect=get)
+    return client
+
+
+class TestGenerateBatch:
+    """Test batch generation."""
+
+    @pytest.mark.asyncio
+    async def test_batch_submits_once_per_request_and_tracks_all_jobs(self):
+        """Test quantity is sent upstream and every job is returned in order."""
+        service = CivitaiService("token", Settings(poll_interval=0))
+        service.tokens.keys[0].client = _fake_client({"cat": 3, "dog": 3})
+        service.download_image = AsyncMock(
+            side_effect=lambda url: (url.encode(), "image/png")
+        )
+
+        results = await service.generate_batch(
+            requests=[
+                GenerateImageRequest(model="m", prompt="cat"),
+                GenerateImageRequest(model="m", prompt="dog"),
+            ],
+            quantity=3,
+            poll_strategy="fixed",
+        )
+
+        assert service.tokens.keys[0].client.image.create.await_count == 2
+        assert [r["job_id"] for r in results] == [
+            "cat-0", "cat-1", "cat-2", "dog-0", "dog-1", "dog-2"
+        ]
+        assert [r["image_data"] for r in results] == [
+            f"http://blob/{r['job_id']}".encode() for r in results
+        ]
+
+    @pytest.mark.asyncio
+    async def test_batch_respects_download_concurrency(self):
+        """Test downloads never exceed the concurrency cap."""
+        import asyncio
+
+        service = CivitaiService("token", Settings(poll_interval=0))
+        service.tokens.keys[0].client = _fake_client({"cat": 6})
+        active = 0
+        peak = 0
+
+        async def download(url):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return b"img", "image/png"
+
+        service.download_image = download
+
+        results = await service.generate_batch(
+            requests=[GenerateImageRequest(model="m", prompt="cat")],
+            quantity=6,
+            poll_strategy="fixed",
+            concurrency=2,
+        )
+
+        assert len(results) == 6
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_keeps_results_when_some_fail(self):
+        """Test a failed submission or download becomes an error entry instead of failing all."""
+        service = CivitaiService("token", Settings(poll_interval=0))
+        # "dog" is not known to the fake backend, so its submission fails
+        service.tokens.keys[0].client = _fake_client({"cat": 2})
+
+        async def download(url):
+            if url.endswith("cat-1"):
+                raise ConnectionError("blob went away")
+            return b"img", "image/png"
+
+        service.download_image = download
+
+        results = await service.generate_batch(
+            requests=[
+                GenerateImageRequest(model="m", prompt="cat"),
+                GenerateImageRequest(model="m", prompt="dog"),
+            ],
+            quantity=2,
+            poll_strategy="fixed",
+        )
+
+        assert [(r.get("job_id"), r["prompt"], "error" in r) for r in results] == [
+            ("cat-0", "cat", False),
+            ("cat-1", "cat", True),
+            (None, "dog", True),
+            (None, "dog", True),
+        ]
+        assert results[0]["image_data"] == b"img"
+        assert results[1]["blob_url"] == "http://blob/cat-1"
+        assert "blob went away" in results[1]["error"]
+
+    @pytest.mark.asyncio
+    async def test_batch_raises_when_every_submission_fails(self):
+        """Test a batch with nothing to keep raises the submission error."""
+        service = CivitaiService("token", Settings(poll_interval=0))
+        service.tokens.keys[0].client = _fake_client({})
+
+        with pytest.raises(UpstreamError, match="submit failed"):
+            await service.generate_batch(
+                requests=[GenerateImageRequest(model="m", prompt="cat")], poll_strategy="fixed"
+            )
+
+    @pytest.mark.asyncio
+    async def test_batch_rejects_oversized_batches(self):
+        """Test the configured batch limit is enforced before submission."""
+        service = CivitaiService("token", Settings(batch_max_images=4))
+        service.tokens.keys[0].client = _fake_client({})
+
+        with pytest.raises(ValueError, match="exceeds the limit"):
+            await service.generate_batch(
+                requests=[GenerateImageRequest(model="m", prompt="cat")], quantity=5
+            )
+        service.tokens.keys[0].client.image.create.assert_not_awaited()
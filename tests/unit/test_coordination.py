@@ -0,0 +1,397 @@
+"""Unit tests for worker coordination backends and the state shared through them."""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.models.job import JobRecord, JobStatus
+from src.core.services import job_manager
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.coordination import (
+    MemoryBackend,
+    RedisBackend,
+    SharedRateLimiter,
+    create_coordination_backend,
+)
+from src.core.services.job_manager import JobManager
+from src.core.services.job_store import SharedJobStore
+from src.core.services.result_cache import ResultCache
+from src.core.services.single_flight import SharedFlight
+
+
+class ErrorReply(str):
+    """Error reply sent by the fake server."""
+
+
+async def read_command(reader):
+    """Read one RESP array of bulk strings, as clients send commands."""
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Client disconnected")
+    args = []
+    for _ in range(int(line[1:-2])):
+        length = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+class FakeRedisServer:
+    """Redis-protocol server keeping its data in a MemoryBackend."""
+
+    def __init__(self, password=None):
+        self.password = password
+        self.data = MemoryBackend()
+        self.commands = []
+        self.connections = []
+
+    def drop_connections(self):
+        """Close every client connection, as a server does with idle clients."""
+        for writer in self.connections:
+            writer.close()
+
+    async def execute(self, name, args, session):
+        if name == "AUTH":
+            session["authed"] = args[-1].decode() == self.password
+            return "OK" if session["authed"] else ErrorReply("WRONGPASS invalid password")
+        if self.password and not session.get("authed"):
+            return ErrorReply("NOAUTH Authentication required.")
+        key = args[0].decode() if args else None
+        if name == "SELECT":
+            return "OK"
+        if name == "GET":
+            return await self.data.get(key)
+        if name == "SET":
+            options = [arg.decode().upper() for arg in args[2:]]
+            ttl = int(options[options.index("PX") + 1]) / 1000 if "PX" in options else None
+            written = await self.data.set(key, args[1], ttl, only_if_absent="NX" in options)
+            return "OK" if written else None
+        if name == "DEL":
+            return await self.data.delete(*(arg.decode() for arg in args))
+        if name == "INCRBY":
+            try:
+                return await self.data.incr(key, int(args[1]))
+            except ValueError:
+                return ErrorReply("ERR value is not an integer or out of range")
+        if name in ("SADD", "SREM"):
+            members = [arg.decode() for arg in args[1:]]
+            await (self.data.sadd if name == "SADD" else self.data.srem)(key, *members)
+            return len(members)
+        if name == "SMEMBERS":
+            return [member.encode() for member in await self.data.smembers(key)]
+        return ErrorReply(f"ERR unknown command '{name}'")
+
+    async def handle(self, reader, writer):
+        session = {}
+        self.connections.append(writer)
+        try:
+            while True:
+                command = await read_command(reader)
+                name = command[0].decode().upper()
+                self.commands.append(name)
+                writer.write(self.encode(await self.execute(name, command[1:], session)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def encode(self, reply):
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, ErrorReply):
+            return b"-%s\r\n" % reply.encode()
+        if isinstance(reply, str):
+            return b"+%s\r\n" % reply.encode()
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        return b"*%d\r\n" % len(reply) + b"".join(self.encode(item) for item in reply)
+
+
+@asynccontextmanager
+async def running_redis(password=None):
+    """Run a fake Redis server for the duration of a test."""
+    fake = FakeRedisServer(password)
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    auth = f":{password}@" if password else ""
+    fake.url = f"redis://{auth}127.0.0.1:{port}/1"
+    try:
+        yield fake
+    finally:
+        server.close()
+
+
+@asynccontextmanager
+async def backend(kind):
+    """A memory backend, or a Redis backend connected to a fake server."""
+    if kind == "memory":
+        yield MemoryBackend()
+        return
+    pytest.importorskip("redis")
+    async with running_redis() as fake:
+        redis = RedisBackend(fake.url)
+        try:
+            yield redis
+        finally:
+            await redis.close()
+
+
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+class TestBackendContract:
+    """Test both backends behave the same."""
+
+    @pytest.mark.asyncio
+    async def test_get_set_delete(self, kind):
+        """Test values round-trip as bytes and only_if_absent claims a key once."""
+        async with backend(kind) as store:
+            assert await store.set("k", "v")
+            assert await store.get("k") == b"v"
+            assert not await store.set("k", b"w", only_if_absent=True)
+            assert await store.delete("k", "missing") == 1
+            assert await store.get("k") is None
+            assert await store.set("k", b"w", only_if_absent=True)
+
+    @pytest.mark.asyncio
+    async def test_ttl_expires(self, kind):
+        """Test keys disappear after their TTL."""
+        async with backend(kind) as store:
+            await store.set("k", b"v", ttl=0.05)
+            await asyncio.sleep(0.1)
+            assert await store.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_counter_keeps_ttl_from_creation(self, kind):
+        """Test incr counts atomically and the counter expires from its first increment."""
+        async with backend(kind) as store:
+            assert await store.incr("c", ttl=0.1) == 1
+            assert await store.incr("c", 2, ttl=0.1) == 3
+            await asyncio.sleep(0.15)
+            assert await store.incr("c", ttl=0.1) == 1
+
+    @pytest.mark.asyncio
+    async def test_sets(self, kind):
+        """Test set membership."""
+        async with backend(kind) as store:
+            await store.sadd("s", "a", "b")
+            await store.srem("s", "a")
+            assert await store.smembers("s") == {"b"}
+            assert await store.smembers("missing") == set()
+
+
+class TestRedisBackend:
+    """Test the Redis client."""
+
+    @pytest.mark.asyncio
+    async def test_authenticates_and_reuses_connections(self):
+        """Test the URL's password and database are sent once per connection."""
+        pytest.importorskip("redis")
+        async with running_redis(password="secret") as fake:
+            redis = RedisBackend(fake.url, pool_size=1)
+            for _ in range(3):
+                await redis.set("k", b"v")
+            await redis.close()
+
+            # Client library handshake commands the fake does not know are ignored
+            commands = [name for name in fake.commands if name != "CLIENT"]
+            assert commands == ["AUTH", "SELECT", "SET", "SET", "SET"]
+
+    @pytest.mark.asyncio
+    async def test_error_reply_raised_without_dropping_connection(self):
+        """Test an error reply raises and the connection stays usable."""
+        exceptions = pytest.importorskip("redis.exceptions")
+        async with running_redis() as fake:
+            redis = RedisBackend(fake.url, pool_size=1)
+            await redis.set("k", b"text")
+
+            with pytest.raises(exceptions.ResponseError, match="not an integer"):
+                await redis.incr("k")
+            assert await redis.get("k") == b"text"
+            assert fake.commands.count("SELECT") == 1
+            await redis.close()
+
+    @pytest.mark.asyncio
+    async def test_reconnects_after_server_closed_idle_connection(self):
+        """Test a pooled connection the server dropped is replaced instead of failing."""
+        pytest.importorskip("redis")
+        async with running_redis() as fake:
+            redis = RedisBackend(fake.url, pool_size=1)
+            await redis.set("k", b"v")
+            fake.drop_connections()
+            await asyncio.sleep(0.01)
+
+            assert await redis.get("k") == b"v"
+            assert len(fake.connections) == 2
+            await redis.close()
+
+    def test_factory(self):
+        """Test the backend is selected from settings and bad names fail fast."""
+        assert not create_coordination_backend(Settings()).shared
+        pytest.importorskip("redis")
+        assert create_coordination_backend(Settings(coordination_backend="redis")).shared
+        with pytest.raises(ValueError, match="Unknown coordination backend"):
+            create_coordination_backend(Settings(coordination_backend="etcd"))
+
+
+class TestSharedState:
+    """Test job records, locks, rate limits and cached results shared between workers."""
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_spans_workers(self):
+        """Test two limiters on one backend share the burst and then wait for the next window."""
+        shared = MemoryBackend()
+        first = SharedRateLimiter(shared, rate=20, burst=2)
+        second = SharedRateLimiter(shared, rate=20, burst=2)
+        await first.acquire()
+        await second.acquire()
+        window_end = (int(time.time() // 0.1) + 1) * 0.1
+
+        await first.acquire()
+
+        assert time.time() >= window_end - 0.01
+
+    @pytest.mark.asyncio
+    async def test_shared_flight_runs_once(self):
+        """Test a second worker waits for the first worker's published result."""
+        shared = MemoryBackend()
+        published = {}
+        calls = []
+
+        async def run():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            published["k"] = "image"
+            return "image"
+
+        async def lookup():
+            return published.get("k")
+
+        workers = [SharedFlight(shared, poll_interval=0.01) for _ in range(2)]
+        results = await asyncio.gather(*(w.do("k", run, lookup, ttl=5) for w in workers))
+
+        assert results == ["image", "image"]
+        assert len(calls) == 1
+        assert workers[1].stats.coalesced == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_flight_takes_over_after_failure(self):
+        """Test a waiting worker runs the call itself if the holder fails."""
+        shared = MemoryBackend()
+
+        async def fail():
+            await asyncio.sleep(0.02)
+            raise RuntimeError("boom")
+
+        async def succeed():
+            return "image"
+
+        async def lookup():
+            return None
+
+        holder = asyncio.create_task(SharedFlight(shared, 0.01).do("k", fail, lookup, ttl=5))
+        await asyncio.sleep(0)
+        assert await SharedFlight(shared, 0.01).do("k", succeed, lookup, ttl=5) == "image"
+        with pytest.raises(RuntimeError):
+            await holder
+
+    @pytest.mark.asyncio
+    async def test_result_cache_shared_between_workers(self):
+        """Test a result cached by one worker is a hit for another."""
+        shared = MemoryBackend()
+        first, second = ResultCache(shared=shared), ResultCache(shared=shared)
+        await first.put("k", {"image_data": b"\x89PNG\n\x00", "seed": 1})
+
+        result = await second.get("k")
+
+        assert result == {"image_data": b"\x89PNG\n\x00", "seed": 1}
+        assert second.stats.shared_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_job_store_shared_between_workers(self):
+        """Test jobs and images written by one worker are read by another."""
+        shared = MemoryBackend()
+        first, second = SharedJobStore(shared, ttl=60), SharedJobStore(shared, ttl=60)
+        job = JobRecord(request={"prompt": "p"}, timeout=10)
+        await first.save(job)
+        await first.set_image(job.id, b"a\nb", "image/png")
+
+        assert (await second.get(job.id)).request == {"prompt": "p"}
+        assert await second.get_image(job.id) == (b"a\nb", "image/png")
+        assert [j.id for j in await second.list_unfinished()] == [job.id]
+
+        job.status = JobStatus.DOWNLOADED
+        await first.save(job)
+        assert await second.list_unfinished() == []
+
+    @pytest.mark.asyncio
+    async def test_events_followed_from_another_worker(self, monkeypatch):
+        """Test a job's progress streams on a worker that is not running it."""
+        monkeypatch.setattr(job_manager, "SHARED_EVENT_POLL", 0.01)
+        pytest.importorskip("redis")
+        async with running_redis() as fake:
+            redis = RedisBackend(fake.url)
+            store = SharedJobStore(redis, ttl=60)
+            job = JobRecord(request={"prompt": "p"}, timeout=10)
+            job.events.append({"status": "queued"})
+            await store.save(job)
+            follower = JobManager(MagicMock(), store, Settings())
+
+            async def finish_elsewhere():
+                await asyncio.sleep(0.05)
+                job.status = JobStatus.DOWNLOADED
+                job.events.append({"status": "downloaded"})
+                await store.save(job)
+
+            writer = asyncio.create_task(finish_elsewhere())
+            statuses = [event["status"] async for event in follower.events(job.id)]
+            await writer
+
+            assert statuses == ["queued", "downloaded"]
+            await redis.close()
+
+
+class TestServiceCoordination:
+    """Test services on different workers act as one."""
+
+    @pytest.mark.asyncio
+    async def test_identical_seeded_requests_share_one_job_across_workers(self):
+        """Test two services on one Redis submit a seeded generation once."""
+        pytest.importorskip("redis")
+        async with running_redis() as fake:
+            config = Settings(
+                coordination_backend="redis",
+                redis_url=fake.url,
+                result_cache_enabled=True,
+                poll_strategy="fixed",
+                poll_interval=0.05,
+            )
+            client = MagicMock()
+            client.image.create = AsyncMock(
+                return_value={"token": "tok", "jobs": [{"jobId": "j", "cost": 1}]}
+            )
+            client.jobs.get = AsyncMock(return_value={
+                "token": "tok",
+                "jobs": [{"jobId": "j", "result": [{"available": True, "blobUrl": "u", "seed": 7}]}],
+            })
+            workers = [CivitaiService("token", config) for _ in range(2)]
+            for service in workers:
+                service.tokens.keys[0].client = client
+                service.shared_flight.poll_interval = 0.01
+                service.download_image = AsyncMock(return_value=(b"png", "image/png"))
+            request = GenerateImageRequest(model="m", prompt="p", seed=7)
+
+            results = await asyncio.gather(
+                *(service.generate_and_download(request) for service in workers)
+            )
+
+            assert [r["image_data"] for r in results] == [b"png", b"png"]
+            assert client.image.create.await_count == 1
+            assert workers[0].admission.rate == 0
+            for service in workers:
+                await service.close()
@@ -0,0 +1,189 @@
+"""Unit tests for the cost ledger and budgets."""
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service
+from src.api.main import create_app
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.cost_ledger import BudgetExceeded, CostLedger, window_bounds
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+
+
+def _jobs(*costs):
+    return [{"jobId": f"j{i}", "cost": cost} for i, cost in enumerate(costs)]
+
+
+class TestWindows:
+    """Test budget window boundaries."""
+
+    def test_month_rolls_over_year(self):
+        """Test December's window ends at the start of January."""
+        now = datetime(2025, 12, 15, 8, tzinfo=timezone.utc).timestamp()
+        start, end = window_bounds("month", now)
+        assert start == datetime(2025, 12, 1, tzinfo=timezone.utc).timestamp()
+        assert end == datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+
+    def test_unknown_window_rejected(self):
+        """Test misconfigured budgets fail at startup."""
+        with pytest.raises(ValueError, match="Unknown budget window"):
+            CostLedger(budgets={"*": {"fortnight": 10}})
+
+
+class TestCostLedger:
+    """Test recording, summaries and budget checks."""
+
+    @pytest.mark.asyncio
+    async def test_summary_groups_spend(self):
+        """Test spend can be summarized by caller, model and key."""
+        ledger = CostLedger()
+        await ledger.record("alice", "m1", "...aaaa", _jobs(2, 3))
+        await ledger.record("bob", "m2", "...bbbb", _jobs(10))
+
+        by_caller = await ledger.summary("caller")
+        by_model = await ledger.summary("model", caller="alice")
+
+        assert by_caller == [
+            {"caller": "bob", "jobs": 1, "cost": 10},
+            {"caller": "alice", "jobs": 2, "cost": 5},
+        ]
+        assert by_model == [{"model": "m1", "jobs": 2, "cost": 5}]
+        with pytest.raises(ValueError):
+            await ledger.summary("prompt")
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_caller_budget_enforced(self):
+        """Test a caller is stopped once its window budget is spent, others are not."""
+        ledger = CostLedger(budgets={"*": {"day": 10}})
+        await ledger.record("alice", MODEL, "k", _jobs(6, 4))
+
+        with pytest.raises(BudgetExceeded) as exc:
+            await ledger.check("alice", MODEL)
+        assert exc.value.window == "day"
+        assert 0 < exc.value.retry_after <= 86400
+        await ledger.check("bob", MODEL)
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_global_budget_covers_all_callers(self):
+        """Test the "all" budget limits the combined spend of every caller."""
+        ledger = CostLedger(budgets={"all": {"hour": 5}})
+        await ledger.record("alice", MODEL, "k", _jobs(3))
+        await ledger.record("bob", MODEL, "k", _jobs(3))
+
+        with pytest.raises(BudgetExceeded, match="All callers"):
+            await ledger.check("carol", MODEL)
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_reservations_prevent_concurrent_overshoot(self):
+        """Test in-flight submissions count against the budget at the model's last cost."""
+        ledger = CostLedger(budgets={"*": {"day": 10}})
+        await ledger.record("alice", MODEL, "k", _jobs(4))
+
+        estimate = await ledger.reserve("alice", MODEL)
+        with pytest.raises(BudgetExceeded):
+            await ledger.reserve("alice", MODEL)
+        ledger.release("alice", estimate)
+
+        assert estimate == 4
+        await ledger.check("alice", MODEL)
+        await ledger.close()
+
+    @pytest.mark.asyncio
+    async def test_spend_survives_restart(self, tmp_path):
+        """Test current-window spend is reloaded from the database."""
+        path = str(tmp_path / "costs.db")
+        ledger = CostLedger(path, budgets={"alice": {"month": 5}})
+        await ledger.record("alice", MODEL, "k", _jobs(5))
+        await ledger.close()
+
+        reopened = CostLedger(path, budgets={"alice": {"month": 5}})
+        with pytest.raises(BudgetExceeded):
+            await reopened.check("alice", MODEL)
+        [status] = await reopened.budget_status("alice")
+        assert status["spent"] == 5
+        assert status["remaining"] == 0
+        await reopened.close()
+
+
+class TestServiceBudgets:
+    """Test the service charges and checks the caller."""
+
+    @pytest.mark.asyncio
+    async def test_submission_recorded_and_budget_stops_the_next(self):
+        """Test costs are recorded per caller and key, and block once the budget is spent."""
+        service = CivitaiService(
+            "token-1234",
+            Settings(cost_budgets={"*": {"day": 5}}, poll_strategy="fixed", poll_interval=0),
+        )
+        client = MagicMock()
+        client.image.create = AsyncMock(
+            return_value={"token": "tok", "jobs": [{"jobId": "j", "cost": 5}]}
+        )
+        client.jobs.get = AsyncMock(return_value={
+            "token": "tok",
+            "jobs": [{"jobId": "j", "result": [{"available": True, "blobUrl": "u", "seed": 1}]}],
+        })
+        service.tokens.keys[0].client = client
+        request = GenerateImageRequest(model=MODEL, prompt="p")
+
+        await service.generate(request, caller="agent")
+        with pytest.raises(BudgetExceeded):
+            await service.generate(request, caller="agent")
+
+        assert client.image.create.await_count == 1
+        assert await service.ledger.summary("api_key") == [
+            {"api_key": "...1234", "jobs": 1, "cost": 5}
+        ]
+        await service.close()
+
+
+class TestCostRoutes:
+    """Test budget errors and spend summaries over HTTP."""
+
+    @pytest.fixture
+    def app(self):
+        """App whose service has a real ledger."""
+        service = MagicMock()
+        service.ledger = CostLedger(budgets={"*": {"day": 1}})
+        service.get_cached = AsyncMock(return_value=None)
+        service.generate_and_download = AsyncMock(
+            side_effect=BudgetExceeded("agent", "day", 1, 1, 3600)
+        )
+        app = create_app()
+        app.dependency_overrides[get_civitai_service] = lambda: service
+        return app
+
+    def test_budget_exceeded_is_402(self, app):
+        """Test a spent budget returns 402 with Retry-After, charged to X-Client-Id."""
+        response = TestClient(app).post(
+            "/images", json={"model": MODEL, "prompt": "p"}, headers={"X-Client-Id": "agent"}
+        )
+
+        assert response.status_code == 402
+        assert response.headers["Retry-After"] == "3600"
+        service = app.dependency_overrides[get_civitai_service]()
+        assert service.generate_and_download.await_args.kwargs["caller"] == "agent"
+
+    def test_summary_and_budget(self, app):
+        """Test the summary and budget endpoints report recorded spend."""
+        import asyncio
+
+        service = app.dependency_overrides[get_civitai_service]()
+        asyncio.run(service.ledger.record("agent", MODEL, "k", _jobs(0.5)))
+        client = TestClient(app)
+
+        summary = client.get("/costs", params={"group_by": "model"}).json()
+        budget = client.get("/costs/budget", headers={"X-Client-Id": "agent"}).json()
+
+        assert summary["total"] == 0.5
+        assert summary["groups"] == [{"model": MODEL, "jobs": 1, "cost": 0.5}]
+        assert budget["budgets"][0]["remaining"] == 0.5
@@ -0,0 +1,167 @@
+"""Unit tests for image routes."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service
+from src.api.main import create_app
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+
+
+@pytest.fixture
+def service():
+    """Mocked Civitai service."""
+    service = MagicMock()
+    service.get_cached = AsyncMock(return_value=None)
+    service.artifacts = None
+    service.apply_output = AsyncMock(side_effect=lambda result, options: result)
+    return service
+
+
+@pytest.fixture
+def client(service):
+    """Test client with the service dependency overridden."""
+    app = create_app()
+    app.dependency_overrides[get_civitai_service] = lambda: service
+    return TestClient(app)
+
+
+class TestStreamingImage:
+    """Test streaming image responses."""
+
+    def test_stream_passes_chunks_through(self, client, service):
+        """Test the blob is streamed in chunks with metadata headers."""
+        released = []
+
+        async def chunks():
+            try:
+                yield b"abc"
+                yield b"def"
+            finally:
+                released.append(True)
+
+        service.generate = AsyncMock(
+            return_value={"seed": 7, "cost": 1.5, "job_id": "job-1", "blob_url": "http://blob"}
+        )
+        service.open_image_stream = AsyncMock(return_value=(chunks(), "image/jpeg", "6"))
+
+        response = client.post(
+            "/images",
+            json={"model": MODEL, "prompt": "cat", "return_image": True, "stream": True},
+        )
+
+        assert response.status_code == 200
+        assert response.content == b"abcdef"
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.headers["x-seed"] == "7"
+        assert response.headers["x-cost"] == "1.5"
+        assert response.headers["x-job-id"] == "job-1"
+        assert released == [True]
+        service.open_image_stream.assert_awaited_once_with("http://blob")
+
+    def test_buffered_mode_unchanged(self, client, service):
+        """Test return_image without stream still buffers the full image."""
+        service.generate_and_download = AsyncMock(
+            return_value={"image_data": b"img", "seed": 1, "job_id": "job-2", "cost": 1}
+        )
+
+        response = client.post(
+            "/images", json={"model": MODEL, "prompt": "cat", "return_image": True}
+        )
+
+        assert response.status_code == 200
+        assert response.content == b"img"
+        assert response.headers["x-job-id"] == "job-2"
+
+
+class TestBatchImages:
+    """Test the batch endpoint."""
+
+    def test_batch_returns_every_image(self, client, service):
+        """Test all batch results are returned with metadata."""
+        service.generate_batch = AsyncMock(return_value=[
+            {"job_id": f"job-{i}", "seed": i, "cost": 1, "blob_url": f"http://blob/{i}",
+             "prompt": "cat", "model": MODEL}
+            for i in range(3)
+        ])
+
+        response = client.post(
+            "/images/batch",
+            json={"requests": [{"model": MODEL, "prompt": "cat"}], "quantity": 3},
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 3
+        assert [image["job_id"] for image in body["images"]] == ["job-0", "job-1", "job-2"]
+        kwargs = service.generate_batch.call_args.kwargs
+        assert kwargs["quantity"] == 3
+        assert kwargs["download"] is False
+
+    def test_batch_reports_failed_entries(self, client, service):
+        """Test failed entries are returned in place alongside the images that succeeded."""
+        service.generate_batch = AsyncMock(return_value=[
+            {"job_id": "job-0", "seed": 0, "cost": 1, "blob_url": "http://blob/0",
+             "prompt": "cat", "model": MODEL},
+            {"prompt": "dog", "model": MODEL, "error": "upstream unavailable"},
+        ])
+
+        response = client.post(
+            "/images/batch",
+            json={"requests": [
+                {"model": MODEL, "prompt": "cat"}, {"model": MODEL, "prompt": "dog"}
+            ]},
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["success"], body["count"], body["failed"]) == (False, 2, 1)
+        assert body["images"][0]["job_id"] == "job-0"
+        assert body["images"][1]["error"] == "upstream unavailable"
+
+    def test_batch_limit_maps_to_400(self, client, service):
+        """Test batch validation errors are reported as bad requests."""
+        service.generate_batch = AsyncMock(side_effect=ValueError("too many"))
+
+        response = client.post(
+            "/images/batch",
+            json={"requests": [{"model": MODEL, "prompt": "cat"}], "quantity": 64},
+        )
+
+        assert response.status_code == 400
+
+
+class TestResultCache:
+    """Test cache reporting on the image route."""
+
+    def test_cache_status_in_json(self, client, service):
+        """Test the cache hit/miss status is reported in JSON responses."""
+        service.generate_and_download = AsyncMock(return_value={
+            "image_data": b"img", "seed": 5, "job_id": "job-1", "cost": 1,
+            "blob_url": "http://blob", "prompt": "cat", "model": MODEL, "cache": "hit",
+        })
+
+        response = client.post("/images", json={"model": MODEL, "prompt": "cat", "seed": 5})
+
+        assert response.json()["cache"] == "hit"
+
+    def test_stream_serves_cache_hits_directly(self, client, service):
+        """Test streaming requests skip generation on a cache hit."""
+        service.get_cached = AsyncMock(return_value={
+            "image_data": b"cached", "content_type": "image/png", "seed": 5,
+            "job_id": "job-1", "cost": 1, "cache": "hit",
+        })
+        service.generate = AsyncMock()
+
+        response = client.post(
+            "/images",
+            json={"model": MODEL, "prompt": "cat", "seed": 5,
+                  "return_image": True, "stream": True},
+        )
+
+        assert response.content == b"cached"
+        assert response.headers["x-cache"] == "hit"
+        service.generate.assert_not_awaited()
@@ -0,0 +1,192 @@
+"""Unit tests for the job journal, shutdown drain and resume after restart."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.models.job import JobRecord, JobStatus
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.job_journal import JobJournal, JournalEntry
+from src.core.services.job_manager import JobManager
+from src.core.services.job_store import MemoryJobStore, SqliteJobStore
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+REQUEST = {"model": MODEL, "prompt": "p"}
+
+
+def _entry(token: str, job_id=None) -> JournalEntry:
+    return JournalEntry(
+        token=token,
+        request=REQUEST,
+        jobs=[{"jobId": f"{token}-job", "cost": 1}],
+        key="...oken",
+        job_id=job_id,
+    )
+
+
+def _service(path: str, available: bool = True, **overrides) -> CivitaiService:
+    """Service journaling to path whose upstream jobs finish on the first poll."""
+    service = CivitaiService(
+        "token",
+        Settings(job_journal_path=path, poll_strategy="fixed", poll_interval=0.01, **overrides),
+    )
+    client = MagicMock()
+    client.image.create = AsyncMock(
+        return_value={"token": "tok", "jobs": [{"jobId": "tok-job", "cost": 1}]}
+    )
+    result = [{"available": available, "blobUrl": "http://blob", "seed": 3}]
+    client.jobs.get = AsyncMock(side_effect=lambda token: {
+        "token": token, "jobs": [{"jobId": f"{token}-job", "result": result}],
+    })
+    service.tokens.keys[0].client = client
+    service.download_image = AsyncMock(return_value=(b"img", "image/png"))
+    return service
+
+
+async def _wait_final(manager: JobManager, job_id: str) -> JobRecord:
+    for _ in range(200):
+        job = await manager.get(job_id)
+        if job is not None and job.status.is_final:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+class TestJobJournal:
+    """Test journal replay and compaction."""
+
+    @pytest.mark.asyncio
+    async def test_outstanding_submissions_survive_reopen(self, tmp_path):
+        """Test only submissions without a completion are replayed."""
+        path = str(tmp_path / "journal.jsonl")
+        journal = JobJournal(path)
+        await journal.submit(_entry("a", job_id="job-a"))
+        await journal.submit(_entry("b"))
+        await journal.done("b")
+
+        [entry] = JobJournal(path).pending()
+
+        assert entry.token == "a"
+        assert entry.job_id == "job-a"
+
+    @pytest.mark.asyncio
+    async def test_torn_line_skipped_and_file_compacted(self, tmp_path):
+        """Test a partial last write is ignored and completed records are dropped on open."""
+        path = tmp_path / "journal.jsonl"
+        journal = JobJournal(str(path))
+        for token in "abc":
+            await journal.submit(_entry(token))
+        await journal.done("a")
+        with path.open("a") as f:
+            f.write('{"op": "submit", "ent')
+
+        reopened = JobJournal(str(path))
+
+        assert [entry.token for entry in reopened.pending()] == ["b", "c"]
+        assert len(path.read_text().splitlines()) == 2
+
+
+class TestServiceJournal:
+    """Test the service journals submissions until they are delivered."""
+
+    @pytest.mark.asyncio
+    async def test_finished_generation_leaves_nothing(self, tmp_path):
+        """Test a completed generation is removed from the journal."""
+        service = _service(str(tmp_path / "journal.jsonl"))
+
+        await service.generate(GenerateImageRequest(**REQUEST))
+
+        assert service.journal.pending() == []
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_interrupted_generation_stays_journaled(self, tmp_path):
+        """Test a wait cancelled by shutdown keeps the paid token for the next process."""
+        path = str(tmp_path / "journal.jsonl")
+        service = _service(path, available=False)
+
+        task = asyncio.create_task(service.generate(GenerateImageRequest(**REQUEST)))
+        await asyncio.sleep(0.05)
+        assert not await service.drain(timeout=0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await service.close()
+
+        [entry] = JobJournal(path).pending()
+        assert entry.token == "tok"
+        assert entry.key == "...oken"
+
+    @pytest.mark.asyncio
+    async def test_recover_caches_seeded_results(self, tmp_path):
+        """Test a process without a job API resumes journaled jobs into the result cache."""
+        path = str(tmp_path / "journal.jsonl")
+        journal = JobJournal(path)
+        entry = _entry("tok")
+        entry.request = {**REQUEST, "seed": 3}
+        await journal.submit(entry)
+        service = _service(path, result_cache_enabled=True)
+
+        assert service.recover() == 1
+        await asyncio.gather(*service._recovering)
+
+        cached = await service.get_cached(GenerateImageRequest(**entry.request))
+        assert cached["image_data"] == b"img"
+        assert service.journal.pending() == []
+        await service.close()
+
+
+class TestResume:
+    """Test the job manager picks up interrupted jobs on startup."""
+
+    @pytest.mark.asyncio
+    async def test_journaled_job_resumed_under_its_id(self, tmp_path):
+        """Test a job lost with a process-local store is polled again and its image stored."""
+        path = str(tmp_path / "journal.jsonl")
+        await JobJournal(path).submit(_entry("tok", job_id="job-1"))
+        service = _service(path)
+        manager = JobManager(service, MemoryJobStore(), Settings())
+
+        recovery = await manager.resume()
+        job = await _wait_final(manager, "job-1")
+
+        assert recovery["jobs"] == 1
+        assert job.status == JobStatus.DOWNLOADED
+        assert await manager.get_image("job-1") == (b"img", "image/png")
+        service.tokens.keys[0].client.image.create.assert_not_awaited()
+        assert service.journal.pending() == []
+        await manager.close()
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_stored_jobs_restarted_or_failed(self, tmp_path):
+        """Test queued jobs are run again and jobs without a journaled token are failed."""
+        store = SqliteJobStore(str(tmp_path / "jobs.db"))
+        queued = JobRecord(request=REQUEST)
+        lost = JobRecord(request=REQUEST, status=JobStatus.PROCESSING, token="gone")
+        await store.save(queued)
+        await store.save(lost)
+        service = _service(str(tmp_path / "journal.jsonl"))
+        manager = JobManager(service, store, Settings())
+
+        recovery = await manager.resume()
+
+        assert (recovery["jobs"], recovery["failed"]) == (1, 1)
+        assert (await _wait_final(manager, queued.id)).status == JobStatus.DOWNLOADED
+        assert (await manager.get(lost.id)).status == JobStatus.FAILED
+        await manager.close()
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_close_drains_running_jobs(self, tmp_path):
+        """Test shutdown waits for running jobs up to the deadline instead of cancelling them."""
+        service = _service(str(tmp_path / "journal.jsonl"))
+        manager = JobManager(service, MemoryJobStore(), Settings())
+        job = await manager.submit(GenerateImageRequest(**REQUEST))
+
+        await manager.close(drain_timeout=5)
+
+        assert (await manager.get(job.id)).status == JobStatus.DOWNLOADED
+        await service.close()
@@ -0,0 +1,127 @@
+"""Unit tests for the shared job tracker."""
+
+import asyncio
+
+import pytest
+
+from src.core.services.job_tracker import JobTracker, collect_results
+from src.core.services.polling import FixedPolling
+
+
+def _status(token: str, done: bool, count: int = 1) -> dict:
+    """Build a status response for a token with count jobs."""
+    return {
+        "token": token,
+        "jobs": [
+            {
+                "jobId": f"{token}-{i}",
+                "result": [{
+                    "available": done,
+                    "blobUrl": f"http://blob/{token}-{i}" if done else None,
+                    "seed": i,
+                }],
+            }
+            for i in range(count)
+        ],
+    }
+
+
+class FakeUpstream:
+    """Status endpoint where each token completes after a number of polls."""
+
+    def __init__(self, polls_needed: int = 2):
+        self.polls_needed = polls_needed
+        self.calls: dict[str, int] = {}
+
+    async def fetch(self, token: str) -> dict:
+        self.calls[token] = self.calls.get(token, 0) + 1
+        return _status(token, self.calls[token] >= self.polls_needed)
+
+
+class TestJobTracker:
+    """Test the shared poller."""
+
+    @pytest.mark.asyncio
+    async def test_many_tokens_share_one_poller(self):
+        """Test concurrent waiters are served by one task and few ticks."""
+        upstream = FakeUpstream(polls_needed=2)
+        tracker = JobTracker(upstream.fetch)
+
+        results = await asyncio.gather(*(
+            tracker.wait(f"t{i}", [f"t{i}-0"], timeout=5, strategy=FixedPolling(0.01))
+            for i in range(50)
+        ))
+
+        assert [r[0]["blobUrl"] for r in results] == [
+            f"http://blob/t{i}-0" for i in range(50)
+        ]
+        assert tracker.poll_calls == 100
+        assert tracker.ticks <= 4
+        assert tracker.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_waiters_on_same_token_share_requests(self):
+        """Test two waiters on one token trigger a single status call per tick."""
+        upstream = FakeUpstream(polls_needed=3)
+        tracker = JobTracker(upstream.fetch)
+
+        first, second = await asyncio.gather(
+            tracker.wait("t", ["t-0"], timeout=5, strategy=FixedPolling(0.01)),
+            tracker.wait("t", ["t-0"], timeout=5, strategy=FixedPolling(0.01)),
+        )
+
+        assert first == second
+        assert upstream.calls["t"] == 3
+
+    @pytest.mark.asyncio
+    async def test_timeout_stops_tracking(self):
+        """Test a timed-out waiter raises and the token is dropped."""
+        upstream = FakeUpstream(polls_needed=1000)
+        tracker = JobTracker(upstream.fetch)
+
+        with pytest.raises(TimeoutError, match="did not complete"):
+            await tracker.wait("t", ["t-0"], timeout=0.05, strategy=FixedPolling(0.01))
+
+        assert tracker.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_fetch_errors_propagate_to_waiters(self):
+        """Test a status error fails the waiters on that token."""
+        async def fetch(token):
+            raise ValueError("Unexpected status response format")
+
+        tracker = JobTracker(fetch)
+
+        with pytest.raises(ValueError, match="Unexpected status"):
+            await tracker.wait("t", ["t-0"], timeout=5, strategy=FixedPolling(0.01))
+
+    @pytest.mark.asyncio
+    async def test_close_fails_outstanding_waiters(self):
+        """Test close() cancels the poller and fails pending waiters."""
+        upstream = FakeUpstream(polls_needed=1000)
+        tracker = JobTracker(upstream.fetch)
+
+        waiter = asyncio.ensure_future(
+            tracker.wait("t", ["t-0"], timeout=5, strategy=FixedPolling(0.01))
+        )
+        await asyncio.sleep(0.02)
+        await tracker.close()
+
+        with pytest.raises(RuntimeError, match="closed"):
+            await waiter
+
+
+class TestCollectResults:
+    """Test completion detection."""
+
+    def test_incomplete_returns_none(self):
+        """Test None is returned until every job is available."""
+        status = _status("t", done=True, count=1)
+        assert collect_results(status, ["t-0", "t-1"]) is None
+
+    def test_results_follow_submitted_order(self):
+        """Test results are ordered by submitted job id."""
+        status = _status("t", done=True, count=2)
+        status["jobs"].reverse()
+        results = collect_results(status, ["t-0", "t-1"])
+        assert [r["seed"] for r in results] == [0, 1]
@@ -0,0 +1,220 @@
+"""Unit tests for the asynchronous job API."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_job_manager
+from src.api.main import create_app
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.models.job import JobRecord, JobStatus
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.job_manager import JobManager
+from src.core.services.job_store import MemoryJobStore, SqliteJobStore
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+
+
+def _service() -> CivitaiService:
+    """Service whose generation completes immediately."""
+    service = CivitaiService("token", Settings())
+
+    async def generate(request, timeout, poll_strategy, on_status, priority="normal", caller="anonymous",
+                       job_id=None):
+        await on_status("processing", {"token": "tok", "job_id": "job-1", "cost": 1})
+        result = {"seed": 9, "job_id": "job-1", "cost": 1, "blob_url": "http://blob",
+                  "prompt": request.prompt, "model": request.model}
+        await on_status("available", result)
+        return result
+
+    service.generate = AsyncMock(side_effect=generate)
+    service.download_image = AsyncMock(return_value=(b"img", "image/webp"))
+    service.send_callback = AsyncMock()
+    return service
+
+
+async def _wait_final(manager: JobManager, job_id: str) -> JobRecord:
+    """Wait until a job reaches a final status."""
+    for _ in range(100):
+        job = await manager.get(job_id)
+        if job.status.is_final:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+class TestJobStores:
+    """Test the job store implementations."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("kind", ["memory", "sqlite"])
+    async def test_round_trip(self, kind, tmp_path):
+        """Test records and images are stored and listed."""
+        store = MemoryJobStore() if kind == "memory" else SqliteJobStore(str(tmp_path / "jobs.db"))
+        done = JobRecord(request={"model": "m", "prompt": "p"}, status=JobStatus.DOWNLOADED)
+        running = JobRecord(request={"model": "m", "prompt": "p"}, token="tok")
+        await store.save(done)
+        await store.save(running)
+        await store.set_image(done.id, b"img", "image/png")
+
+        loaded = await store.get(running.id)
+        assert loaded.token == "tok"
+        assert loaded.status == JobStatus.QUEUED
+        assert await store.get_image(done.id) == (b"img", "image/png")
+        assert await store.get_image(running.id) is None
+        assert [job.id for job in await store.list_unfinished()] == [running.id]
+        assert await store.purge(older_than=done.updated_at + 3600) == 2
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_survives_reopen(self, tmp_path):
+        """Test jobs persist across store instances."""
+        path = str(tmp_path / "jobs.db")
+        store = SqliteJobStore(path)
+        job = JobRecord(request={"model": "m", "prompt": "p"})
+        await store.save(job)
+        await store.close()
+
+        reopened = SqliteJobStore(path)
+        assert (await reopened.get(job.id)).request == {"model": "m", "prompt": "p"}
+        await reopened.close()
+
+
+class TestJobManager:
+    """Test background job execution."""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_to_completion_and_notifies(self):
+        """Test the job is downloaded, stored and the callback is called."""
+        service = _service()
+        manager = JobManager(service, MemoryJobStore(), Settings())
+
+        job = await manager.submit(
+            GenerateImageRequest(model="m", prompt="p"), callback_url="http://hook"
+        )
+        assert job.status == JobStatus.QUEUED
+
+        job = await _wait_final(manager, job.id)
+        await asyncio.sleep(0)
+
+        assert job.status == JobStatus.DOWNLOADED
+        assert job.token == "tok"
+        assert job.result["seed"] == 9
+        assert await manager.get_image(job.id) == (b"img", "image/webp")
+        url, payload = service.send_callback.call_args.args
+        assert url == "http://hook"
+        assert payload["status"] == "downloaded"
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_recorded(self):
+        """Test a generation error marks the job failed."""
+        service = _service()
+        service.generate = AsyncMock(side_effect=TimeoutError("too slow"))
+        manager = JobManager(service, MemoryJobStore(), Settings())
+
+        job = await manager.submit(GenerateImageRequest(model="m", prompt="p"))
+        job = await _wait_final(manager, job.id)
+
+        assert job.status == JobStatus.FAILED
+        assert job.error == "too slow"
+        await manager.close()
+
+
+class TestJobRoutes:
+    """Test the job endpoints."""
+
+    def test_submit_status_and_result(self):
+        """Test a job can be submitted, inspected and its image fetched."""
+        manager = JobManager(_service(), MemoryJobStore(), Settings())
+        app = create_app()
+        app.dependency_overrides[get_job_manager] = lambda: manager
+
+        with TestClient(app) as client:
+            response = client.post("/jobs", json={"model": MODEL, "prompt": "cat"})
+            assert response.status_code == 202
+            job_id = response.json()["id"]
+
+            for _ in range(100):
+                status = client.get(f"/jobs/{job_id}").json()["status"]
+                if status == "downloaded":
+                    break
+
+            result = client.get(f"/jobs/{job_id}/result")
+            assert result.status_code == 200
+            assert result.content == b"img"
+            assert result.headers["x-seed"] == "9"
+
+    def test_unknown_job_is_404(self):
+        """Test missing jobs return 404."""
+        manager = JobManager(_service(), MemoryJobStore(), Settings())
+        app = create_app()
+        app.dependency_overrides[get_job_manager] = lambda: manager
+
+        with TestClient(app) as client:
+            assert client.get("/jobs/missing").status_code == 404
+            assert client.get("/jobs/missing/result").status_code == 404
+
+
+class TestJobEvents:
+    """Test progress event streams."""
+
+    @pytest.mark.asyncio
+    async def test_live_subscriber_sees_every_transition(self):
+        """Test a subscriber receives each status with phase timing."""
+        manager = JobManager(_service(), MemoryJobStore(), Settings())
+        job = await manager.submit(GenerateImageRequest(model="m", prompt="p"))
+
+        events = [event async for event in manager.events(job.id)]
+
+        assert [event["status"] for event in events] == [
+            "queued", "processing", "available", "downloaded"
+        ]
+        assert events[1]["phase"] == "queued"
+        assert all(event["phase_duration"] >= 0 for event in events)
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_events_keep_this_jobs_id_and_hide_upstream_token(self):
+        """Test upstream details cannot replace the job id and the job token is not published."""
+        manager = JobManager(_service(), MemoryJobStore(), Settings())
+        job = await manager.submit(GenerateImageRequest(model="m", prompt="p"))
+
+        events = [event async for event in manager.events(job.id)]
+        stored = await manager.get(job.id)
+
+        assert {event["job_id"] for event in events + stored.events} == {job.id}
+        assert all("token" not in event for event in events + stored.events)
+        assert stored.token == "tok"
+        assert events[2]["seed"] == 9
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_job_raises(self):
+        """Test subscribing to a missing job raises KeyError."""
+        manager = JobManager(_service(), MemoryJobStore(), Settings())
+        with pytest.raises(KeyError):
+            async for _ in manager.events("missing"):
+                pass
+
+    def test_sse_and_websocket_replay_finished_job(self):
+        """Test SSE and WebSocket streams deliver the job history."""
+        manager = JobManager(_service(), MemoryJobStore(), Settings())
+        app = create_app()
+        app.dependency_overrides[get_job_manager] = lambda: manager
+
+        with TestClient(app) as client:
+            job_id = client.post("/jobs", json={"model": MODEL, "prompt": "cat"}).json()["id"]
+
+            response = client.get(f"/jobs/{job_id}/events")
+            assert response.headers["content-type"].startswith("text/event-stream")
+            names = [line.split(": ", 1)[1] for line in response.text.splitlines()
+                     if line.startswith("event: ")]
+            assert names == ["queued", "processing", "available", "downloaded"]
+
+            with client.websocket_connect(f"/jobs/{job_id}/events/ws") as websocket:
+                statuses = [websocket.receive_json()["status"] for _ in range(4)]
+            assert statuses == ["queued", "processing", "available", "downloaded"]
@@ -1,10 +1,15 @@
 """Unit tests for MCP server."""
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from mcp import types
+from mcp.shared.memory import create_connected_server_and_client_session
 
-from src.mcp.server import generate_image
+from src.core.services.artifact_store import ArtifactStore
+from src.mcp import server
+from src.mcp.server import catalog, generate_image, mcp, service, settings
 
 
 class TestContentTypeFormatExtraction:
@@ -159,7 +164,7 @@ class TestGenerateImage:
             # Verify the call was made with correct parameters
             call_args = mock_service.generate_and_download.call_args
             assert call_args[1]["timeout"] == 300
-            assert call_args[1]["poll_interval"] == 3
+            assert call_args[1]["poll_strategy"] is None
 
             # Verify the request object
             request = call_args[1]["request"]
@@ -208,3 +213,117 @@ class TestGenerateImage:
 
             # Verify result
             assert result.format == "jpeg"
+
+
+class TestProgressNotifications:
+    """Test MCP progress notifications from generate_image."""
+
+    @pytest.mark.asyncio
+    async def test_status_transitions_are_reported(self):
+        """Test each status transition is sent as a progress notification."""
+        async def generate_and_download(request, timeout, poll_strategy, on_status, caller="mcp"):
+            await on_status("processing", {})
+            await on_status("available", {})
+            await on_status("downloaded", {})
+            return {"image_data": b"fake_image_data", "content_type": "image/png", "seed": 1}
+
+        ctx = MagicMock()
+        ctx.report_progress = AsyncMock()
+        with patch("src.mcp.server.service") as mock_service:
+            mock_service.generate_and_download = AsyncMock(side_effect=generate_and_download)
+
+            await generate_image(
+                model="urn:air:sd1:checkpoint:civitai:4384@128713",
+                prompt="test prompt",
+                ctx=ctx,
+            )
+
+        calls = [call.kwargs for call in ctx.report_progress.call_args_list]
+        assert [call["progress"] for call in calls] == [0, 1, 2, 3]
+        assert all(call["total"] == 3 for call in calls)
+        assert calls[1]["message"].startswith("processing (queued took")
+
+
+class TestImageResources:
+    """Test large images are returned as resource links and served lazily."""
+
+    @pytest.mark.asyncio
+    async def test_large_images_linked_small_inlined(self, tmp_path):
+        """Test images over the inline limit become links whose resource serves the bytes."""
+        store = ArtifactStore(str(tmp_path))
+        model = "urn:air:sd1:checkpoint:civitai:4384@128713"
+        results = [
+            {"image_data": b"small", "content_type": "image/png", "seed": 1},
+            {"image_data": b"x" * 100, "content_type": "image/jpeg", "seed": 2},
+        ]
+        with patch.object(settings, "mcp_image_inline_max_bytes", 10), \
+                patch.object(service, "artifacts", store), \
+                patch.object(service, "generate_and_download", AsyncMock(side_effect=results)):
+            small = await generate_image(model=model, prompt="p")
+            large = await generate_image(model=model, prompt="p")
+            [contents] = await mcp.read_resource(str(large.uri))
+
+            assert small.data == b"small"
+            assert isinstance(large, types.ResourceLink)
+            assert str(large.uri).startswith("civitai://image/")
+            assert (large.mimeType, large.size, large.meta["seed"]) == ("image/jpeg", 100, 2)
+            assert large.meta["correlation_id"] != small.meta["correlation_id"]
+            assert (contents.content, contents.mime_type) == (b"x" * 100, "image/jpeg")
+            with pytest.raises(ValueError, match="not in the local store"):
+                await mcp.read_resource("civitai://image/" + "0" * 64)
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_image_stored_by_earlier_process_served_by_template(self, tmp_path):
+        """Test a link to an image this process never delivered is read through the template."""
+        store = ArtifactStore(str(tmp_path))
+        artifact = await store.put("mcp:earlier", b"y" * 20, "image/png")
+
+        with patch.object(service, "artifacts", store):
+            [contents] = await mcp.read_resource(f"civitai://image/{artifact.sha256}")
+
+        assert (contents.content, contents.mime_type) == (b"y" * 20, "image/png")
+        await store.close()
+
+
+class TestCorrelation:
+    """Test tool calls are correlated with the client's request."""
+
+    @pytest.mark.asyncio
+    async def test_client_correlation_id_returned(self):
+        """Test a correlation_id sent in the request _meta comes back in the image _meta."""
+        ctx = MagicMock()
+        ctx.report_progress = AsyncMock()
+        ctx.client_id = None
+        ctx.request_context.meta.correlation_id = "chat-9"
+        ctx.request_context.meta.traceparent = None
+        result = {"image_data": b"img", "content_type": "image/png", "seed": 1}
+
+        with patch.object(service, "generate_and_download", AsyncMock(return_value=result)):
+            image = await generate_image(
+                model="urn:air:sd1:checkpoint:civitai:4384@128713", prompt="p", ctx=ctx
+            )
+
+        assert image.meta == {"seed": 1, "correlation_id": "chat-9"}
+
+
+class TestInitializedHook:
+    """Test the hook on FastMCP's private low-level server still runs after the handshake."""
+
+    @pytest.mark.asyncio
+    async def test_initialized_notification_reaches_hook(self):
+        """Test a client completing the handshake records the initialized milestone."""
+        server.startup.pop("initialized", None)
+        with patch.object(settings, "mcp_warmup", False), \
+                patch.object(catalog, "start", AsyncMock()), \
+                patch.object(catalog, "close", AsyncMock()), \
+                patch.object(service, "recover", MagicMock(return_value=0)), \
+                patch.object(service, "drain", AsyncMock()), \
+                patch.object(service, "close", AsyncMock()):
+            async with create_connected_server_and_client_session(mcp):
+                for _ in range(100):
+                    if "initialized" in server.startup:
+                        break
+                    await asyncio.sleep(0.01)
+
+        assert "initialized" in server.startup
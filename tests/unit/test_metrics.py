@@ -0,0 +1,116 @@
+"""Unit tests for pipeline metrics."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service
+from src.api.main import create_app
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.metrics import MetricsRegistry, PipelineMetrics
+
+
+class TestRegistry:
+    """Test metric families and text exposition."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test observations land in every bucket at or above them."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency.", ["phase"], buckets=(1, 5))
+        histogram.observe(0.5, phase="poll")
+        histogram.observe(3, phase="poll")
+        histogram.observe(10, phase="poll")
+
+        text = registry.render()
+
+        assert '# TYPE latency_seconds histogram' in text
+        assert 'latency_seconds_bucket{phase="poll",le="1"} 1' in text
+        assert 'latency_seconds_bucket{phase="poll",le="5"} 2' in text
+        assert 'latency_seconds_bucket{phase="poll",le="+Inf"} 3' in text
+        assert 'latency_seconds_sum{phase="poll"} 13.5' in text
+        assert 'latency_seconds_count{phase="poll"} 3' in text
+
+    def test_counter_labels_and_escaping(self):
+        """Test labelled counters render with escaped label values."""
+        registry = MetricsRegistry()
+        counter = registry.counter("errors_total", "Errors.", ["type"])
+        counter.inc(type='Bad "quote"')
+        counter.inc(2, type='Bad "quote"')
+
+        assert 'errors_total{type="Bad \\"quote\\""} 3' in registry.render()
+
+    def test_function_gauge_reads_at_scrape_time(self):
+        """Test callback gauges reflect the current value when rendered."""
+        registry = MetricsRegistry()
+        state = {"value": 1}
+        registry.gauge("in_flight", "In flight.", function=lambda: state["value"])
+        state["value"] = 4
+
+        assert "in_flight 4" in registry.render()
+
+    def test_phase_counts_errors_by_type(self):
+        """Test a failing phase is timed and its error type counted."""
+        metrics = PipelineMetrics()
+
+        with pytest.raises(TimeoutError):
+            with metrics.phase("poll"):
+                raise TimeoutError()
+
+        assert metrics.phase_seconds.count(phase="poll") == 1
+        assert metrics.upstream_errors.value(operation="poll", type="TimeoutError") == 1
+
+
+class TestServiceInstrumentation:
+    """Test the service records every pipeline phase."""
+
+    @pytest.mark.asyncio
+    async def test_generate_and_download_records_phases(self):
+        """Test a generation observes each phase, poll calls and downloaded bytes."""
+        service = CivitaiService("token", Settings(poll_strategy="fixed", poll_interval=0))
+        client = MagicMock()
+        client.image.create = AsyncMock(
+            return_value={"token": "tok", "jobs": [{"jobId": "j", "cost": 1}]}
+        )
+        client.jobs.get = AsyncMock(return_value={
+            "token": "tok",
+            "jobs": [{"jobId": "j", "result": [{"available": True, "blobUrl": "http://b", "seed": 1}]}],
+        })
+        service.tokens.keys[0].client = client
+        session = MagicMock()
+        response = MagicMock(status=200, headers={"Content-Type": "image/png"})
+        response.read = AsyncMock(return_value=b"12345")
+        session.get.return_value.__aenter__ = AsyncMock(return_value=response)
+        session.get.return_value.__aexit__ = AsyncMock(return_value=False)
+        service._session = session
+        session.closed = False
+
+        await service.generate_and_download(GenerateImageRequest(model="m", prompt="p"))
+
+        metrics = service.metrics
+        for phase in ("queue", "submit", "poll", "download"):
+            assert metrics.phase_seconds.count(phase=phase) == 1
+        assert metrics.poll_requests.value() == 1
+        assert metrics.downloaded_bytes.value() == 5
+        assert metrics.generations.value(cache="bypass") == 1
+        await service.tracker.close()
+
+
+class TestMetricsRoute:
+    """Test the /metrics endpoint."""
+
+    def test_metrics_endpoint_renders_text_format(self):
+        """Test /metrics serves the service registry in Prometheus format."""
+        service = CivitaiService("token", Settings())
+        service.metrics.poll_requests.inc(3)
+        app = create_app()
+        app.dependency_overrides[get_civitai_service] = lambda: service
+
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "civitai_poll_requests_total 3" in response.text
+        assert "civitai_in_flight_jobs 0" in response.text
@@ -0,0 +1,261 @@
+"""Unit tests for the model catalog."""
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service, get_model_catalog
+from src.api.main import create_app
+from src.core.services.model_catalog import ModelCatalog, entries_from_model, parse_urn
+
+SD1 = "urn:air:sd1:checkpoint:civitai:4384@128713"
+
+MODELS = [
+    {"id": 4384, "name": "DreamShaper", "type": "Checkpoint",
+     "modelVersions": [{"id": 128713, "name": "8", "baseModel": "SD 1.5", "air": SD1}]},
+    {"id": 101055, "name": "SD XL", "type": "Checkpoint",
+     "modelVersions": [{"id": 128078, "name": "v1.0 VAE fix", "baseModel": "SDXL 1.0"}]},
+    {"id": 58390, "name": "Detail Tweaker", "type": "LORA",
+     "modelVersions": [{"id": 62833, "name": "v1.0", "baseModel": "SD 1.5"}]},
+]
+
+
+class FakeCatalogApi:
+    """Civitai REST API serving MODELS two per page."""
+
+    def __init__(self):
+        self.requests = []
+        self.versions = {}
+
+    async def models(self, request):
+        self.requests.append(str(request.rel_url))
+        page = int(request.query.get("page", 1))
+        items = MODELS[(page - 1) * 2:page * 2]
+        next_page = str(request.url.with_query(page=page + 1)) if page * 2 < len(MODELS) else None
+        return web.json_response({"items": items, "metadata": {"nextPage": next_page}})
+
+    async def version(self, request):
+        self.requests.append(str(request.rel_url))
+        version = self.versions.get(request.match_info["id"])
+        if version is None:
+            return web.Response(status=404)
+        return web.json_response(version)
+
+    def server(self) -> TestServer:
+        app = web.Application()
+        app.router.add_get("/api/v1/models", self.models)
+        app.router.add_get("/api/v1/model-versions/{id}", self.version)
+        return TestServer(app)
+
+
+@asynccontextmanager
+async def running_api():
+    """Run a fake catalog API for the duration of a test."""
+    fake = FakeCatalogApi()
+    async with fake.server() as server:
+        fake.url = str(server.make_url("/api/v1"))
+        yield fake
+
+
+class TestUrns:
+    """Test URN parsing and construction."""
+
+    def test_parse(self):
+        """Test a URN is split into its parts."""
+        assert parse_urn(SD1)["version_id"] == "128713"
+        with pytest.raises(ValueError, match="Invalid model URN"):
+            parse_urn("dreamshaper 8")
+
+    def test_entries_from_model(self):
+        """Test URNs are built from base model and type, preferring the API's air field."""
+        [sd1] = entries_from_model(MODELS[0])
+        [sdxl] = entries_from_model(MODELS[1])
+        [lora] = entries_from_model(MODELS[2])
+        [explicit] = entries_from_model(
+            {"id": 1, "type": "Checkpoint",
+             "modelVersions": [{"id": 2, "air": "urn:air:flux1:checkpoint:civitai:1@2"}]}
+        )
+
+        assert (sd1.urn, sd1.authoritative) == (SD1, True)
+        assert (sdxl.urn, sdxl.authoritative) == (
+            "urn:air:sdxl:checkpoint:civitai:101055@128078", False
+        )
+        assert lora.urn == "urn:air:sd1:lora:civitai:58390@62833"
+        assert explicit.urn == "urn:air:flux1:checkpoint:civitai:1@2"
+
+
+class TestModelCatalog:
+    """Test fetching, search and validation."""
+
+    @pytest.mark.asyncio
+    async def test_refresh_follows_pages_and_search_uses_indexes(self):
+        """Test every page is fetched and search filters by words, base model and type."""
+        async with running_api() as api:
+            catalog = ModelCatalog(api.url)
+
+            everything = await catalog.search()
+            by_word = await catalog.search("dreamshaper")
+            by_base = await catalog.search(base_model="sd 1.5", model_type="lora")
+
+            assert len(everything) == 3
+            assert len(api.requests) == 2
+            assert [entry.urn for entry in by_word] == [SD1]
+            assert [entry.name for entry in by_base] == ["Detail Tweaker"]
+            assert await catalog.search("missing") == []
+            await catalog.close()
+
+    @pytest.mark.asyncio
+    async def test_validate_known_and_mismatched(self):
+        """Test known URNs pass and a known version under the wrong URN is corrected."""
+        async with running_api() as api:
+            catalog = ModelCatalog(api.url)
+            await catalog.refresh()
+
+            await catalog.validate(SD1)
+            with pytest.raises(ValueError, match=SD1):
+                await catalog.validate("urn:air:sdxl:checkpoint:civitai:4384@128713")
+            await catalog.close()
+
+    @pytest.mark.asyncio
+    async def test_guessed_urn_matched_on_ids(self):
+        """Test a URN the catalog derived itself is not enforced beyond model and version ids."""
+        async with running_api() as api:
+            catalog = ModelCatalog(api.url)
+            await catalog.refresh()
+
+            # The API gave no air for this version, so its "sdxl" ecosystem is only a guess
+            await catalog.validate("urn:air:pony:checkpoint:civitai:101055@128078")
+            with pytest.raises(ValueError, match="belongs to model 101055"):
+                await catalog.validate("urn:air:sdxl:checkpoint:civitai:1@128078")
+            await catalog.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_version_looked_up_once(self):
+        """Test an unknown version costs one lookup and is then rejected from memory."""
+        async with running_api() as api:
+            catalog = ModelCatalog(api.url)
+            await catalog.refresh()
+            bad = "urn:air:sd1:checkpoint:civitai:1@999"
+
+            for _ in range(2):
+                with pytest.raises(ValueError, match="Unknown model"):
+                    await catalog.validate(bad)
+
+            assert [r for r in api.requests if "model-versions" in r] == ["/api/v1/model-versions/999"]
+            await catalog.close()
+
+    @pytest.mark.asyncio
+    async def test_version_outside_catalog_is_added(self):
+        """Test a real version missing from the catalog is accepted and remembered."""
+        async with running_api() as api:
+            api.versions["7"] = {"id": 7, "modelId": 6, "baseModel": "SD 1.5",
+                                 "model": {"name": "Rare", "type": "Checkpoint"}}
+            catalog = ModelCatalog(api.url)
+            await catalog.refresh()
+
+            await catalog.validate("urn:air:sd1:checkpoint:civitai:6@7")
+            await catalog.validate("urn:air:sd1:checkpoint:civitai:6@7")
+
+            assert len([r for r in api.requests if "model-versions" in r]) == 1
+            await catalog.close()
+
+    @pytest.mark.asyncio
+    async def test_syntax_only_until_loaded(self):
+        """Test validation never waits on the network before the catalog has loaded."""
+        catalog = ModelCatalog("http://127.0.0.1:9")
+
+        await catalog.validate("urn:air:sd1:checkpoint:civitai:1@999")
+        with pytest.raises(ValueError):
+            await catalog.validate("not-a-urn")
+        await catalog.close()
+
+    @pytest.mark.asyncio
+    async def test_stale_catalog_served_while_refreshing(self):
+        """Test a stale catalog is returned immediately and refreshed in the background."""
+        async with running_api() as api:
+            catalog = ModelCatalog(api.url, refresh_interval=3600)
+            await catalog.refresh()
+            catalog.fetched_at -= 7200
+            fetches = len(api.requests)
+
+            entries = await catalog.entries()
+            assert len(entries) == 3
+            await catalog._refreshing
+
+            assert len(api.requests) == fetches + 2
+            assert not catalog.stale
+            await catalog.close()
+
+    @pytest.mark.asyncio
+    async def test_persisted_catalog_starts_warm(self, tmp_path):
+        """Test a saved catalog is loaded without fetching."""
+        async with running_api() as api:
+            path = str(tmp_path / "models.json")
+            first = ModelCatalog(api.url, path=path)
+            await first.refresh()
+            await first.close()
+            fetches = len(api.requests)
+
+            second = ModelCatalog(api.url, path=path)
+            assert [entry.urn for entry in await second.search("dreamshaper")] == [SD1]
+            assert len(api.requests) == fetches
+            await second.close()
+
+
+class TestCatalogStart:
+    """Test the catalog is fetched on first use, not at startup."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode,fetched", [
+        ("catalog", True), ("syntax", False), ("off", False),
+    ])
+    async def test_fetched_by_first_validation_only(self, mode, fetched):
+        """Test start stays off the network and only catalog validation starts the fetch."""
+        async with running_api() as api:
+            catalog = ModelCatalog(api.url, mode=mode)
+
+            await catalog.start()
+            assert api.requests == []
+            await catalog.validate(SD1)
+            if catalog._refreshing is not None:
+                await catalog._refreshing
+
+            assert catalog.loaded is fetched
+            await catalog.close()
+
+
+class TestModelRoutes:
+    """Test catalog search and validation over HTTP."""
+
+    @pytest.fixture
+    def client(self):
+        """Client with a preloaded catalog."""
+        catalog = ModelCatalog("http://127.0.0.1:9")
+        catalog._index([entry for model in MODELS for entry in entries_from_model(model)], 1e12)
+        service = MagicMock()
+        service.generate_and_download = AsyncMock()
+        app = create_app()
+        app.dependency_overrides[get_model_catalog] = lambda: catalog
+        app.dependency_overrides[get_civitai_service] = lambda: service
+        client = TestClient(app)
+        client.service = service
+        return client
+
+    def test_search(self, client):
+        """Test GET /models filters the catalog."""
+        response = client.get("/models", params={"type": "Checkpoint", "base_model": "SDXL 1.0"})
+
+        assert response.status_code == 200
+        assert [m["model_id"] for m in response.json()["models"]] == ["101055"]
+
+    def test_malformed_urn_rejected_before_submission(self, client):
+        """Test a bad URN is a 400 and never reaches the service."""
+        response = client.post("/images", json={"model": "dreamshaper", "prompt": "p"})
+
+        assert response.status_code == 400
+        assert "Invalid model URN" in response.json()["detail"]
+        client.service.generate_and_download.assert_not_awaited()
@@ -0,0 +1,106 @@
+"""Unit tests for polling strategies."""
+
+import pytest
+
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.job_tracker import JobTracker
+from src.core.services.polling import (
+    AdaptivePolling,
+    BackoffPolling,
+    FixedPolling,
+    estimate_remaining,
+)
+
+
+def _queued(duration) -> dict:
+    """Build a status response reporting a queue position."""
+    return {
+        "jobs": [{
+            "jobId": "j",
+            "result": [],
+            "serviceProviders": {"p": {"queuePosition": {"estimatedStartDuration": duration}}},
+        }]
+    }
+
+
+class TestStrategies:
+    """Test delay calculation."""
+
+    def test_fixed_polls_immediately_then_at_interval(self):
+        """Test the legacy fixed cadence."""
+        strategy = FixedPolling(3)
+        assert strategy.first_delay() == 0
+        assert strategy.next_delay(5, {}) == 3
+
+    def test_backoff_grows_exponentially_and_caps(self):
+        """Test backoff delays grow by factor and stop at the maximum."""
+        strategy = BackoffPolling(initial_interval=0.5, max_interval=4, factor=2, jitter=0)
+        delays = [strategy.next_delay(attempt, {}) for attempt in range(1, 6)]
+        assert delays == [1, 2, 4, 4, 4]
+
+    def test_backoff_jitter_is_bounded(self):
+        """Test jitter stays within the configured fraction."""
+        strategy = BackoffPolling(initial_interval=1, max_interval=1, jitter=0.2)
+        for _ in range(100):
+            assert 0.8 <= strategy.next_delay(3, {}) <= 1.2
+
+    def test_adaptive_follows_eta(self):
+        """Test the adaptive strategy sleeps until the reported ETA, within bounds."""
+        strategy = AdaptivePolling(initial_interval=0.5, max_interval=10, factor=2, jitter=0)
+        assert strategy.next_delay(1, _queued({"totalSeconds": 6.0})) == 6.0
+        assert strategy.next_delay(1, _queued("00:01:00")) == 10
+        assert strategy.next_delay(1, _queued("00:00:00.1")) == 0.5
+        assert strategy.next_delay(1, {"jobs": []}) == 1
+
+
+class TestEstimateRemaining:
+    """Test ETA extraction from status responses."""
+
+    def test_no_queue_information(self):
+        """Test None is returned when upstream reports no queue position."""
+        assert estimate_remaining({"jobs": [{"jobId": "j", "result": []}]}) is None
+
+    def test_duration_with_days(self):
+        """Test "d.hh:mm:ss" durations are parsed."""
+        assert estimate_remaining(_queued("1.00:00:05")) == 86405
+
+    def test_malformed_duration_ignored(self):
+        """Test an unparseable duration yields no estimate instead of raising."""
+        assert estimate_remaining(_queued("x.00:00:05")) is None
+        assert estimate_remaining(_queued("soon")) is None
+
+
+class TestStrategyStats:
+    """Test per-strategy stats."""
+
+    @pytest.mark.asyncio
+    async def test_tracker_records_latency_and_polls(self):
+        """Test completed tokens are recorded against their strategy."""
+        calls = 0
+
+        async def fetch(token):
+            nonlocal calls
+            calls += 1
+            done = calls >= 3
+            return {"jobs": [{"jobId": "j", "result": [{"available": done, "blobUrl": "u"}]}]}
+
+        strategy = FixedPolling(0.01)
+        await JobTracker(fetch).wait("t", ["j"], timeout=5, strategy=strategy)
+
+        stats = strategy.stats.as_dict()
+        assert stats["jobs"] == 1
+        assert stats["polls"] == 3
+        assert stats["avg_latency"] > 0
+
+    def test_unknown_strategy_is_rejected(self):
+        """Test an unknown strategy name raises a helpful error."""
+        service = CivitaiService("token", Settings())
+        with pytest.raises(ValueError, match="fixed, backoff, adaptive"):
+            service.get_polling_strategy("eager")
+
+    def test_default_strategy_comes_from_settings(self):
+        """Test the default strategy is selected from settings."""
+        service = CivitaiService("token", Settings(poll_strategy="backoff"))
+        assert service.get_polling_strategy().name == "backoff"
+        assert set(service.polling_stats()) == {"fixed", "backoff", "adaptive"}
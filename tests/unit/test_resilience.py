@@ -0,0 +1,232 @@
+"""Unit tests for upstream retries, circuit breaking and error mapping."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service
+from src.api.main import create_app
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.job_tracker import JobTracker
+from src.core.services.polling import FixedPolling
+from src.core.services.resilience import (
+    CircuitBreaker,
+    CircuitOpen,
+    RetryPolicy,
+    UpstreamError,
+    UpstreamRateLimited,
+    UpstreamRejected,
+    UpstreamTimeout,
+    UpstreamUnavailable,
+    classify,
+)
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+
+
+class SdkHTTPException(Exception):
+    """Stand-in for the SDK's HTTPException, which carries status_code."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"{status_code} Request failed")
+        self.status_code = status_code
+
+
+def _policy(**kwargs) -> RetryPolicy:
+    return RetryPolicy(base_delay=0, max_delay=0, **kwargs)
+
+
+class TestClassify:
+    """Test mapping raw exceptions to typed errors."""
+
+    def test_status_codes(self):
+        """Test HTTP statuses map to the matching error type."""
+        assert isinstance(classify(SdkHTTPException(429), "submit"), UpstreamRateLimited)
+        assert isinstance(classify(SdkHTTPException(503), "submit"), UpstreamUnavailable)
+        assert isinstance(classify(SdkHTTPException(504), "submit"), UpstreamTimeout)
+        assert isinstance(classify(SdkHTTPException(400), "submit"), UpstreamRejected)
+        assert type(classify(SdkHTTPException(401), "submit")) is UpstreamError
+
+    def test_timeouts_and_connection_errors(self):
+        """Test transport failures are retryable and connect errors were never sent."""
+        import aiohttp
+
+        assert isinstance(classify(asyncio.TimeoutError(), "status"), UpstreamTimeout)
+        error = classify(aiohttp.ClientConnectorError(MagicMock(), OSError("refused")), "download")
+        assert isinstance(error, UpstreamUnavailable)
+        assert error.request_sent is False
+
+
+class TestRetryPolicy:
+    """Test retry decisions."""
+
+    @pytest.mark.asyncio
+    async def test_idempotent_call_retried_until_success(self):
+        """Test transient failures of idempotent calls are retried."""
+        fn = AsyncMock(side_effect=[SdkHTTPException(503), SdkHTTPException(502), "ok"])
+
+        result = await _policy().run(fn, "download", CircuitBreaker("blob"), idempotent=True)
+
+        assert result == "ok"
+        assert fn.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_submission_not_retried_once_sent(self):
+        """Test a paid submission is never repeated after it may have reached upstream."""
+        fn = AsyncMock(side_effect=SdkHTTPException(503))
+
+        with pytest.raises(UpstreamUnavailable):
+            await _policy().run(fn, "submit", CircuitBreaker("api"), idempotent=False)
+        assert fn.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_submission_retried(self):
+        """Test a 429 submission is retried because upstream did not accept it."""
+        fn = AsyncMock(side_effect=[SdkHTTPException(429), {"token": "t"}])
+
+        result = await _policy().run(fn, "submit", CircuitBreaker("api"), idempotent=False)
+
+        assert result == {"token": "t"}
+        assert fn.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_retries(self):
+        """Test retries stop once the retry budget is spent."""
+        policy = _policy(attempts=10, budget_ratio=0, budget_cap=2)
+        fn = AsyncMock(side_effect=SdkHTTPException(503))
+
+        with pytest.raises(UpstreamUnavailable):
+            await policy.run(fn, "download", CircuitBreaker("blob", 0), idempotent=True)
+        assert fn.await_count == 3
+
+    def test_delay_honours_retry_after(self):
+        """Test Retry-After raises the backoff, capped by max_delay."""
+        policy = RetryPolicy(base_delay=0.1, max_delay=5)
+        assert policy.delay(1, UpstreamRateLimited("429", retry_after=2)) == 2
+        assert policy.delay(1, UpstreamRateLimited("429", retry_after=60)) == 5
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker states."""
+
+    @pytest.mark.asyncio
+    async def test_opens_after_threshold_and_fails_fast(self):
+        """Test consecutive availability failures open the circuit."""
+        breaker = CircuitBreaker("api", failure_threshold=2, reset_timeout=60)
+        fn = AsyncMock(side_effect=SdkHTTPException(503))
+        policy = _policy(attempts=1)
+
+        for _ in range(2):
+            with pytest.raises(UpstreamUnavailable):
+                await policy.run(fn, "submit", breaker, idempotent=False)
+        with pytest.raises(CircuitOpen) as exc:
+            await policy.run(fn, "submit", breaker, idempotent=False)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert fn.await_count == 2
+        assert exc.value.retry_after > 0
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_closes_circuit(self):
+        """Test a successful probe after the reset timeout closes the circuit."""
+        breaker = CircuitBreaker("api", failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure(UpstreamUnavailable("down"))
+        await asyncio.sleep(0.02)
+
+        result = await _policy(attempts=1).run(
+            AsyncMock(return_value="ok"), "status", breaker, idempotent=True
+        )
+
+        assert result == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_rate_limits_do_not_open_circuit(self):
+        """Test 429s and rejections are not counted as outages."""
+        breaker = CircuitBreaker("api", failure_threshold=1)
+        breaker.record_failure(UpstreamRateLimited("429"))
+        breaker.record_failure(UpstreamRejected("400"))
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestTrackerRetries:
+    """Test the job tracker reschedules transient status failures."""
+
+    @pytest.mark.asyncio
+    async def test_transient_status_error_is_retried(self):
+        """Test a failed status poll is retried instead of failing the wait."""
+        done = {"jobs": [{"jobId": "j", "result": [{"available": True, "blobUrl": "u"}]}]}
+        fetch = AsyncMock(side_effect=[UpstreamUnavailable("503"), done])
+        tracker = JobTracker(fetch, retry_policy=_policy())
+
+        results = await tracker.wait("tok", ["j"], 1, FixedPolling(0))
+
+        assert results == [{"available": True, "blobUrl": "u"}]
+        assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_circuit_open_fails_wait(self):
+        """Test an open circuit fails waiters instead of retrying."""
+        fetch = AsyncMock(side_effect=CircuitOpen("api", 30))
+        tracker = JobTracker(fetch, retry_policy=_policy())
+
+        with pytest.raises(CircuitOpen):
+            await tracker.wait("tok", ["j"], 1, FixedPolling(0))
+
+
+class TestServiceDownloads:
+    """Test download retries in the service."""
+
+    @pytest.mark.asyncio
+    async def test_download_retries_server_errors(self):
+        """Test a 503 from blob storage is retried and counted."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+
+        calls = 0
+
+        async def blob(request):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                return web.Response(status=503)
+            return web.Response(body=b"img", content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/blob", blob)
+        async with TestServer(app) as server:
+            service = CivitaiService("token", Settings(retry_base_delay=0))
+            image_data, _ = await service.download_image(str(server.make_url("/blob")))
+            await service.close()
+
+        assert image_data == b"img"
+        assert service.metrics.upstream_retries.value(
+            operation="download", type="UpstreamUnavailable"
+        ) == 1
+
+
+class TestUpstreamRoutes:
+    """Test typed upstream errors map to HTTP statuses."""
+
+    @pytest.mark.parametrize("error, status", [
+        (UpstreamRateLimited("Upstream submit failed: HTTP 429", retry_after=3), 429),
+        (UpstreamError("Upstream submit failed: HTTP 401"), 502),
+        (CircuitOpen("api", 12), 503),
+        (UpstreamTimeout("Upstream status timed out"), 504),
+    ])
+    def test_status_mapping(self, error, status):
+        """Test each error type produces its status and Retry-After when known."""
+        service = MagicMock()
+        service.get_cached = AsyncMock(return_value=None)
+        service.generate_and_download = AsyncMock(side_effect=error)
+        app = create_app()
+        app.dependency_overrides[get_civitai_service] = lambda: service
+
+        response = TestClient(app).post("/images", json={"model": MODEL, "prompt": "p"})
+
+        assert response.status_code == status
+        if error.retry_after:
+            assert response.headers["Retry-After"] == str(round(error.retry_after))
@@ -0,0 +1,127 @@
+"""Unit tests for the result cache."""
+
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.result_cache import ResultCache, cache_key
+
+
+def _result(data: bytes = b"img") -> dict:
+    """Build a downloaded result."""
+    return {"image_data": data, "content_type": "image/png", "seed": 1, "job_id": "j"}
+
+
+class TestCacheKey:
+    """Test canonical key derivation."""
+
+    def test_unseeded_requests_are_not_cacheable(self):
+        """Test requests without a fixed seed have no key."""
+        assert cache_key({"model": "m", "params": {"prompt": "p"}}) is None
+        assert cache_key({"model": "m", "params": {"prompt": "p", "seed": -1}}) is None
+
+    def test_key_ignores_field_order(self):
+        """Test the key is stable across dict ordering."""
+        a = {"model": "m", "params": {"prompt": "p", "seed": 1, "steps": 20}}
+        b = {"params": {"steps": 20, "seed": 1, "prompt": "p"}, "model": "m"}
+        assert cache_key(a) == cache_key(b)
+        assert cache_key(a) != cache_key({**a, "params": {**a["params"], "seed": 2}})
+
+
+class TestMemoryTier:
+    """Test the in-memory LRU tier."""
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_by_count(self):
+        """Test the least recently used entry is evicted first."""
+        cache = ResultCache(memory_items=2)
+        await cache.put("a", _result())
+        await cache.put("b", _result())
+        await cache.get("a")
+        await cache.put("c", _result())
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert await cache.get("c") is not None
+
+    @pytest.mark.asyncio
+    async def test_eviction_by_bytes(self):
+        """Test the byte budget bounds the memory tier."""
+        cache = ResultCache(memory_bytes=10)
+        await cache.put("a", _result(b"x" * 6))
+        await cache.put("b", _result(b"x" * 6))
+
+        assert await cache.get("a") is None
+        assert await cache.get("b") is not None
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """Test expired entries are treated as misses."""
+        cache = ResultCache(ttl=0.01)
+        await cache.put("a", _result())
+        time.sleep(0.02)
+        assert await cache.get("a") is None
+
+
+class TestDiskTier:
+    """Test the on-disk tier."""
+
+    @pytest.mark.asyncio
+    async def test_survives_new_instance(self, tmp_path):
+        """Test entries written to disk are served by a fresh cache."""
+        await ResultCache(directory=str(tmp_path)).put("a", _result(b"data"))
+
+        cache = ResultCache(directory=str(tmp_path))
+        result = await cache.get("a")
+
+        assert result["image_data"] == b"data"
+        assert result["job_id"] == "j"
+        assert cache.stats.disk_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_budget_evicts_oldest(self, tmp_path):
+        """Test the byte budget evicts least recently used files."""
+        cache = ResultCache(memory_items=1, directory=str(tmp_path), disk_bytes=10)
+        await cache.put("a", _result(b"x" * 6))
+        await cache.put("b", _result(b"x" * 6))
+
+        assert not (tmp_path / "a.img").exists()
+        assert (tmp_path / "b.img").exists()
+
+
+class TestServiceCaching:
+    """Test cache integration in the service."""
+
+    @pytest.mark.asyncio
+    async def test_seeded_request_hits_cache(self):
+        """Test a repeated seeded request is served without generating."""
+        service = CivitaiService("token", Settings(result_cache_enabled=True))
+        service.generate = AsyncMock(return_value={"seed": 3, "blob_url": "http://blob"})
+        service.download_image = AsyncMock(return_value=(b"img", "image/png"))
+        request = GenerateImageRequest(model="m", prompt="p", seed=3)
+
+        first = await service.generate_and_download(request)
+        second = await service.generate_and_download(request)
+
+        assert first["cache"] == "miss"
+        assert second["cache"] == "hit"
+        assert second["image_data"] == b"img"
+        service.generate.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_unseeded_request_bypasses_cache(self):
+        """Test requests without a seed always generate."""
+        service = CivitaiService("token", Settings(result_cache_enabled=True))
+        service.generate = AsyncMock(return_value={"seed": 3, "blob_url": "http://blob"})
+        service.download_image = AsyncMock(return_value=(b"img", "image/png"))
+        request = GenerateImageRequest(model="m", prompt="p")
+
+        result = await service.generate_and_download(request)
+        await service.generate_and_download(request)
+
+        assert result["cache"] == "bypass"
+        assert service.generate.await_count == 2
@@ -0,0 +1,136 @@
+"""Unit tests for REST response rendering, compression and HTTP/2 serving."""
+
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.api.serving import FastJSONResponse, JSONCompressionMiddleware
+
+PAYLOAD = {"items": [{"id": i, "prompt": "a serene mountain landscape"} for i in range(50)]}
+
+
+def _client(mode="gzip", minimum_size=100) -> TestClient:
+    """App with JSON, image and event-stream routes behind the compression middleware."""
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(JSONCompressionMiddleware, mode=mode, minimum_size=minimum_size)
+
+    @app.get("/json")
+    async def large_json():
+        return PAYLOAD
+
+    @app.get("/small")
+    async def small_json():
+        return {"ok": True}
+
+    @app.get("/image")
+    async def image():
+        return Response(content=b"\x89PNG" + b"\x00" * 4096, media_type="image/png")
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            yield "data: " + json.dumps(PAYLOAD) + "\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+class TestFastJSONResponse:
+    """Test the JSON response class."""
+
+    def test_renders_same_document(self):
+        """Test the body decodes to the same document as the default response class."""
+        body = FastJSONResponse({"seed": 1, "cost": 1.5, "prompt": "é"}).body
+
+        assert json.loads(body) == {"seed": 1, "cost": 1.5, "prompt": "é"}
+
+
+class TestJSONCompression:
+    """Test compression applies to JSON only."""
+
+    def test_large_json_gzipped(self):
+        """Test a JSON body over the minimum is gzipped with a matching length."""
+        response = _client().get("/json", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == PAYLOAD
+
+    def test_uncompressed_cases(self):
+        """Test small JSON, images, event streams and clients without gzip are left alone."""
+        client = _client()
+        gzip_only = {"Accept-Encoding": "gzip"}
+
+        assert "content-encoding" not in client.get("/small", headers=gzip_only).headers
+        image = client.get("/image", headers=gzip_only)
+        assert "content-encoding" not in image.headers
+        assert image.content.startswith(b"\x89PNG")
+        assert "content-encoding" not in client.get("/events", headers=gzip_only).headers
+        refused = {"Accept-Encoding": "gzip;q=0, identity"}
+        assert "content-encoding" not in client.get("/json", headers=refused).headers
+
+    def test_brotli_preferred_when_available(self):
+        """Test auto mode picks brotli when the client accepts it."""
+        pytest.importorskip("brotli")
+        response = _client(mode="auto").get(
+            "/json", headers={"Accept-Encoding": "gzip, br"}
+        )
+
+        # The test client has already decoded the brotli body
+        assert response.headers["content-encoding"] == "br"
+        assert response.json() == PAYLOAD
+
+    def test_gzip_stable_output(self):
+        """Test gzip output carries no timestamp, so identical bodies compress identically."""
+        middleware = JSONCompressionMiddleware(MagicMock(), mode="gzip")
+
+        assert middleware._compress(b"x" * 100, "gzip") == middleware._compress(b"x" * 100, "gzip")
+        assert gzip.decompress(middleware._compress(b"x" * 100, "gzip")) == b"x" * 100
+
+    def test_unknown_mode_rejected(self):
+        """Test a misconfigured mode fails at startup."""
+        with pytest.raises(ValueError, match="Unknown compression mode"):
+            JSONCompressionMiddleware(MagicMock(), mode="zstd")
+
+
+class TestServingProfile:
+    """Test the app and launcher configuration."""
+
+    def test_health_body_unchanged(self):
+        """Test the precomputed health responses match the response dataclass."""
+        client = TestClient(main.create_app())
+
+        assert client.get("/health").json() == {"status": "healthy", "message": None}
+        assert client.get("/").json()["status"] == "active"
+
+    def test_create_app_compression_from_settings(self):
+        """Test compression is off by default and enabled by setting or argument."""
+        def middleware(app):
+            return [m.cls for m in app.user_middleware]
+
+        assert JSONCompressionMiddleware not in middleware(main.create_app())
+        assert JSONCompressionMiddleware in middleware(main.create_app(compression="gzip"))
+
+    def test_http2_launches_hypercorn(self):
+        """Test --http2 hands the app to hypercorn with the configured bind and workers."""
+        config = MagicMock()
+        run = MagicMock()
+        modules = {
+            "hypercorn": MagicMock(),
+            "hypercorn.config": MagicMock(Config=MagicMock(return_value=config)),
+            "hypercorn.run": MagicMock(run=run),
+        }
+        with patch.dict("sys.modules", modules), patch.object(main.uvicorn, "run") as uvicorn_run:
+            main.main(["--http2", "--host", "127.0.0.1", "--port", "9000", "--workers", "1"])
+
+        run.assert_called_once_with(config)
+        assert config.bind == ["127.0.0.1:9000"]
+        assert config.application_path == "src.api.main:app"
+        uvicorn_run.assert_not_called()
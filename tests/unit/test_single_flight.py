@@ -0,0 +1,212 @@
+"""Unit tests for request coalescing."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.cost_ledger import BudgetExceeded
+from src.core.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test the single-flight primitive."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test identical concurrent calls run the work once."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return b"bytes"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert flight.stats.executed == 1
+        assert flight.stats.coalesced == 4
+        assert flight.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter(self):
+        """Test a failure is raised to all coalesced callers."""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(
+            flight.do("k", work), flight.do("k", work), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """Test one caller dropping leaves the shared work running."""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == "done"
+        assert flight.stats.cancelled == 0
+
+    @pytest.mark.asyncio
+    async def test_work_cancelled_when_all_waiters_leave(self):
+        """Test the shared work is cancelled once nobody is waiting."""
+        flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.ensure_future(flight.do("k", work))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+        assert flight.stats.cancelled == 1
+        assert flight.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_events_reach_every_waiter(self):
+        """Test events reach every listener, late joiners included, despite a failing one."""
+        flight = SingleFlight()
+        received = {"first": [], "late": []}
+        gate = asyncio.Event()
+
+        async def work():
+            await flight.publish("k", "processing", {"token": "t"})
+            await gate.wait()
+            await flight.publish("k", "available", {})
+            return "done"
+
+        def listener(name):
+            async def on_event(status, details):
+                received[name].append(status)
+            return on_event
+
+        async def broken(status, details):
+            raise RuntimeError("client went away")
+
+        first = asyncio.ensure_future(flight.do("k", work, listener=listener("first")))
+        failing = asyncio.ensure_future(flight.do("k", work, listener=broken))
+        await asyncio.sleep(0.01)
+        late = asyncio.ensure_future(flight.do("k", work, listener=listener("late")))
+        await asyncio.sleep(0.01)
+        gate.set()
+
+        assert await asyncio.gather(first, failing, late) == ["done"] * 3
+        assert received["first"] == received["late"] == ["processing", "available"]
+
+
+class TestServiceCoalescing:
+    """Test coalescing in generate_and_download."""
+
+    @pytest.mark.asyncio
+    async def test_identical_seeded_requests_share_a_job(self):
+        """Test concurrent identical seeded requests submit once."""
+        service = CivitaiService("token", Settings())
+
+        async def generate(request, timeout, poll_strategy, on_status=None, priority="normal", caller="anonymous"):
+            await asyncio.sleep(0.01)
+            return {"seed": 3, "blob_url": "http://blob"}
+
+        service.generate = AsyncMock(side_effect=generate)
+        service.download_image = AsyncMock(return_value=(b"img", "image/png"))
+        request = GenerateImageRequest(model="m", prompt="p", seed=3)
+
+        results = await asyncio.gather(
+            *(service.generate_and_download(request) for _ in range(3))
+        )
+
+        assert service.generate.await_count == 1
+        assert service.download_image.await_count == 1
+        assert [result["image_data"] for result in results] == [b"img"] * 3
+        assert service.coalescing_stats()["coalesced"] == 2
+
+    @pytest.mark.asyncio
+    async def test_joined_callers_receive_status(self):
+        """Test every caller sharing a job gets its status transitions, not just the first."""
+        service = CivitaiService("token", Settings())
+
+        async def generate(request, timeout, poll_strategy, on_status=None, priority="normal", caller="anonymous"):
+            await on_status("processing", {"token": "t"})
+            await asyncio.sleep(0.01)
+            await on_status("available", {})
+            return {"seed": 3, "blob_url": "http://blob"}
+
+        service.generate = AsyncMock(side_effect=generate)
+        service.download_image = AsyncMock(return_value=(b"img", "image/png"))
+        request = GenerateImageRequest(model="m", prompt="p", seed=3)
+        statuses = [[], []]
+
+        def on_status(index):
+            async def record(status, details):
+                statuses[index].append(status)
+            return record
+
+        await asyncio.gather(
+            *(service.generate_and_download(request, on_status=on_status(i)) for i in range(2))
+        )
+
+        assert service.generate.await_count == 1
+        assert statuses == [["processing", "available", "downloaded"]] * 2
+
+    @pytest.mark.asyncio
+    async def test_joining_caller_budget_checked(self):
+        """Test a caller over budget cannot join a job another caller is paying for."""
+        service = CivitaiService("token", Settings(cost_budgets={"broke": {"day": 0}}))
+
+        async def generate(
+            request, timeout, poll_strategy, on_status=None, priority="normal", caller="anonymous"
+        ):
+            await asyncio.sleep(0.01)
+            return {"seed": 3, "blob_url": "http://blob"}
+
+        service.generate = AsyncMock(side_effect=generate)
+        service.download_image = AsyncMock(return_value=(b"img", "image/png"))
+        request = GenerateImageRequest(model="m", prompt="p", seed=3)
+
+        first = asyncio.ensure_future(service.generate_and_download(request, caller="agent"))
+        await asyncio.sleep(0)
+        with pytest.raises(BudgetExceeded):
+            await service.generate_and_download(request, caller="broke")
+
+        assert (await first)["image_data"] == b"img"
+        assert service.generate.await_count == 1
+        assert service.coalescing_stats()["coalesced"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unseeded_requests_are_not_coalesced(self):
+        """Test random-seed requests each get their own job."""
+        service = CivitaiService("token", Settings())
+        service.generate = AsyncMock(return_value={"seed": 3, "blob_url": "http://blob"})
+        service.download_image = AsyncMock(return_value=(b"img", "image/png"))
+        request = GenerateImageRequest(model="m", prompt="p")
+
+        await asyncio.gather(*(service.generate_and_download(request) for _ in range(2)))
+
+        assert service.generate.await_count == 2
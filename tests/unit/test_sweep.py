@@ -0,0 +1,248 @@
+"""Unit tests for parameter sweeps."""
+
+import asyncio
+import io
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service
+from src.api.main import create_app
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.sweep import contact_sheet, expand_sweep, grid_columns, plan_sweep
+from src.core.services.transcoding import Transcoder
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+BASE = GenerateImageRequest(model=MODEL, prompt="p", seed=1)
+
+
+def _service(**overrides) -> CivitaiService:
+    """Service whose submissions finish on the first poll, one job per image requested."""
+    service = CivitaiService(
+        "token", Settings(poll_strategy="fixed", poll_interval=0.01, **overrides)
+    )
+    client = MagicMock()
+    submitted = []
+
+    async def create(input):
+        token = f"tok-{len(submitted)}"
+        submitted.append(input)
+        jobs = [{"jobId": f"{token}-{i}", "cost": 1} for i in range(input.get("quantity", 1))]
+        return {"token": token, "jobs": jobs}
+
+    async def get(token):
+        count = submitted[int(token.split("-")[1])].get("quantity", 1)
+        return {
+            "token": token,
+            "jobs": [
+                {"jobId": f"{token}-{i}", "result": [{"available": True, "blobUrl": "u", "seed": i}]}
+                for i in range(count)
+            ],
+        }
+
+    client.image.create = AsyncMock(side_effect=create)
+    client.jobs.get = AsyncMock(side_effect=get)
+    service.tokens.keys[0].client = client
+    service.download_image = AsyncMock(return_value=(b"img", "image/png"))
+    service.submitted = submitted
+    return service
+
+
+class TestExpandSweep:
+    """Test grid expansion and submission planning."""
+
+    def test_cartesian_product_last_axis_fastest(self):
+        """Test every combination becomes a cell, numbered row by row."""
+        cells = expand_sweep(BASE, {"cfg_scale": [5, 7], "steps": [10, 20, 30]}, 64)
+
+        assert len(cells) == 6
+        assert cells[1].params == {"cfg_scale": 5, "steps": 20}
+        assert (cells[3].request.cfg_scale, cells[3].request.steps) == (7, 10)
+        assert cells[3].request.prompt == "p"
+        assert grid_columns({"cfg_scale": [5, 7], "steps": [10, 20, 30]}) == 3
+
+    def test_invalid_axes_rejected(self):
+        """Test unknown or empty axes and oversized grids fail before anything runs."""
+        with pytest.raises(ValueError, match="Cannot sweep 'model'"):
+            expand_sweep(BASE, {"model": ["a"]}, 64)
+        with pytest.raises(ValueError, match="non-empty list"):
+            expand_sweep(BASE, {"steps": []}, 64)
+        with pytest.raises(ValueError, match="exceeds the limit of 4"):
+            expand_sweep(BASE, {"steps": [1, 2, 3], "seed": [1, 2]}, 4)
+
+    def test_plan_shares_identical_generations(self):
+        """Test repeated seeded cells share a job and repeated random cells share a submission."""
+        seeded = plan_sweep(expand_sweep(BASE, {"steps": [20, 20, 30]}, 64))
+        random = plan_sweep(expand_sweep(BASE, {"steps": [20, 30], "seed": [-1, -1, -1]}, 64))
+
+        assert [(len(g.cells), g.quantity) for g in seeded] == [(2, 1), (1, 1)]
+        assert [(len(g.cells), g.quantity) for g in random] == [(3, 3), (3, 3)]
+
+
+class TestServiceSweep:
+    """Test the service runs a grid."""
+
+    @pytest.mark.asyncio
+    async def test_cached_cells_skip_submission(self):
+        """Test cached cells are yielded first and only uncached generations are submitted."""
+        service = _service(result_cache_enabled=True)
+        await service.generate_and_download(
+            GenerateImageRequest(model=MODEL, prompt="p", seed=1, steps=30)
+        )
+        service.submitted.clear()
+        cells = expand_sweep(BASE, {"steps": [30, 10, 20, 20]}, 64)
+
+        results = [result async for result in await service.sweep(cells)]
+
+        assert results[0]["cell"] == 0 and results[0]["cache"] == "hit"
+        assert sorted(result["cell"] for result in results) == [0, 1, 2, 3]
+        assert sorted(input["params"]["steps"] for input in service.submitted) == [10, 20]
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_random_seed_repeats_submitted_with_quantity(self):
+        """Test repeated random-seed cells become one submission with a distinct image each."""
+        service = _service()
+        cells = expand_sweep(BASE, {"seed": [-1, -1, -1]}, 64)
+
+        results = [result async for result in await service.sweep(cells)]
+
+        assert [input.get("quantity") for input in service.submitted] == [3]
+        assert sorted(result["job_id"] for result in results) == ["tok-0-0", "tok-0-1", "tok-0-2"]
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_cells_stream_as_they_finish(self):
+        """Test a fast cell is yielded before a slow one and a failed cell carries its error."""
+        service = _service()
+
+        async def generate_and_download(request, *args, **kwargs):
+            if request.steps == 10:
+                raise RuntimeError("boom")
+            await asyncio.sleep(0.1 if request.steps == 30 else 0)
+            return {"image_data": b"img", "seed": 1}
+
+        service.generate_and_download = generate_and_download
+        cells = expand_sweep(BASE, {"steps": [30, 20, 10]}, 64)
+
+        results = [result async for result in await service.sweep(cells, concurrency=3)]
+
+        assert [result["cell"] for result in results] == [2, 1, 0]
+        assert results[0]["error"] == "boom"
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_budget_checked_for_uncached_cells_before_submitting(self):
+        """Test a sweep over budget fails up front without submitting anything."""
+        service = _service()
+        service.ledger.check = AsyncMock(side_effect=ValueError("over budget"))
+
+        with pytest.raises(ValueError, match="over budget"):
+            await service.sweep(expand_sweep(BASE, {"steps": [10, 20, 30]}, 64))
+
+        service.ledger.check.assert_awaited_once_with("anonymous", MODEL, 3)
+        assert service.submitted == []
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_budget_priced_per_model(self):
+        """Test cells for different models are each checked against their own model's cost."""
+        service = _service()
+        service.ledger.check = AsyncMock(side_effect=[0.0, ValueError("over budget")])
+        other = "urn:air:sdxl:checkpoint:civitai:101055@128078"
+        cells = expand_sweep(BASE, {"steps": [10, 20]}, 64) + expand_sweep(
+            replace(BASE, model=other), {"steps": [10]}, 64
+        )
+
+        with pytest.raises(ValueError, match="over budget"):
+            await service.sweep(cells)
+
+        assert sorted(call.args for call in service.ledger.check.await_args_list) == [
+            ("anonymous", MODEL, 2), ("anonymous", other, 1)
+        ]
+        assert service.submitted == []
+        await service.close()
+
+
+class TestContactSheet:
+    """Test compositing a grid into one image."""
+
+    @pytest.mark.asyncio
+    async def test_grid_layout(self):
+        """Test tiles are laid out by column count, with failed cells left blank."""
+        Image = pytest.importorskip("PIL.Image")
+        tile = io.BytesIO()
+        Image.new("RGB", (64, 32), "red").save(tile, format="PNG")
+        service = _service()
+        service.transcoder = Transcoder(executor=ThreadPoolExecutor(1))
+        results = [
+            {"cell": i, "params": {"steps": i}, "image_data": tile.getvalue()} for i in range(3)
+        ] + [{"cell": 3, "params": {"steps": 3}, "error": "boom"}]
+
+        sheet, content_type = await service.contact_sheet(results, columns=2)
+
+        with Image.open(io.BytesIO(sheet)) as image:
+            assert image.size == (2 * 256, 2 * (256 + 14))
+        assert content_type == "image/png"
+        await service.close()
+
+    def test_requires_pillow(self, monkeypatch):
+        """Test a clear error is raised when Pillow is missing."""
+        monkeypatch.setitem(sys.modules, "PIL", None)
+
+        with pytest.raises(RuntimeError, match="require Pillow"):
+            contact_sheet([b"img"], ["steps=1"], 1, 64)
+
+
+class TestSweepRoute:
+    """Test the REST sweep endpoint."""
+
+    def test_streams_cells_then_done(self):
+        """Test each cell is sent as an event as it finishes, followed by a summary."""
+        service = MagicMock()
+        service.settings = Settings()
+
+        async def cells():
+            yield {"cell": 1, "params": {"steps": 20}, "seed": 1, "job_id": "j", "cache": "miss"}
+            yield {"cell": 0, "params": {"steps": 10}, "error": "boom"}
+
+        service.sweep = AsyncMock(return_value=cells())
+        app = create_app()
+        app.dependency_overrides[get_civitai_service] = lambda: service
+
+        response = TestClient(app).post(
+            "/images/sweep",
+            json={"model": MODEL, "prompt": "p", "axes": {"steps": [10, 20]}},
+        )
+
+        events = [
+            (block.split("\n")[0], json.loads(block.split("\n")[1][len("data: "):]))
+            for block in response.text.strip().split("\n\n")
+        ]
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert [name for name, _ in events] == ["event: cell", "event: cell", "event: done"]
+        assert events[0][1]["job_id"] == "j"
+        assert events[1][1]["error"] == "boom"
+        assert events[2][1] == {"count": 2, "failed": 1}
+        assert len(service.sweep.await_args.args[0]) == 2
+
+    def test_invalid_axes_rejected_before_streaming(self):
+        """Test a bad axis is a 400 rather than an error inside the stream."""
+        service = MagicMock()
+        service.settings = Settings()
+        app = create_app()
+        app.dependency_overrides[get_civitai_service] = lambda: service
+
+        response = TestClient(app).post(
+            "/images/sweep",
+            json={"model": MODEL, "prompt": "p", "axes": {"model": ["x"]}},
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,134 @@
+"""Unit tests for the API token pool."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.resilience import UpstreamRateLimited, UpstreamUnavailable
+from src.core.services.token_pool import TokenPool
+
+
+class SdkHTTPException(Exception):
+    """Stand-in for the SDK's HTTPException, which carries status_code."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"{status_code} Request failed")
+        self.status_code = status_code
+
+
+def _client(token: str, create_side_effect=None) -> MagicMock:
+    client = MagicMock()
+    client.image.create = AsyncMock(
+        side_effect=create_side_effect,
+        return_value={"token": f"{token}-job", "jobs": [{"jobId": token, "cost": 2}]},
+    )
+    client.jobs.get = AsyncMock(return_value={
+        "token": f"{token}-job",
+        "jobs": [{"jobId": token, "result": [{"available": True, "blobUrl": "u", "seed": 1}]}],
+    })
+    return client
+
+
+class TestTokenPool:
+    """Test key selection and cooldown."""
+
+    def test_from_settings_splits_and_deduplicates(self):
+        """Test the comma-separated pool is used in preference to the single token."""
+        pool = TokenPool.from_settings(Settings(civitai_api_tokens="a, b,a,"), "single")
+        assert [key.token for key in pool.keys] == ["a", "b"]
+        assert [key.token for key in TokenPool.from_settings(Settings(), "single").keys] == [
+            "single"
+        ]
+
+    def test_acquire_balances_in_flight(self):
+        """Test each submission goes to the key with the fewest jobs in flight."""
+        pool = TokenPool(["a", "b"])
+
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+
+        assert {first.token, second.token} == {"a", "b"}
+        assert pool.acquire() is first
+
+    def test_rate_limited_key_cools_down(self):
+        """Test a 429 skips the key until its cooldown ends, doubling on repeats."""
+        pool = TokenPool(["a", "b"], cooldown=60)
+        a = pool.keys[0]
+        pool.record_failure(a, UpstreamRateLimited("429"))
+        first_cooldown = a.cooldown_until
+
+        assert pool.acquire().token == "b"
+        assert pool.acquire().token == "b"
+        pool.record_failure(a, UpstreamRateLimited("429"))
+        assert a.cooldown_until > first_cooldown + 50
+        assert a.rate_limited == 2
+
+    def test_all_keys_cooling_raises_rate_limited(self):
+        """Test acquire fails with the time until the earliest key recovers."""
+        pool = TokenPool(["a"], cooldown=5)
+        pool.record_failure(pool.keys[0], UpstreamRateLimited("429", retry_after=8))
+
+        with pytest.raises(UpstreamRateLimited) as exc:
+            pool.acquire()
+        assert 7 < exc.value.retry_after <= 8
+
+    def test_other_errors_do_not_cool_down(self):
+        """Test non-429 failures are counted without resting the key."""
+        pool = TokenPool(["a"])
+        pool.record_failure(pool.keys[0], UpstreamUnavailable("503"))
+
+        assert pool.keys[0].errors == 1
+        assert pool.acquire().token == "a"
+
+    def test_snapshot_masks_tokens(self):
+        """Test exposed stats identify keys without revealing them."""
+        pool = TokenPool(["secret-token-1234"])
+        key = pool.acquire()
+        pool.record_submission(key, "job-token", [{"cost": 3}, {"cost": 4}])
+
+        [stats] = pool.snapshot()
+        assert stats["key"] == "...1234"
+        assert (stats["submissions"], stats["jobs"], stats["cost"]) == (1, 2, 7)
+        assert "secret" not in str(stats)
+
+    def test_sdk_clients_are_isolated(self):
+        """Test every key gets its own SDK client carrying its own token."""
+        pool = TokenPool(["a", "b"], base_url="http://fake")
+        first, second = (pool.client(key) for key in pool.keys)
+
+        assert first is not second
+        assert first.get_access_token() == "a"
+        assert second.headers["Authorization"] == "Bearer b"
+        assert second.base_path == "http://fake"
+
+
+class TestServiceTokenPool:
+    """Test the service spreads jobs across the pool."""
+
+    @pytest.mark.asyncio
+    async def test_submission_fails_over_after_429(self):
+        """Test a rate-limited submission is retried on another key and polled there."""
+        service = CivitaiService(
+            "unused",
+            Settings(civitai_api_tokens="a,b", poll_strategy="fixed", poll_interval=0,
+                     retry_base_delay=0),
+        )
+        limited = _client("a", create_side_effect=SdkHTTPException(429))
+        healthy = _client("b")
+        service.tokens.keys[0].client = limited
+        service.tokens.keys[1].client = healthy
+
+        result = await service.generate(GenerateImageRequest(model="m", prompt="p"))
+
+        assert result["job_id"] == "b"
+        limited.jobs.get.assert_not_awaited()
+        healthy.jobs.get.assert_awaited_once_with("b-job")
+        stats = {s["key"]: s for s in service.token_stats()}
+        assert stats["...a"]["rate_limited"] == 1
+        assert stats["...b"]["cost"] == 2
+        assert stats["...b"]["in_flight"] == 0
+        assert service.metrics.key_rate_limited.value(key="...a") == 1
+        await service.close()
@@ -0,0 +1,211 @@
+"""Unit tests for request tracing and correlation IDs."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service, get_model_catalog
+from src.api.main import create_app
+from src.contracts.requests import GenerateImageRequest
+from src.core.config.settings import Settings
+from src.core.services.civitai_service import CivitaiService
+from src.core.services.tracing import (
+    NOOP_SPAN,
+    JsonlSpanExporter,
+    Tracer,
+    bind_trace,
+    correlation_id,
+    parse_traceparent,
+)
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+def _spans(exporter: MagicMock) -> dict:
+    """Exported spans by name."""
+    return {call.args[0].name: call.args[0] for call in exporter.export.call_args_list}
+
+
+def _service() -> CivitaiService:
+    """Service recording spans, whose job is available on the second status poll."""
+    service = CivitaiService("token", Settings(poll_strategy="fixed", poll_interval=0.01))
+    service.tracer = Tracer(MagicMock())
+    client = MagicMock()
+    client.image.create = AsyncMock(
+        return_value={"token": "tok", "jobs": [{"jobId": "j1", "cost": 1}]}
+    )
+    client.jobs.get = AsyncMock(side_effect=[
+        {"jobs": [{"jobId": "j1", "result": {"available": False}}]},
+        {"jobs": [{"jobId": "j1", "result": [{"available": True, "blobUrl": "u", "seed": 7}]}]},
+    ])
+    service.tokens.keys[0].client = client
+    service.download_image = AsyncMock(return_value=(b"img", "image/png"))
+    return service
+
+
+class TestTracer:
+    """Test span nesting, sampling and export."""
+
+    def test_spans_nest_within_a_trace(self):
+        """Test a child span shares the trace and points at its parent."""
+        exporter = MagicMock()
+        tracer = Tracer(exporter)
+
+        with tracer.span("outer") as outer:
+            with tracer.span("inner", token="t") as inner:
+                pass
+
+        assert (inner.trace_id, inner.parent_id) == (outer.trace_id, outer.span_id)
+        assert inner.attributes == {"token": "t"}
+        assert [call.kwargs["flush"] for call in exporter.export.call_args_list] == [False, True]
+
+    def test_error_recorded_and_raised(self):
+        """Test an escaping exception fails the span without being swallowed."""
+        exporter = MagicMock()
+
+        with pytest.raises(TimeoutError):
+            with Tracer(exporter).span("wait"):
+                raise TimeoutError("too slow")
+
+        span = exporter.export.call_args.args[0]
+        assert (span.status, span.error) == ("error", "TimeoutError: too slow")
+        assert span.duration is not None
+
+    def test_disabled_tracer_hands_out_noop_span(self):
+        """Test tracing without an exporter records nothing."""
+        with Tracer().span("generate", model=MODEL) as span:
+            span.set_attribute("token", "t")
+
+        assert span is NOOP_SPAN
+        assert NOOP_SPAN.attributes == {}
+
+    def test_sampling_decided_once_per_request(self):
+        """Test an unsampled request exports nothing, unless the caller's traceparent samples it."""
+        exporter = MagicMock()
+        tracer = Tracer(exporter, sample_rate=0)
+
+        with bind_trace():
+            with tracer.span("a"):
+                pass
+            with tracer.span("b"):
+                pass
+        with bind_trace(traceparent=f"00-{TRACE_ID}-00f067aa0ba902b7-01"):
+            with tracer.span("c") as span:
+                pass
+
+        assert list(_spans(exporter)) == ["c"]
+        assert (span.trace_id, span.parent_id) == (TRACE_ID, "00f067aa0ba902b7")
+
+    def test_invalid_sample_rate_rejected(self):
+        """Test a misconfigured sample rate fails at startup."""
+        with pytest.raises(ValueError, match="between 0 and 1"):
+            Tracer(MagicMock(), sample_rate=2)
+
+
+class TestBindTrace:
+    """Test correlation IDs and trace context propagation."""
+
+    def test_correlation_id_reused_or_generated(self):
+        """Test a caller's ID is kept, a malformed one replaced, and the binding undone after."""
+        with bind_trace("order-42") as context:
+            assert correlation_id() == "order-42"
+        with bind_trace("bad id\r\n") as generated:
+            assert len(generated.correlation_id) == 32
+            assert generated.correlation_id == generated.trace_id
+
+        assert context.trace_id != "order-42"
+        assert correlation_id() is None
+
+    def test_traceparent_parsed(self):
+        """Test a W3C traceparent continues the caller's trace; invalid ones are ignored."""
+        assert parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-00") == (
+            TRACE_ID, "00f067aa0ba902b7", False
+        )
+        assert parse_traceparent(f"00-{'0' * 32}-00f067aa0ba902b7-01") is None
+        assert parse_traceparent("garbage") is None
+
+
+class TestJsonlSpanExporter:
+    """Test the local span file."""
+
+    def test_trace_written_when_root_span_ends(self, tmp_path):
+        """Test each span becomes one JSON line once its trace finishes."""
+        path = tmp_path / "traces" / "spans.jsonl"
+        tracer = Tracer(JsonlSpanExporter(str(path)))
+
+        with bind_trace("req-1"), tracer.span("POST /images"):
+            with tracer.span("civitai.submit", api_key="primary"):
+                pass
+            assert not path.exists()
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [record["name"] for record in records] == ["civitai.submit", "POST /images"]
+        assert {record["correlation_id"] for record in records} == {"req-1"}
+        assert records[0]["attributes"] == {"api_key": "primary"}
+        assert records[0]["parent_id"] == records[1]["span_id"]
+
+
+class TestServiceTracing:
+    """Test the service's spans around upstream calls."""
+
+    @pytest.mark.asyncio
+    async def test_generation_spans_record_polls(self):
+        """Test submit and wait spans record the key, token, poll count and time to result."""
+        service = _service()
+
+        with bind_trace("req-1"), service.tracer.span("request") as root:
+            await service.generate_and_download(GenerateImageRequest(model=MODEL, prompt="p"))
+
+        spans = _spans(service.tracer.exporter)
+        assert spans["civitai.submit"].attributes == {
+            "api_key": service.tokens.keys[0].label, "token": "tok"
+        }
+        assert spans["civitai.wait"].attributes["polls"] == 2
+        assert spans["civitai.wait"].attributes["time_to_available"] > 0
+        assert spans["generate"].attributes["job_id"] == "j1"
+        assert [event["name"] for event in spans["generate"].events] == ["admitted", "available"]
+        assert spans["civitai.wait"].parent_id == spans["generate"].span_id
+        assert spans["generate"].parent_id == root.span_id
+        assert root.attributes["cache"] == "bypass"
+        assert {span.correlation_id for span in spans.values()} == {"req-1"}
+        await service.close()
+
+
+class TestCorrelationMiddleware:
+    """Test correlation IDs on REST requests."""
+
+    def test_correlation_header_returned(self):
+        """Test a caller's ID is echoed and a new one generated otherwise."""
+        client = TestClient(create_app())
+
+        assert client.get("/health", headers={"X-Correlation-ID": "abc-1"}).headers[
+            "x-correlation-id"
+        ] == "abc-1"
+        assert len(client.get("/health").headers["x-correlation-id"]) == 32
+        continued = client.get(
+            "/health", headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}
+        )
+        assert continued.headers["x-correlation-id"] == TRACE_ID
+
+    def test_route_and_service_spans_share_correlation_id(self):
+        """Test the handler span is the parent of the service spans for the request."""
+        service = _service()
+        catalog = MagicMock(validate=AsyncMock())
+        app = create_app()
+        app.dependency_overrides[get_civitai_service] = lambda: service
+        app.dependency_overrides[get_model_catalog] = lambda: catalog
+
+        response = TestClient(app).post(
+            "/images",
+            json={"model": MODEL, "prompt": "p", "return_image": False},
+            headers={"X-Correlation-ID": "req-7"},
+        )
+
+        spans = _spans(service.tracer.exporter)
+        assert response.headers["x-correlation-id"] == "req-7"
+        assert spans["POST /images"].attributes["cache"] == "bypass"
+        assert spans["generate"].parent_id == spans["POST /images"].span_id
+        assert {span.correlation_id for span in spans.values()} == {"req-7"}
@@ -0,0 +1,142 @@
+"""Unit tests for output transcoding."""
+
+import io
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.dependencies import get_civitai_service
+from src.api.main import create_app
+from src.core.services.transcoding import (
+    THUMBNAIL_SIZE,
+    OutputOptions,
+    Transcoder,
+    transcode_image,
+)
+
+MODEL = "urn:air:sd1:checkpoint:civitai:4384@128713"
+
+
+def _fake_transcode(image_data, image_format, quality, max_dimension):
+    return f"{image_data.decode()}:{image_format}:{quality}:{max_dimension}".encode()
+
+
+class TestOutputOptions:
+    """Test option validation."""
+
+    def test_defaults_are_noop(self):
+        """Test no options leave the image untouched."""
+        assert OutputOptions().is_noop
+        assert not OutputOptions(thumbnail=True).is_noop
+
+    def test_thumbnail_dimension(self):
+        """Test thumbnails default to THUMBNAIL_SIZE unless max_dimension is set."""
+        assert OutputOptions(thumbnail=True).target_dimension == THUMBNAIL_SIZE
+        assert OutputOptions(thumbnail=True, max_dimension=64).target_dimension == 64
+
+    @pytest.mark.parametrize("options", [
+        OutputOptions(format="gif"),
+        OutputOptions(quality=0),
+        OutputOptions(max_dimension=0),
+    ])
+    def test_invalid_options(self, options):
+        """Test unsupported options raise ValueError."""
+        with pytest.raises(ValueError):
+            options.validate()
+
+
+class TestTranscoder:
+    """Test variant caching."""
+
+    @pytest.fixture
+    def transcoder(self, monkeypatch):
+        """Transcoder using threads and a fake encoder."""
+        monkeypatch.setattr("src.core.services.transcoding.transcode_image", _fake_transcode)
+        transcoder = Transcoder(executor=ThreadPoolExecutor(1))
+        yield transcoder
+        transcoder._executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_variants_are_cached(self, transcoder):
+        """Test the same variant is only encoded once."""
+        options = OutputOptions(format="webp", quality=70)
+
+        first = await transcoder.apply(b"img", "image/png", options)
+        second = await transcoder.apply(b"img", "image/png", options)
+
+        assert first == (b"img:webp:70:None", "image/webp")
+        assert second == first
+        assert (transcoder.hits, transcoder.misses) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_resize_keeps_source_format(self, transcoder):
+        """Test resizing without a format re-encodes in the source format."""
+        image_data, content_type = await transcoder.apply(
+            b"img", "image/jpeg", OutputOptions(max_dimension=32)
+        )
+
+        assert image_data == b"img:jpeg:85:32"
+        assert content_type == "image/jpeg"
+
+    @pytest.mark.asyncio
+    async def test_cache_bounded_by_items(self, transcoder):
+        """Test least recently used variants are evicted."""
+        transcoder.cache_items = 1
+        await transcoder.apply(b"a", "image/png", OutputOptions(format="webp"))
+        await transcoder.apply(b"b", "image/png", OutputOptions(format="webp"))
+        await transcoder.apply(b"a", "image/png", OutputOptions(format="webp"))
+
+        assert transcoder.misses == 3
+
+    @pytest.mark.asyncio
+    async def test_noop_skips_executor(self):
+        """Test no-op options return the input without starting a pool."""
+        transcoder = Transcoder()
+
+        assert await transcoder.apply(b"img", "image/png", OutputOptions()) == (b"img", "image/png")
+        assert transcoder._executor is None
+
+
+class TestTranscodeImage:
+    """Test real encoding (requires Pillow)."""
+
+    def test_thumbnail_to_webp(self):
+        """Test an image is shrunk to fit and re-encoded."""
+        Image = pytest.importorskip("PIL.Image")
+        source = io.BytesIO()
+        Image.new("RGBA", (512, 256), "red").save(source, format="PNG")
+
+        output = transcode_image(source.getvalue(), "jpeg", 80, 128)
+
+        with Image.open(io.BytesIO(output)) as image:
+            assert image.format == "JPEG"
+            assert image.size == (128, 64)
+
+
+class TestImageRouteOutput:
+    """Test POST /images applies output options."""
+
+    def test_return_image_transcoded(self):
+        """Test the returned bytes and content type come from the transcoded result."""
+        result = {"image_data": b"png", "content_type": "image/png", "seed": 1, "job_id": "j"}
+        service = MagicMock()
+        service.artifacts = None
+        service.generate_and_download = AsyncMock(return_value=result)
+        service.apply_output = AsyncMock(
+            return_value={**result, "image_data": b"webp", "content_type": "image/webp"}
+        )
+        app = create_app()
+        app.dependency_overrides[get_civitai_service] = lambda: service
+
+        response = TestClient(app).post("/images", json={
+            "model": MODEL, "prompt": "p", "return_image": True, "stream": True,
+            "format": "webp", "thumbnail": True,
+        })
+
+        assert response.status_code == 200
+        assert response.content == b"webp"
+        assert response.headers["content-type"] == "image/webp"
+        options = service.apply_output.await_args.args[1]
+        assert options == OutputOptions(format="webp", thumbnail=True)